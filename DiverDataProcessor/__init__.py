@@ -1,6 +1,36 @@
+import importlib
+
 import DiverDataProcessor.base
-import DiverDataProcessor.figures
+import DiverDataProcessor.cache
+import DiverDataProcessor.export
+import DiverDataProcessor.instrumentation
+import DiverDataProcessor.outliers
 import DiverDataProcessor.processing
+import DiverDataProcessor.pyramid
+import DiverDataProcessor.quality
 import DiverDataProcessor.readers
+import DiverDataProcessor.shared
+import DiverDataProcessor.store
 from DiverDataProcessor.base import Geology, HandReading, ObservationWell, Timeseries
-from DiverDataProcessor.readers import read_baro_diver, read_ec_diver, read_td_diver, read_diver_link, fetch_air_pressure
+from DiverDataProcessor.readers import (
+    fetch_air_pressure,
+    read_baro_diver,
+    read_diver_directory,
+    read_diver_link,
+    read_ec_diver,
+    read_td_diver,
+)
+
+# submodules with heavy optional dependencies (matplotlib, geopandas, contextily,
+# xarray, dask, zarr) are imported on first access only
+_LAZY_SUBMODULES = ("figures", "network")
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted([*globals(), *_LAZY_SUBMODULES])
@@ -1,4 +1,9 @@
+import numpy as np
 import pandas as pd
+from pandas.api.extensions import take
+
+from DiverDataProcessor import outliers
+from DiverDataProcessor.instrumentation import instrumented
 
 MBAR_TO_MH2O = 0.0101972
 
@@ -13,6 +18,92 @@ def remove_outliers(data: pd.DataFrame, threshold=3):
     return data[~((data < lower_bound) | (data > upper_bound))]
 
 
+def _regular_times(index: pd.Index, jitter=None) -> np.ndarray | None:
+    """
+    The epoch values (ns) of a regularly sampled DatetimeIndex, snapped to the
+    regular grid if they deviate at most jitter from it. None if irregular.
+    """
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        return None
+    times = index.as_unit("ns").asi8
+    if jitter is None:
+        interval = times[1] - times[0]
+        if interval <= 0 or not (np.diff(times) == interval).all():
+            return None
+        return times
+
+    # the interval in whole seconds, as logged by divers
+    second = pd.Timedelta("1s").value
+    interval = round((times[-1] - times[0]) / (len(times) - 1) / second) * second
+    if interval <= 0:
+        return None
+    grid = interval * np.arange(len(times), dtype=np.int64)
+    grid += times[0] + int(np.median(times - times[0] - grid))
+    if np.abs(times - grid).max() > pd.Timedelta(jitter).value:
+        return None
+    return grid
+
+
+def _nearest_indexer_regular(times: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """
+    Integer arithmetic equivalent of Index.get_indexer(target, method="nearest",
+    limit=1) for regularly sampled times: every sample fills at most one target
+    before and one after it (besides exact matches), ties go to the later sample.
+    """
+    n = len(times)
+    interval = times[1] - times[0]
+    slot, remainder = np.divmod(target - times[0], interval)
+    exact = (remainder == 0) & (slot >= 0) & (slot < n)
+
+    # pad: the previous sample fills the first non-exact target after it
+    left = np.clip(slot, -1, n - 1)
+    filled = np.ones(len(target), dtype=bool)
+    filled[1:] = (left[1:] != left[:-1]) | exact[:-1]
+    left[~(exact | filled)] = -1
+
+    # backfill: the next sample fills the last non-exact target before it
+    right = np.clip(slot + (remainder != 0), 0, n)
+    right[right == n] = -1
+    filled[:] = True
+    filled[:-1] = (right[:-1] != right[1:]) | exact[1:]
+    right[~(exact | filled)] = -1
+
+    # like pandas, distances of missing (-1) samples are taken to the last sample
+    left_distance = np.abs(times[left] - target)
+    right_distance = np.abs(times[right] - target)
+    return np.where((left_distance < right_distance) | (right == -1), left, right)
+
+
+def _within_gaps(
+    index: pd.DatetimeIndex, target: pd.DatetimeIndex, max_gap
+) -> np.ndarray:
+    """
+    Flag the target timestamps between two consecutive samples that are more than
+    max_gap apart, except for targets on a sample.
+    """
+    times = index.as_unit("ns").asi8
+    target = target.as_unit("ns").asi8
+    if len(times) == 0:
+        return np.zeros(len(target), dtype=bool)
+    after = np.searchsorted(times, target, side="left")
+    inside = (after > 0) & (after < len(times))
+    after = np.minimum(after, len(times) - 1)
+    before = np.maximum(after - 1, 0)
+    return (
+        inside
+        & (times[after] != target)
+        & (times[after] - times[before] > pd.Timedelta(max_gap).value)
+    )
+
+
+def _take(values: pd.Series, indexer: np.ndarray):
+    """Take values by position, missing (-1) positions become NaN (or NA)."""
+    array = values.array
+    if isinstance(array, pd.arrays.NumpyExtensionArray):
+        array = array.to_numpy()
+    return take(array, indexer, allow_fill=True)
+
+
 class ObservationWell:
     """
     A class object to represent an observation well and its associated properties.
@@ -90,26 +181,202 @@ class Timeseries:
     def __setitem__(self, key, values):
         self.data[key] = values
 
-    def remove_outliers(self):
-        for col in self.data.columns:
-            self[col] = remove_outliers(self[col])
+    def _like(self, data: pd.DataFrame):
+        """A timeseries of the same class holding data."""
+        return self.__class__(data)
+
+    def memory_usage(self) -> pd.Series:
+        """The bytes used by the index ("Index") and by each column."""
+        return self.data.memory_usage(index=True, deep=True)
+
+    def compact(self, dtype=np.float32) -> "CompactTimeseries":
+        """The data as a CompactTimeseries with values of dtype."""
+        return CompactTimeseries(self.data, dtype)
 
+    @instrumented
+    def outlier_mask(self, **detectors) -> pd.DataFrame:
+        """Flags outliers in all columns, see outliers.outlier_mask."""
+        return outliers.outlier_mask(self.data, **detectors)
+
+    @instrumented
+    def remove_outliers(self, **detectors):
+        """
+        Sets outliers to NaN in all columns at once. Without detectors, values beyond
+        the mean +/- 3 standard deviations of each column are removed, otherwise the
+        detectors of outliers.outlier_mask are used.
+        """
+        if detectors:
+            self.data = self.data.mask(self.outlier_mask(**detectors))
+        else:
+            self.data = remove_outliers(self.data)
+
+    @instrumented
     def select_daterange(self, start_date, end_date):
         """Selects data within a specified date range."""
         sel = self.data.loc[start_date:end_date]
-        return self.__class__(sel)
+        return self._like(sel)
+
+    @instrumented
+    def quality_scan(self, **kwargs) -> pd.DataFrame:
+        """Gaps, duplicate timestamps, clock drift, flatlines and jumps as a table
+        of intervals, see quality.scan."""
+        from DiverDataProcessor import quality
 
-    def reindex_time(self, start_date, end_date, freq="h"):
-        """Reindexes the data to a specified time frequency."""
+        return quality.scan(self.data, **kwargs)
+
+    @instrumented
+    def reindex_time(self, start_date, end_date, freq="h", jitter=None, max_gap=None):
+        """
+        Reindexes the data to a specified time frequency, taking the nearest sample
+        (each sample fills at most one timestamp before and after it).
+
+        Regularly sampled data is mapped to the new timestamps with integer
+        arithmetic instead of a nearest neighbour search. With jitter (e.g. "2s"),
+        samples deviating at most jitter from a regular interval (whole seconds)
+        are treated as if they were on that interval. Data that is already on the
+        new timestamps is not copied. With max_gap (e.g. "2h", see
+        quality.scan), timestamps within a longer gap between two samples are not
+        filled.
+        """
         date_range = pd.date_range(
             start=pd.to_datetime(start_date, format="%Y-%m-%d"),
             end=pd.to_datetime(end_date, format="%Y-%m-%d"),
             freq=freq,
         )
+        if self.data.index.equals(date_range):
+            reindexed = self.data.copy(deep=False)
+            reindexed.index = date_range
+            return self._like(reindexed)
 
-        reindexed = self.data.reindex(date_range, method="nearest", limit=1)
-        return self.__class__(reindexed)
+        times = _regular_times(self.data.index, jitter)
+        if times is None:
+            reindexed = self.data.reindex(date_range, method="nearest", limit=1)
+            if max_gap is not None:
+                within = _within_gaps(self.data.index, date_range, max_gap)
+                reindexed = reindexed.mask(pd.Series(within, index=date_range), axis=0)
+            return self._like(reindexed)
 
-    def resample(self, freq="D"):
-        resampled = self.data.resample(freq).mean()
-        return self.__class__(resampled)
+        target = date_range.as_unit("ns").asi8
+        indexer = _nearest_indexer_regular(times, target)
+        if max_gap is not None:
+            indexer[_within_gaps(self.data.index, date_range, max_gap)] = -1
+        reindexed = pd.DataFrame(
+            {column: _take(values, indexer) for column, values in self.data.items()},
+            index=date_range,
+        )
+        return self._like(reindexed)
+
+    @instrumented
+    def resample(self, freq="D", pyramid=None):
+        """
+        The mean per bin of freq. Given a pyramid.AggregatePyramid of the series,
+        or of a longer series the data was selected from, the bins of an hour or
+        coarser are taken from it instead of the samples (see
+        pyramid.default_bins), e.g. to plot a long series at several resolutions.
+        """
+        from DiverDataProcessor.pyramid import default_bins
+
+        if pyramid is None or self.data.empty or not default_bins(freq):
+            return self._like(self.data.resample(freq).mean())
+        index = self.data.index
+        first = self.data.iloc[:1].resample(freq).mean().index[0]
+        resampled = pyramid.resample(freq, first, index[-1]).data
+        resampled = resampled.reindex(columns=self.data.columns)
+        # the first and last bin may hold samples the data was not selected from
+        head = index.searchsorted(resampled.index[1]) if len(resampled) > 1 else None
+        tail = index.searchsorted(resampled.index[-1])
+        for samples in (self.data.iloc[:head], self.data.iloc[tail:]):
+            edge = samples.resample(freq).mean()
+            resampled.loc[edge.index] = edge
+        return self._like(resampled.rename_axis(index.name))
+
+
+class CompactTimeseries(Timeseries):
+    """
+    A Timeseries stored as an int64 array of times and one contiguous array of
+    values (float32 by default) per column, for holding many wells in memory.
+
+    The data property, __getitem__ and select_daterange return views of the arrays
+    instead of copies. All other methods work as for Timeseries and return a
+    CompactTimeseries of the same dtype.
+
+    Attributes:
+    -----------
+    times : np.ndarray
+        The times as int64 (ns since epoch, UTC if timezone aware).
+    values : np.ndarray
+        The values, shape (columns, times), each column contiguous in memory.
+    columns : list[str]
+        The column names.
+    dtype : np.dtype
+        The dtype of the values.
+    """
+
+    def __init__(self, data: pd.DataFrame, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        super().__init__(data)
+
+    @property
+    def data(self) -> pd.DataFrame:
+        # the (times, columns) transpose is stored by pandas as a single block
+        return pd.DataFrame(
+            self.values.T, index=self.index, columns=self.columns, copy=False
+        )
+
+    @data.setter
+    def data(self, data: pd.DataFrame):
+        index = pd.DatetimeIndex(data.index)
+        self.times = index.as_unit("ns").asi8
+        self.values = np.ascontiguousarray(data.to_numpy(dtype=self.dtype).T)
+        self.columns = list(data.columns)
+        self._index_name = index.name
+        self._tz = index.tz
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        index = pd.DatetimeIndex(
+            self.times.view("M8[ns]"), name=self._index_name, copy=False
+        )
+        if self._tz is not None:
+            index = index.tz_localize("UTC").tz_convert(self._tz)
+        return index
+
+    def _view(self, rows: slice) -> "CompactTimeseries":
+        view = object.__new__(self.__class__)
+        view.__dict__.update(self.__dict__)
+        view.times = self.times[rows]
+        view.values = self.values[:, rows]
+        return view
+
+    def _like(self, data: pd.DataFrame) -> "CompactTimeseries":
+        return self.__class__(data, self.dtype)
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            return pd.Series(
+                self.values[self.columns.index(item)],
+                index=self.index,
+                name=item,
+                copy=False,
+            )
+        return self.data[item]
+
+    def __setitem__(self, key, values):
+        if key in self.columns:
+            self.values[self.columns.index(key)] = values
+        else:
+            data = self.data
+            data[key] = values
+            self.data = data
+
+    @instrumented
+    def select_daterange(self, start_date, end_date) -> "CompactTimeseries":
+        """Selects data within a specified date range, as a view of the arrays."""
+        return self._view(self.index.slice_indexer(start_date, end_date))
+
+    def memory_usage(self) -> pd.Series:
+        """The bytes used by the times ("Index") and by each column."""
+        return pd.Series(
+            [self.times.nbytes, *(column.nbytes for column in self.values)],
+            index=["Index", *self.columns],
+        )
@@ -0,0 +1,218 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from DiverDataProcessor.base import Timeseries
+
+CACHE_VERSION = 1
+DEFAULT_MAX_SIZE = 2 * 1024**3  # bytes
+HASH_BLOCK_SIZE = 1024**2  # bytes
+
+
+def content_hash(filepath) -> str:
+    """Hash (BLAKE2b) of the content of a file, read in blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _default_directory() -> Path:
+    return Path(
+        os.environ.get("DDP_CACHE_DIR", Path.home() / ".cache" / "DiverDataProcessor")
+    )
+
+
+class ReaderCache:
+    """
+    Persistent cache of parsed diver files, stored as Parquet next to a small JSON
+    sidecar with the fingerprint of the source file.
+
+    An entry is valid as long as the size and modification time of the source file
+    are unchanged, so warm reads do not touch the source file. If only the
+    modification time changed (e.g. the file was copied again), the content hash
+    decides whether the entry can be reused.
+
+    Attributes:
+    -----------
+    directory : Path
+        The directory holding the cache entries.
+    max_size : int
+        Maximum total size of the cached Parquet files (bytes). The least recently
+        used entries are evicted when the cache grows beyond this size.
+    """
+
+    def __init__(self, directory=None, max_size: int = DEFAULT_MAX_SIZE):
+        self.directory = Path(directory) if directory else _default_directory()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+
+    def _entry(self, reader: str, filepath, kwargs: dict) -> Path:
+        identity = json.dumps(
+            [
+                CACHE_VERSION,
+                reader,
+                str(Path(filepath).resolve()),
+                sorted(kwargs.items()),
+            ],
+            default=str,
+        )
+        return self.directory / hashlib.sha1(identity.encode()).hexdigest()
+
+    def load(self, reader: str, filepath, kwargs: dict) -> pd.DataFrame | None:
+        """Return the cached data of a file, or None if there is no valid entry."""
+        entry = self._entry(reader, filepath, kwargs)
+        meta_path = entry.with_suffix(".json")
+        data_path = entry.with_suffix(".parquet")
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        stat = os.stat(filepath)
+        if stat.st_size != meta["size"]:
+            return None
+        if stat.st_mtime_ns != meta["mtime"]:
+            if content_hash(filepath) != meta["hash"]:
+                return None
+            meta["mtime"] = stat.st_mtime_ns
+            meta_path.write_text(json.dumps(meta))
+
+        try:
+            data = pd.read_parquet(data_path)
+        except FileNotFoundError:
+            return None
+        os.utime(data_path)  # mark as most recently used
+        return data
+
+    def store(self, reader: str, filepath, kwargs: dict, data: pd.DataFrame):
+        """Store the parsed data of a file and evict entries beyond max_size."""
+        entry = self._entry(reader, filepath, kwargs)
+        stat = os.stat(filepath)
+        meta = {
+            "reader": reader,
+            "path": str(Path(filepath).resolve()),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": content_hash(filepath),
+        }
+
+        tmp_path = entry.with_suffix(f".{os.getpid()}.tmp")
+        data.to_parquet(tmp_path)
+        os.replace(tmp_path, entry.with_suffix(".parquet"))
+        entry.with_suffix(".json").write_text(json.dumps(meta))
+        self._evict()
+
+    def invalidate(self, filepath=None):
+        """Remove the entries of a single source file, or all entries if None."""
+        path = str(Path(filepath).resolve()) if filepath is not None else None
+        for meta_path in self.directory.glob("*.json"):
+            if path is not None:
+                try:
+                    meta = json.loads(meta_path.read_text())
+                except (FileNotFoundError, json.JSONDecodeError):
+                    continue
+                if meta["path"] != path:
+                    continue
+            self._remove(meta_path.with_suffix(""))
+
+    def size(self) -> int:
+        """Total size of the cached Parquet files (bytes)."""
+        return sum(p.stat().st_size for p in self.directory.glob("*.parquet"))
+
+    def _remove(self, entry: Path):
+        for suffix in (".json", ".parquet"):
+            entry.with_suffix(suffix).unlink(missing_ok=True)
+
+    def _evict(self):
+        entries = []
+        for data_path in self.directory.glob("*.parquet"):
+            try:
+                stat = data_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, data_path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, data_path in entries:
+            if total <= self.max_size:
+                break
+            self._remove(data_path.with_suffix(""))
+            total -= size
+
+
+_cache: ReaderCache | None = None
+
+
+def enable_cache(directory=None, max_size: int = DEFAULT_MAX_SIZE) -> ReaderCache:
+    """
+    Enable the persistent cache for all readers.
+
+    Parameters
+    ----------
+    directory : str or Path, optional
+        The cache directory. Defaults to the DDP_CACHE_DIR environment variable or
+        ~/.cache/DiverDataProcessor.
+    max_size : int, optional
+        Maximum size of the cache (bytes). Default is 2 GiB.
+
+    Returns
+    -------
+    ReaderCache
+        The active cache.
+
+    """
+    global _cache
+    _cache = ReaderCache(directory, max_size)
+    return _cache
+
+
+def disable_cache():
+    """Disable the persistent cache, entries on disk are kept."""
+    global _cache
+    _cache = None
+
+
+def invalidate(filepath=None):
+    """Remove the cache entries of a source file, or all entries if None."""
+    if _cache is not None:
+        _cache.invalidate(filepath)
+
+
+def _key_arguments(signature: inspect.Signature, filepath, args, kwargs) -> dict:
+    # positional and keyword calls, with or without defaults, share an entry
+    bound = signature.bind(filepath, *args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(list(bound.arguments.items())[1:])
+    if arguments.get("dtype") is not None:
+        arguments["dtype"] = np.dtype(arguments["dtype"]).name
+    return arguments
+
+
+def cached(reader):
+    """Decorate a reader to load and store its result in the active cache."""
+    signature = inspect.signature(reader)
+
+    @functools.wraps(reader)
+    def wrapper(filepath, *args, **kwargs):
+        if _cache is None:
+            return reader(filepath, *args, **kwargs)
+
+        arguments = _key_arguments(signature, filepath, args, kwargs)
+        data = _cache.load(reader.__name__, filepath, arguments)
+        if data is not None:
+            return Timeseries(data)
+
+        timeseries = reader(filepath, *args, **kwargs)
+        _cache.store(reader.__name__, filepath, arguments, timeseries.data)
+        return timeseries
+
+    return wrapper
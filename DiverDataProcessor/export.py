@@ -0,0 +1,265 @@
+import uuid
+from collections.abc import Iterable
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from DiverDataProcessor.base import Timeseries
+
+FORMATS = {"parquet": ".parquet", "feather": ".feather", "netcdf": ".nc"}
+DEFAULT_COMPRESSION = "zstd"
+
+
+def _well_directory(root: Path, well: str) -> Path:
+    return root / f"well={quote(str(well), safe='')}"
+
+
+def _partition(root: Path, well: str, year: int) -> Path:
+    return _well_directory(root, well) / f"year={year}"
+
+
+def _frame(data: pd.DataFrame, float32: bool) -> pd.DataFrame:
+    if float32:
+        data = data.astype(
+            {c: np.float32 for c, dtype in data.dtypes.items() if dtype == np.float64}
+        )
+    return data.rename_axis("date").reset_index()
+
+
+def _write_part(frame: pd.DataFrame, path: Path, fmt: str, compression: str):
+    if fmt == "netcdf":
+        encoding = (
+            {c: {"zlib": True, "complevel": 4} for c in frame.columns[1:]}
+            if compression
+            else None
+        )
+        frame.set_index("date").to_xarray().to_netcdf(path, encoding=encoding)
+        return
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    if fmt == "parquet":
+        pq.write_table(table, path, compression=compression or "none")
+    else:
+        feather.write_feather(table, path, compression=compression or "uncompressed")
+
+
+def write_timeseries(
+    timeseries: Timeseries,
+    root,
+    well: str,
+    fmt: str = "parquet",
+    float32: bool = False,
+    compression: str | None = DEFAULT_COMPRESSION,
+) -> list[Path]:
+    """
+    Write a timeseries to a dataset partitioned by well and year
+    (root/well=<well>/year=<year>/part-*.parquet).
+
+    Every call adds new part files, existing partitions are not rewritten, so
+    appending new data only writes the new samples.
+
+    Parameters
+    ----------
+    timeseries : Timeseries
+        Timeseries with a DatetimeIndex.
+    root : str or Path
+        Root directory of the dataset.
+    well : str
+        The well (or diver code) of the timeseries.
+    fmt : str, optional
+        "parquet", "feather" or "netcdf". Default is "parquet".
+    float32 : bool, optional
+        Store float64 columns as float32, halving the size. Default is False.
+    compression : str, optional
+        Compression codec of Parquet and Feather ("zstd", "lz4", ...), NetCDF is
+        compressed with zlib. None writes uncompressed files. Default is "zstd".
+
+    Returns
+    -------
+    list[Path]
+        The written part files.
+
+    Raises
+    ------
+    ValueError
+        If fmt is not valid.
+
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format not valid, use: {tuple(FORMATS)}.")
+
+    root = Path(root)
+    data = timeseries.data.sort_index()
+    if data.empty:
+        return []
+    years = data.index.year
+    bounds = np.flatnonzero(np.diff(years)) + 1
+    written = []
+    for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(data)]):
+        part = data.iloc[start:end]
+        partition = _partition(root, well, years[start])
+        partition.mkdir(parents=True, exist_ok=True)
+        path = partition / (
+            f"part-{part.index[0]:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}{FORMATS[fmt]}"
+        )
+        _write_part(_frame(part, float32), path, fmt, compression)
+        written.append(path)
+    return written
+
+
+def write_timeseries_batch(
+    timeseries: dict[str, Timeseries], root, **kwargs
+) -> list[Path]:
+    """Write the timeseries of many wells, see write_timeseries."""
+    written = []
+    for well, well_timeseries in timeseries.items():
+        written += write_timeseries(well_timeseries, root, well, **kwargs)
+    return written
+
+
+def _select_parts(root: Path, wells, start, end, suffix: str) -> list[Path]:
+    if wells is None:
+        partitions = root.glob("well=*")
+    else:
+        wells = [wells] if isinstance(wells, str) else wells
+        partitions = (_well_directory(root, well) for well in wells)
+
+    first_year = start.year if start is not None else -np.inf
+    last_year = end.year if end is not None else np.inf
+    parts = []
+    for partition in partitions:
+        for year_dir in sorted(partition.glob("year=*")):
+            if first_year <= int(year_dir.name.removeprefix("year=")) <= last_year:
+                parts += sorted(year_dir.glob(f"*{suffix}"))
+    return parts
+
+
+def last_timestamp(root, well: str) -> pd.Timestamp | None:
+    """
+    The last date of a well in a Parquet dataset written by write_timeseries, from
+    the statistics of the files in the latest year partition.
+    """
+    years = sorted(
+        _well_directory(Path(root), well).glob("year=*"),
+        key=lambda p: int(p.name.removeprefix("year=")),
+    )
+    if not years:
+        return None
+    last = None
+    for part in years[-1].glob("*.parquet"):
+        metadata = pq.ParquetFile(part).metadata
+        column = metadata.schema.names.index("date")
+        for i in range(metadata.num_row_groups):
+            statistics = metadata.row_group(i).column(column).statistics
+            if statistics is None or not statistics.has_min_max:
+                value = pq.read_table(part, columns=["date"])["date"].to_pandas().max()
+            else:
+                value = pd.Timestamp(statistics.max)
+            last = value if last is None else max(last, value)
+    return last
+
+
+def _well_of(part: Path) -> str:
+    return unquote(part.parent.parent.name.removeprefix("well="))
+
+
+def _read_netcdf(parts: list[Path], start, end) -> pd.DataFrame:
+    import xarray as xr
+
+    frames = []
+    for part in parts:
+        with xr.open_dataset(part) as dataset:
+            frame = dataset.sel(date=slice(start, end)).to_dataframe()
+        frames.append(frame.reset_index().assign(well=_well_of(part)))
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_timeseries(
+    root,
+    wells: str | Iterable[str] = None,
+    start=None,
+    end=None,
+    columns: list[str] = None,
+    fmt: str = "parquet",
+) -> dict[str, Timeseries]:
+    """
+    Read timeseries from a dataset written by write_timeseries. Only the
+    partitions of the selected wells and years are opened, and the date range is
+    pushed down to the row groups of the files.
+
+    Parameters
+    ----------
+    root : str or Path
+        Root directory of the dataset.
+    wells : str or Iterable[str], optional
+        The wells to read. Default is all wells.
+    start, end : str or pd.Timestamp, optional
+        First and last date to read (inclusive). Default is the whole period.
+    columns : list[str], optional
+        The columns to read. Default is all columns.
+    fmt : str, optional
+        "parquet", "feather" or "netcdf". Default is "parquet".
+
+    Returns
+    -------
+    dict[str, Timeseries]
+        The timeseries per well, sorted by date.
+
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format not valid, use: {tuple(FORMATS)}.")
+
+    root = Path(root)
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    parts = _select_parts(root, wells, start, end, FORMATS[fmt])
+    if not parts:
+        return {}
+
+    if fmt == "netcdf":
+        data = _read_netcdf(parts, start, end).sort_values(["well", "date"])
+        if columns is not None:
+            data = data[["date", "well", *columns]]
+    else:
+        dataset = ds.dataset(
+            [str(p) for p in parts],
+            format="parquet" if fmt == "parquet" else "feather",
+            partitioning=ds.partitioning(
+                pa.schema([("well", pa.string()), ("year", pa.int32())]),
+                flavor="hive",
+            ),
+            partition_base_dir=str(root),
+        )
+        date_filter = None
+        date = ds.field("date")
+        if start is not None:
+            date_filter = date >= start.to_datetime64()
+        if end is not None:
+            end_filter = date <= end.to_datetime64()
+            date_filter = (
+                end_filter if date_filter is None else date_filter & end_filter
+            )
+        table = dataset.to_table(
+            columns=None if columns is None else ["date", "well", *columns],
+            filter=date_filter,
+        )
+        table = table.sort_by([("well", "ascending"), ("date", "ascending")])
+        data = table.to_pandas().drop(columns="year", errors="ignore")
+
+    if data.empty:
+        return {}
+
+    # split into wells by slicing, the rows are sorted by well and date
+    wells = data.pop("well").to_numpy()
+    data = data.set_index("date")
+    bounds = np.flatnonzero(wells[1:] != wells[:-1]) + 1
+    return {
+        wells[start]: Timeseries(data.iloc[start:end])
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(data)])
+    }
@@ -0,0 +1,174 @@
+import os
+import time
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from DiverDataProcessor import base
+from DiverDataProcessor.figures.visualisations import GeologyGroundwater
+
+FIGSIZE = (8.27, 11.69 / 2)  # half A4
+DPI = 150
+
+
+@dataclass
+class FigureJob:
+    """
+    The data of a single GeologyGroundwater figure of render_figures.
+
+    Attributes:
+    -----------
+    observation_well : base.ObservationWell
+        The observation well, its name is the title of the figure.
+    geology : base.Geology
+        The geology of the well.
+    water_level : pd.Series
+        The water level.
+    precipitation : pd.Series
+        The precipitation, None to plot no precipitation.
+    units : str
+        The units of the geology and water level axes.
+    filename : str
+        The file name without suffix, None to use the name of the observation well.
+    """
+
+    observation_well: base.ObservationWell
+    geology: base.Geology
+    water_level: pd.Series
+    precipitation: pd.Series | None = None
+    units: str = "m"
+    filename: str | None = None
+
+    @property
+    def name(self) -> str:
+        return self.filename or str(self.observation_well.name)
+
+
+# figure templates of this process, reused between figures of the same size
+_templates: dict[tuple, GeologyGroundwater] = {}
+
+
+def _template(
+    observation_well: base.ObservationWell, figsize: tuple[float, float], dpi: float
+) -> GeologyGroundwater:
+    key = (tuple(figsize), dpi)
+    template = _templates.get(key)
+    if template is None:
+        # an Agg canvas without pyplot, so no global figure manager state
+        fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+        template = _templates[key] = GeologyGroundwater(observation_well, fig=fig)
+    else:
+        template.clear(observation_well)
+    return template
+
+
+def render_figure(
+    job: FigureJob, path, figsize: tuple[float, float] = FIGSIZE, dpi: float = DPI
+) -> float:
+    """
+    Render a single figure to path (PNG, PDF, SVG, ... by suffix) on a reused
+    figure template of this process.
+
+    Returns
+    -------
+    float
+        The time to plot and write the figure (s).
+
+    """
+    start = time.perf_counter()
+    figure = _template(job.observation_well, figsize, dpi)
+    figure.plot_geology(job.geology, units=job.units)
+    figure.plot_water_level(job.water_level, units=job.units, dpi=dpi)
+    if job.precipitation is not None:
+        figure.plot_precipitation(job.precipitation, dpi=dpi)
+    figure.fig.savefig(path, dpi=dpi, bbox_inches="tight")
+    return time.perf_counter() - start
+
+
+def _render(job: FigureJob, path: Path, figsize, dpi) -> tuple[float, int]:
+    return render_figure(job, path, figsize, dpi), os.getpid()
+
+
+def render_figures(
+    jobs: Iterable[FigureJob | tuple],
+    output_dir,
+    fmt: str = "png",
+    workers: int = None,
+    figsize: tuple[float, float] = FIGSIZE,
+    dpi: float = DPI,
+) -> tuple[pd.DataFrame, dict[str, Exception]]:
+    """
+    Render a GeologyGroundwater figure per job on a process pool. Each worker
+    renders headless (Agg, without pyplot) and reuses its figure and axes between
+    jobs, the figures are written directly to output_dir.
+
+    Parameters
+    ----------
+    jobs : Iterable[FigureJob or tuple]
+        The figures, as FigureJob or (observation_well, geology, water_level,
+        precipitation) tuples.
+    output_dir : str or Path
+        The directory of the figures, named <name>.<fmt> (see FigureJob.name).
+    fmt : str, optional
+        The file format, e.g. "png" or "pdf". Default is "png".
+    workers : int, optional
+        Number of worker processes. Default is the number of CPUs, 1 renders the
+        figures in this process.
+    figsize : tuple[float, float], optional
+        The figure size (inches). Default is half A4.
+    dpi : float, optional
+        The resolution of the figures. Default is 150.
+
+    Returns
+    -------
+    tuple[pd.DataFrame, dict[str, Exception]]
+        The path, render time (s) and worker process of each figure, indexed by
+        name, and the errors of figures that failed.
+
+    Raises
+    ------
+    ValueError
+        If the names of the jobs are not unique.
+
+    """
+    jobs = [job if isinstance(job, FigureJob) else FigureJob(*job) for job in jobs]
+    names = [job.name for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Names of the figures are not unique, set the filename.")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = {job.name: output_dir / f"{job.name}.{fmt}" for job in jobs}
+
+    results = {}
+    errors = {}
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        for job in jobs:
+            try:
+                results[job.name] = _render(job, paths[job.name], figsize, dpi)
+            except Exception as e:
+                errors[job.name] = e
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, max(len(jobs), 1))) as pool:
+            futures = {
+                pool.submit(_render, job, paths[job.name], figsize, dpi): job.name
+                for job in jobs
+            }
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    errors[futures[future]] = e
+
+    timings = pd.DataFrame(
+        [(name, paths[name], *results[name]) for name in names if name in results],
+        columns=["name", "path", "wall_time", "pid"],
+    ).set_index("name")
+    return timings, {name: errors[name] for name in names if name in errors}
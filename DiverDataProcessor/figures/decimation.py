@@ -0,0 +1,128 @@
+import matplotlib as mpl
+import numpy as np
+import pandas as pd
+
+BUCKETS_PER_PIXEL = 2
+
+
+def axis_pixels(ax, dpi: float = None) -> int:
+    """
+    The width of an axis in pixels, at dpi or else the largest of the figure and
+    savefig dpi.
+    """
+    fig = ax.get_figure()
+    if dpi is None:
+        savefig_dpi = mpl.rcParams["savefig.dpi"]
+        dpi = max(fig.dpi, savefig_dpi if savefig_dpi != "figure" else 0)
+    return max(int(np.ceil(ax.get_position().width * fig.get_figwidth() * dpi)), 1)
+
+
+def _buckets(x: np.ndarray, n_buckets: int) -> np.ndarray:
+    span = x[-1] - x[0]
+    if span <= 0:
+        return np.zeros(len(x), dtype=np.int64)
+    bucket = ((x - x[0]) / span * n_buckets).astype(np.int64)
+    return np.minimum(bucket, n_buckets - 1)
+
+
+def _first_per_group(group: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    positions = np.flatnonzero(mask)
+    _, first = np.unique(group[positions], return_index=True)
+    return positions[first]
+
+
+def m4_indices(x: np.ndarray, y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    The positions of the first, minimum, maximum and last sample of each of
+    n_buckets equal-width buckets of x (M4 decimation). Drawn as a line, the
+    selected samples are indistinguishable from all samples if there is one bucket
+    per pixel column.
+
+    The first NaN of each gap is kept, so that lines are interrupted as before.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        The sorted x values, e.g. the int64 values of a DatetimeIndex.
+    y : np.ndarray
+        The y values.
+    n_buckets : int
+        The number of buckets, e.g. the width of the axis in pixels.
+
+    Returns
+    -------
+    np.ndarray
+        The sorted positions of the selected samples.
+
+    """
+    n = len(y)
+    if n <= 4 * n_buckets:
+        return np.arange(n)
+
+    valid = ~np.isnan(y)
+    gap_start = ~valid & np.r_[True, valid[:-1]]
+    positions = np.flatnonzero(valid)
+    if len(positions) == 0:
+        return np.flatnonzero(gap_start)
+
+    # groups of consecutive valid samples within a bucket, split at gaps
+    bucket = _buckets(x, n_buckets)[positions]
+    segment = np.cumsum(gap_start)[positions]
+    boundary = (np.diff(bucket) != 0) | (np.diff(segment) != 0)
+    starts = np.r_[0, np.flatnonzero(boundary) + 1]
+    ends = np.r_[starts[1:], len(positions)]
+    group = np.repeat(np.arange(len(starts)), ends - starts)
+
+    values = y[positions]
+    minima = np.repeat(np.minimum.reduceat(values, starts), ends - starts)
+    maxima = np.repeat(np.maximum.reduceat(values, starts), ends - starts)
+    selected = np.concatenate(
+        [
+            positions[starts],
+            positions[ends - 1],
+            positions[_first_per_group(group, values == minima)],
+            positions[_first_per_group(group, values == maxima)],
+            np.flatnonzero(gap_start),
+        ]
+    )
+    return np.unique(selected)
+
+
+def decimate_series(series: pd.Series, n_buckets: int) -> pd.Series:
+    """The samples of a series selected by m4_indices."""
+    if not series.index.is_monotonic_increasing:
+        series = series.sort_index()
+    index = series.index
+    x = index.asi8 if isinstance(index, pd.DatetimeIndex) else index.to_numpy(float)
+    return series.iloc[m4_indices(x, series.to_numpy(dtype=float), n_buckets)]
+
+
+def max_per_bucket(series: pd.Series, n_buckets: int) -> tuple[pd.Series, float]:
+    """
+    The maximum of a series per bucket of equal width, for bar charts with more
+    bars than pixels.
+
+    Returns
+    -------
+    tuple[pd.Series, float]
+        The maxima indexed by the start of the (non-empty) buckets, and the width
+        of a bucket in units of the index (days for a DatetimeIndex).
+
+    """
+    series = series.sort_index()
+    index = series.index
+    if isinstance(index, pd.DatetimeIndex):
+        x = index.as_unit("ns").asi8
+        unit = pd.Timedelta("1D").value
+    else:
+        x = index.to_numpy(dtype=float)
+        unit = 1.0
+    bucket = _buckets(x, n_buckets)
+    maxima = series.groupby(bucket).max()
+    width = (x[-1] - x[0]) / n_buckets
+    starts = x[0] + maxima.index.to_numpy() * width
+    if isinstance(index, pd.DatetimeIndex):
+        starts = pd.to_datetime(starts.astype(np.int64), utc=index.tz is not None)
+        if index.tz is not None:
+            starts = starts.tz_convert(index.tz)
+    return pd.Series(maxima.to_numpy(), index=starts), width / unit
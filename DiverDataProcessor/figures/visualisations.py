@@ -1,13 +1,22 @@
 import contextily as cx
 import geopandas as gpd
+import matplotlib as mpl
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import xarray as xr
+from matplotlib.figure import Figure
 from matplotlib.gridspec import GridSpec
 
 from DiverDataProcessor import base
+from DiverDataProcessor.figures.decimation import (
+    BUCKETS_PER_PIXEL,
+    axis_pixels,
+    decimate_series,
+    max_per_bucket,
+)
+from DiverDataProcessor.instrumentation import instrumented
 
 DATE_FORMAT = mdates.DateFormatter("%m/%Y")
 
@@ -29,8 +38,17 @@ class VariableColormap:
     precipitation = "#861657"
 
 
+def _figure_well(self, **kwargs) -> str:
+    return self.name
+
+
 class GeologyGroundwater:
-    def __init__(self, observation_well: base.ObservationWell, **figure_kwargs):
+    def __init__(
+        self,
+        observation_well: base.ObservationWell,
+        fig: Figure = None,
+        **figure_kwargs,
+    ):
         """
         Create figure with geology (left) and groundwater level (right).
 
@@ -38,6 +56,9 @@ class GeologyGroundwater:
         ----------
         observation_well : base.ObservationWell
             The observation well object containing data to be visualized.
+        fig : matplotlib.figure.Figure, optional
+            An empty figure to draw on, e.g. a Figure with an Agg canvas to render
+            without pyplot. Default is a new pyplot figure.
         **figure_kwargs : dict
             Additional keyword arguments to customize the matplotlib figure.
         Attributes
@@ -50,8 +71,11 @@ class GeologyGroundwater:
             The subplot for displaying water level data.
         precipitation : matplotlib.axes._subplots.AxesSubplot
             (optional) The twin subplot for displaying precipitation data.
+        name : str
+            The name of the observation well.
         """
-        self.fig = plt.figure(**figure_kwargs)
+        self.name = observation_well.name
+        self.fig = plt.figure(**figure_kwargs) if fig is None else fig
         width_ratios = [0.2, 1.0]
         wspace = 0.35
         gs = GridSpec(
@@ -63,6 +87,24 @@ class GeologyGroundwater:
         self.precipitation = self.water_level.twinx()
         self.fig.suptitle(observation_well.name)
 
+    def clear(self, observation_well: base.ObservationWell):
+        """Clear the axes to draw another observation well on the same figure."""
+        self.name = observation_well.name
+        for ax in (self.geology, self.water_level, self.precipitation):
+            ax.cla()
+            for spine in ax.spines.values():
+                spine.set_visible(True)
+                spine.set_color(mpl.rcParams["axes.edgecolor"])
+        # the twin axes copy the limits of each other while clearing
+        for ax in (self.water_level, self.precipitation):
+            ax.dataLim.set_points(mpl.transforms.Bbox.null().get_points())
+            ax.autoscale()
+        self.precipitation.yaxis.tick_right()
+        self.precipitation.yaxis.set_label_position("right")
+        self.precipitation.xaxis.set_visible(False)
+        self.precipitation.patch.set_visible(False)
+        self.fig.suptitle(observation_well.name)
+
     def _hide_precipitation_axis(self):
         self.precipitation.spines["top"].set_visible(False)
         self.precipitation.spines["bottom"].set_visible(False)
@@ -78,6 +120,7 @@ class GeologyGroundwater:
             "Neerslag [mm]", color=VariableColormap.precipitation
         )
 
+    @instrumented(well_from=_figure_well)
     def plot_geology(self, geology: base.Geology, units: str):
         bottoms = geology.bottoms
         thickness = geology.thickness
@@ -97,7 +140,25 @@ class GeologyGroundwater:
         self.geology.spines["right"].set_visible(False)
         self.geology.set_ylim(bottom, surface_level + 0.20)
 
-    def plot_water_level(self, water_level: pd.Series, units: str):
+    @instrumented(well_from=_figure_well)
+    def plot_water_level(
+        self,
+        water_level: pd.Series,
+        units: str,
+        decimate: bool = True,
+        dpi: float = None,
+    ):
+        """
+        Plot the water level as a line with a filled area below it.
+
+        With decimate, only the first, minimum, maximum and last sample per half
+        pixel column of the axis are drawn (see decimation.m4_indices), which looks
+        the same as drawing all samples. Set dpi to the dpi the figure is saved at if
+        it is higher than the figure and savefig dpi.
+        """
+        if decimate:
+            n_buckets = BUCKETS_PER_PIXEL * axis_pixels(self.water_level, dpi)
+            water_level = decimate_series(water_level, n_buckets)
         x = water_level.index
         y1 = water_level.values
         y2 = np.nanmin(y1) - 30.0
@@ -119,11 +180,28 @@ class GeologyGroundwater:
         #
         self._hide_precipitation_axis()
 
-    def plot_precipitation(self, precipitation: pd.Series):
-        x = precipitation.index
-        y = precipitation.values
-
-        self.precipitation.bar(x, y, color=VariableColormap.precipitation)
+    @instrumented(well_from=_figure_well)
+    def plot_precipitation(
+        self, precipitation: pd.Series, decimate: bool = True, dpi: float = None
+    ):
+        """
+        Plot the precipitation as bars. With decimate and more bars than pixel
+        columns, a bar of the maximum is drawn per pixel column instead.
+        """
+        n_buckets = axis_pixels(self.precipitation, dpi)
+        if decimate and len(precipitation) > n_buckets:
+            maxima, width = max_per_bucket(precipitation, n_buckets)
+            self.precipitation.bar(
+                maxima.index,
+                maxima.values,
+                width=width,
+                align="edge",
+                color=VariableColormap.precipitation,
+            )
+        else:
+            x = precipitation.index
+            y = precipitation.values
+            self.precipitation.bar(x, y, color=VariableColormap.precipitation)
         self.precipitation.margins(x=0)
         self.precipitation.set_ylim([0, 100])
 
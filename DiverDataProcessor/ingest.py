@@ -0,0 +1,476 @@
+"""
+Ingestion service of a watch folder: new Diver Office and DiverLink exports that
+are dropped in the folder are read, compensated against the current baro and
+appended to a DiverStore.
+
+Usage: ddp-ingest DIRECTORY STORE [--baro BARO.CSV] [--metadata metadata.xlsx]
+
+Barometric exports dropped in the folder extend the baro, which is kept in the
+store. Diver samples received before the baro covered them are compensated once
+it does. The state of the service and of every file is written to
+STORE/ingest.json.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from DiverDataProcessor import readers, runner
+from DiverDataProcessor.base import HandReading, ObservationWell, Timeseries
+from DiverDataProcessor.store import DiverStore
+
+STATUS_FILE = "ingest.json"
+SETTLE = 2.0  # s a file must be unchanged before it is read
+POLL_INTERVAL = 0.5  # s between scans of the directory
+MAX_PENDING = 64  # files queued before the directory is no longer scanned
+
+
+def _read(filepath: Path, kind: str, dtype=None) -> tuple[str, Timeseries]:
+    if kind == "auto":
+        kind = readers.detect_diver_kind(filepath)
+    return kind, readers._read_diver_file(filepath, kind, dtype)
+
+
+def _detect_kinds(filepaths: list[Path], kind: str) -> list[str]:
+    kinds = []
+    for filepath in filepaths:
+        try:
+            kinds.append(
+                readers.detect_diver_kind(filepath) if kind == "auto" else kind
+            )
+        except (OSError, ValueError):
+            kinds.append(kind)  # reported when the file is ingested
+    return kinds
+
+
+def _timestamp(timestamp: pd.Timestamp | None) -> str | None:
+    return None if timestamp is None else timestamp.isoformat()
+
+
+def _uncompensated_from(status: dict) -> dict[str, tuple[pd.Timestamp, pd.Timestamp]]:
+    return {
+        well: (pd.Timestamp(period["start"]), pd.Timestamp(period["end"]))
+        for well, period in status.get("uncompensated", {}).items()
+    }
+
+
+class IngestService:
+    """
+    Watches a directory for new diver exports and ingests them into a DiverStore.
+
+    A file is read once its size and modification time did not change for settle
+    seconds, so files that are still being written or copied are not read. Files
+    are parsed with the readers on a bounded executor. Barometric exports extend
+    the baro stored in the store (see DiverStore.append_baro), all other exports
+    are appended to the store and compensated against the baro (see
+    DiverStore.update). Wells without an observation well are only appended.
+
+    Samples of a well that the baro does not cover yet, e.g. a diver export
+    received before the baro, are kept as the uncompensated period of the well in
+    the status file. They are compensated when a baro export covers them (see
+    DiverStore.compensate), also after a restart of the service.
+
+    At most max_pending files are queued, the directory is not scanned while the
+    queue is full. A file that changes after it was ingested is ingested again,
+    samples that are already stored are skipped by the store.
+
+    Attributes:
+    -----------
+    directory : Path
+        The watched directory.
+    store : DiverStore
+        The store the exports are appended to.
+    baro : Timeseries
+        The barometric pressure, loaded from the store and extended by the given
+        and received baro. None until a baro is given or received.
+    observation_wells : Mapping[str, ObservationWell]
+        The observation well per well, to compensate its exports.
+    handreadings : Mapping[str, HandReading or Iterable[HandReading]]
+        The hand readings per well, see DiverStore.update. Wells without hand
+        readings use the "cable" method.
+    kind : str
+        The type of the exports, see readers.read_diver_directory.
+    pattern : str
+        Glob pattern of the exports.
+    settle : float
+        Seconds a file must be unchanged before it is read.
+    poll_interval : float
+        Seconds between scans of the directory.
+    workers : int
+        Number of files ingested at the same time.
+    max_pending : int
+        Maximum number of queued files.
+    executor : Executor
+        The executor the exports are parsed on, e.g. a ProcessPoolExecutor. None
+        for a thread pool of workers threads.
+    status_path : Path
+        The JSON file with the state of the service and of every file, by default
+        ingest.json in the root of the store.
+    well_from : Callable[[Path], str]
+        The well of an export. By default the longest name of the observation
+        wells in the file name, or else the file name without suffix.
+    dtype : str or np.dtype
+        Float type the values are parsed to, None for float64.
+    kwargs : dict
+        Passed to processing.baro_compensate, e.g. alignment and tolerance.
+    files : dict[str, dict]
+        The state of every file seen, by file name.
+    uncompensated : dict[str, tuple[pd.Timestamp, pd.Timestamp]]
+        The first and last stored sample per well that has no water level yet.
+    """
+
+    def __init__(
+        self,
+        directory,
+        store: DiverStore,
+        baro: Timeseries = None,
+        observation_wells: Mapping[str, ObservationWell] = None,
+        handreadings: Mapping[str, HandReading | Iterable[HandReading]] = None,
+        kind: str = "auto",
+        pattern: str = "*.[cC][sS][vV]",
+        settle: float = SETTLE,
+        poll_interval: float = POLL_INTERVAL,
+        workers: int = 2,
+        max_pending: int = MAX_PENDING,
+        executor: Executor = None,
+        status_path=None,
+        well_from: Callable[[Path], str] = None,
+        dtype=None,
+        **kwargs,
+    ):
+        if kind != "auto" and kind not in readers.DIVER_KINDS:
+            raise ValueError(f'Kind not valid, use: "auto", {readers.DIVER_KINDS}.')
+        self.directory = Path(directory)
+        self.store = store
+        if baro is not None:
+            store.append_baro(baro)
+        self.baro = store.read_baro()
+        self.observation_wells = observation_wells or {}
+        self.handreadings = handreadings or {}
+        self.kind = kind
+        self.pattern = pattern
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = executor
+        self.status_path = Path(status_path or store.root / STATUS_FILE)
+        self.well_from = well_from or self._well_from
+        self.dtype = dtype
+        self.kwargs = kwargs
+
+        # files that were queued or processing when the service stopped are redone
+        status = self._load_status()
+        self.files = {
+            name: record
+            for name, record in status.get("files", {}).items()
+            if record["state"] in ("ingested", "failed")
+        }
+        self.uncompensated = _uncompensated_from(status)
+        self.running = False
+        self._settling: dict[str, tuple[tuple[int, int], float]] = {}
+        self._locks = defaultdict(asyncio.Lock)
+        self._queue: asyncio.Queue | None = None
+
+    def _well_from(self, filepath: Path) -> str:
+        well = runner.match_well(filepath.stem, self.observation_wells)
+        return filepath.stem if well is None else well
+
+    def _load_status(self) -> dict:
+        try:
+            return json.loads(self.status_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def status(self) -> dict:
+        """The state of the service and of every file, as in the status file."""
+        states = [record["state"] for record in self.files.values()]
+        return {
+            "directory": str(self.directory),
+            "running": self.running,
+            "updated": pd.Timestamp.now(tz="UTC").isoformat(),
+            "queued": 0 if self._queue is None else self._queue.qsize(),
+            "settling": len(self._settling),
+            "ingested": states.count("ingested"),
+            "failed": states.count("failed"),
+            "baro_end": _timestamp(
+                None if self.baro is None else self.baro.data.index.max()
+            ),
+            "uncompensated": {
+                well: {"start": _timestamp(start), "end": _timestamp(end)}
+                for well, (start, end) in self.uncompensated.items()
+            },
+            "files": self.files,
+        }
+
+    def _write_status(self):
+        self.status_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.status_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.status(), indent=2, sort_keys=True))
+        os.replace(tmp_path, self.status_path)
+
+    def _stat(self) -> list[tuple[Path, int, int]]:
+        stats = []
+        for filepath in sorted(self.directory.glob(self.pattern)):
+            try:
+                stat = filepath.stat()
+            except FileNotFoundError:
+                continue
+            stats.append((filepath, stat.st_size, stat.st_mtime_ns))
+        return stats
+
+    def _select(self, stats: list[tuple[Path, int, int]]) -> list[Path]:
+        now = time.monotonic()
+        ready = []
+        for filepath, size, mtime_ns in stats:
+            record = self.files.get(filepath.name)
+            if size == 0 or (
+                record is not None
+                and (record["size"], record["mtime_ns"]) == (size, mtime_ns)
+            ):
+                continue
+
+            settling = self._settling.get(filepath.name)
+            if settling is None or settling[0] != (size, mtime_ns):
+                self._settling[filepath.name] = ((size, mtime_ns), now)
+            elif now - settling[1] >= self.settle:
+                del self._settling[filepath.name]
+                self.files[filepath.name] = {
+                    "state": "queued",
+                    "size": size,
+                    "mtime_ns": mtime_ns,
+                }
+                ready.append(filepath)
+
+        # files that were removed while settling
+        for name in set(self._settling) - {filepath.name for filepath, *_ in stats}:
+            del self._settling[name]
+        return ready
+
+    def scan(self) -> list[Path]:
+        """
+        Scan the directory once. Returns the files that are new or changed and did
+        not change for settle seconds, other new or changed files are settling.
+        """
+        return self._select(self._stat())
+
+    def _mark_uncompensated(self, well: str, index: pd.DatetimeIndex):
+        if len(index) == 0:
+            return
+        start, end = index.min(), index.max()
+        if well in self.uncompensated:
+            previous_start, previous_end = self.uncompensated[well]
+            start, end = min(start, previous_start), max(end, previous_end)
+        self.uncompensated[well] = (start, end)
+
+    def _compensate(self, well: str) -> int:
+        """Compensate the uncompensated period of a well, see DiverStore.compensate."""
+        start, end = self.uncompensated[well]
+        handreading = self.handreadings.get(well)
+        water_level = self.store.compensate(
+            well,
+            self.baro,
+            handreading,
+            self.observation_wells[well],
+            "cable" if handreading is None else "handreading",
+            start,
+            end,
+            **self.kwargs,
+        )
+        missing = water_level.data["water_level (m datum)"].isna()
+        del self.uncompensated[well]
+        self._mark_uncompensated(well, water_level.data.index[missing])
+        return int((~missing).sum())
+
+    def _update_store(self, well: str, diver: Timeseries) -> dict:
+        observation_well = self.observation_wells.get(well)
+        if observation_well is None:
+            appended, conflicts = self.store.append(well, diver)
+            return {"appended": len(appended.data), "conflicts": len(conflicts)}
+
+        baro = self.baro
+        if baro is None:
+            appended, conflicts = self.store.append(well, diver)
+            self._mark_uncompensated(well, appended.data.index)
+            result = {"appended": len(appended.data), "conflicts": len(conflicts)}
+        else:
+            handreading = self.handreadings.get(well)
+            water_level, conflicts = self.store.update(
+                well,
+                diver,
+                baro,
+                handreading,
+                observation_well,
+                "cable" if handreading is None else "handreading",
+                **self.kwargs,
+            )
+            missing = water_level.data["water_level (m datum)"].isna()
+            self._mark_uncompensated(well, water_level.data.index[missing])
+            result = {
+                "appended": len(water_level.data),
+                "conflicts": len(conflicts),
+                "water_level_end": _timestamp(
+                    water_level.data.index[~missing].max() if (~missing).any() else None
+                ),
+            }
+
+        # a baro received meanwhile did not see the samples of this export
+        if self.baro is not baro and well in self.uncompensated:
+            result["compensated_later"] = self._compensate(well)
+        return result
+
+    def _update_baro(self, baro: Timeseries) -> int:
+        appended = self.store.append_baro(baro)
+        if self.baro is not None:
+            baro = Timeseries(appended.data.combine_first(self.baro.data))
+        else:
+            baro = appended
+        self.baro = baro
+        return len(appended.data)
+
+    async def ingest(self, filepath: Path, executor: Executor = None, kind=None):
+        """Read a single export and add it to the baro or to the store."""
+        record = self.files.setdefault(filepath.name, {"size": 0, "mtime_ns": 0})
+        record.update(state="processing")
+        loop = asyncio.get_running_loop()
+        try:
+            kind, timeseries = await loop.run_in_executor(
+                executor, _read, filepath, kind or self.kind, self.dtype
+            )
+            record["kind"] = kind
+            if kind == "baro":
+                record["well"] = "baro"
+                record["appended"] = await asyncio.to_thread(
+                    self._update_baro, timeseries
+                )
+                # the wells are read after the baro is replaced, see _update_store
+                compensated, errors = {}, {}
+                for well in list(self.uncompensated):
+                    if well not in self.observation_wells:
+                        continue
+                    async with self._locks[well]:
+                        if well not in self.uncompensated:
+                            continue
+                        try:
+                            compensated[well] = await asyncio.to_thread(
+                                self._compensate, well
+                            )
+                        except Exception as e:
+                            errors[well] = repr(e)
+                record["compensated"] = compensated
+                if errors:
+                    record["compensate_errors"] = errors
+            else:
+                well = record["well"] = str(self.well_from(filepath))
+                async with self._locks[well]:
+                    record.update(
+                        await asyncio.to_thread(self._update_store, well, timeseries)
+                    )
+        except Exception as e:
+            record.update(state="failed", error=repr(e))
+        else:
+            record.pop("error", None)
+            record.update(
+                state="ingested",
+                latency=round(time.time() - record["mtime_ns"] / 1e9, 3),
+            )
+        self._write_status()
+
+    async def _work(self, executor: Executor):
+        while True:
+            filepath, kind = await self._queue.get()
+            try:
+                await self.ingest(filepath, executor, kind)
+            finally:
+                self._queue.task_done()
+
+    async def run(self, stop: asyncio.Event = None):
+        """
+        Watch the directory until stop is set or the task is cancelled. Files that
+        are queued when stop is set are still ingested.
+        """
+        stop = stop or asyncio.Event()
+        self._queue = asyncio.Queue(self.max_pending)
+        executor = self.executor or ThreadPoolExecutor(self.workers)
+        tasks = [asyncio.create_task(self._work(executor)) for _ in range(self.workers)]
+        self.running = True
+        self._write_status()
+        try:
+            while not stop.is_set():
+                stats = await asyncio.to_thread(self._stat)
+                ready = self._select(stats)
+                kinds = await asyncio.to_thread(_detect_kinds, ready, self.kind)
+                # the baro is extended before the divers of the same scan
+                for filepath, kind in zip(ready, kinds):
+                    if kind == "baro":
+                        await self.ingest(filepath, executor, kind)
+                for filepath, kind in zip(ready, kinds):
+                    if kind != "baro":
+                        # waits while the queue is full
+                        await self._queue.put((filepath, kind))
+                try:
+                    await asyncio.wait_for(stop.wait(), self.poll_interval)
+                except TimeoutError:
+                    pass
+            await self._queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.executor is None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            self.running = False
+            self._settling.clear()
+            self._write_status()
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="ddp-ingest", description="Ingest new diver exports of a watch folder."
+    )
+    parser.add_argument("directory", type=Path, help="The watched directory.")
+    parser.add_argument("store", type=Path, help="The root of the DiverStore.")
+    parser.add_argument(
+        "--baro", type=Path, help="A barometric export to add to the stored baro."
+    )
+    parser.add_argument("--metadata", type=Path, help="The metadata workbook.")
+    parser.add_argument("--settle", type=float, default=SETTLE, help="Seconds.")
+    parser.add_argument("--poll", type=float, default=POLL_INTERVAL, help="Seconds.")
+    parser.add_argument("--workers", type=int, default=2, help="Parallel files.")
+    args = parser.parse_args(argv)
+
+    observation_wells = {}
+    if args.metadata is not None:
+        metadata, _ = runner.read_metadata(args.metadata)
+        observation_wells = {
+            str(well_id): runner.observation_well_from(metadata_well)
+            for well_id, metadata_well in metadata.iterrows()
+        }
+    service = IngestService(
+        args.directory,
+        DiverStore(args.store),
+        baro=None if args.baro is None else readers.read_baro_diver(args.baro),
+        observation_wells=observation_wells,
+        settle=args.settle,
+        poll_interval=args.poll,
+        workers=args.workers,
+    )
+    print(f"watching {args.directory}, status in {service.status_path}")
+    try:
+        asyncio.run(service.run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+
+import pandas as pd
+
+_current_well = contextvars.ContextVar("well", default=None)
+
+
+@dataclass
+class StageMetrics:
+    """
+    Metrics of a single call of an instrumented stage.
+
+    Attributes:
+    -----------
+    stage : str
+        Name of the stage, e.g. "readers.read_td_diver".
+    well : str
+        The well the stage was run for, None if unknown.
+    start : float
+        Start time (seconds since the epoch).
+    wall_time : float
+        Duration (s).
+    rows : int
+        Number of rows returned (or plotted), None if not applicable.
+    peak_memory : int
+        Peak memory allocated during the stage (bytes), None if memory is not traced.
+    depth : int
+        Nesting depth, 0 for stages that are not called by another stage.
+    """
+
+    stage: str
+    well: str | None
+    start: float
+    wall_time: float
+    rows: int | None
+    peak_memory: int | None
+    depth: int
+
+
+class Instrumentation:
+    """
+    Recorder of the metrics of the instrumented stages (readers, Timeseries methods,
+    compensation and figures).
+
+    Only stages in the current process are recorded, e.g. not the readers running in
+    the worker processes of readers.read_diver_directory.
+
+    Attributes:
+    -----------
+    records : list[StageMetrics]
+        The metrics of all recorded stage calls.
+    callbacks : list[Callable[[StageMetrics], None]]
+        Functions called with the metrics of each stage call as soon as it finishes.
+    trace_memory : bool
+        Whether the peak memory is traced (with tracemalloc, which slows down Python
+        code considerably).
+    """
+
+    def __init__(self, callbacks: list[Callable] = None, trace_memory: bool = False):
+        self.records = []
+        self.callbacks = list(callbacks or [])
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _enter(self) -> int:
+        # each frame holds the traced memory at the start and the peak of nested
+        # stages, as nested stages reset the peak of tracemalloc
+        stack = self._stack()
+        frame = [0, 0]
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            frame[0] = current
+        stack.append(frame)
+        return len(stack) - 1
+
+    def _exit(self) -> int | None:
+        stack = self._stack()
+        start_memory, nested_peak = stack.pop()
+        if not self.trace_memory:
+            return None
+        peak = max(tracemalloc.get_traced_memory()[1], nested_peak)
+        if stack:
+            stack[-1][1] = max(stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        return peak - start_memory
+
+    def record(self, metrics: StageMetrics):
+        """Store the metrics of a stage call and pass them to the callbacks."""
+        with self._lock:
+            self.records.append(metrics)
+        for callback in self.callbacks:
+            callback(metrics)
+
+    def report(self) -> pd.DataFrame:
+        """All recorded stage calls as a table."""
+        columns = list(StageMetrics.__dataclass_fields__)
+        return pd.DataFrame([asdict(r) for r in self.records], columns=columns)
+
+    def summary(self) -> pd.DataFrame:
+        """Calls, total wall time, rows and maximum peak memory per stage and well."""
+        return (
+            self.report()
+            .groupby(["stage", "well"], dropna=False)
+            .agg(
+                calls=("wall_time", "size"),
+                wall_time=("wall_time", "sum"),
+                rows=("rows", "sum"),
+                peak_memory=("peak_memory", "max"),
+            )
+            .sort_values("wall_time", ascending=False)
+        )
+
+    def to_json(self, path):
+        """Write all recorded stage calls to a JSON file."""
+        with open(path, "w") as f:
+            json.dump([asdict(r) for r in self.records], f, indent=2)
+
+    def to_csv(self, path):
+        """Write all recorded stage calls to a CSV file."""
+        self.report().to_csv(path, index=False)
+
+    def clear(self):
+        """Remove all recorded stage calls."""
+        with self._lock:
+            self.records.clear()
+
+
+_instrumentation: Instrumentation | None = None
+
+
+def enable_instrumentation(
+    callback: Callable = None, trace_memory: bool = False
+) -> Instrumentation:
+    """
+    Start recording the metrics of the instrumented stages.
+
+    Parameters
+    ----------
+    callback : Callable[[StageMetrics], None], optional
+        Function called with the metrics of each stage call, e.g. to forward them
+        to a monitoring system.
+    trace_memory : bool, optional
+        Trace the peak memory of each stage with tracemalloc. Default is False.
+
+    Returns
+    -------
+    Instrumentation
+        The active recorder.
+
+    """
+    global _instrumentation
+    _instrumentation = Instrumentation(
+        [callback] if callback is not None else None, trace_memory
+    )
+    return _instrumentation
+
+
+def disable_instrumentation() -> Instrumentation | None:
+    """Stop recording and return the recorder that was active, if any."""
+    global _instrumentation
+    instrumentation, _instrumentation = _instrumentation, None
+    if instrumentation is not None and instrumentation._started_tracing:
+        tracemalloc.stop()
+    return instrumentation
+
+
+@contextlib.contextmanager
+def well(name: str):
+    """Attribute the stages run within the context to a well."""
+    token = _current_well.set(name)
+    try:
+        yield
+    finally:
+        _current_well.reset(token)
+
+
+def _rows(result, args) -> int | None:
+    # rows returned, or the rows passed to a method returning nothing (plots)
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    for value in (result, *args[1:2]):
+        value = getattr(value, "data", value)
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return len(value)
+        if isinstance(value, dict):
+            return sum(len(getattr(v, "data", v)) for v in value.values())
+    return None
+
+
+def instrumented(func: Callable = None, *, well_from: Callable = None):
+    """
+    Decorate a stage to record its metrics while instrumentation is enabled.
+
+    Parameters
+    ----------
+    func : Callable
+        The stage.
+    well_from : Callable, optional
+        Function of the call arguments, passed by parameter name, returning the
+        name of the well. The well of the enclosing `well` context takes
+        precedence.
+
+    """
+    if func is None:
+        return functools.partial(instrumented, well_from=well_from)
+
+    module = func.__module__.rsplit(".", 1)[-1]
+    stage = (
+        func.__qualname__ if "." in func.__qualname__ else f"{module}.{func.__name__}"
+    )
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        instrumentation = _instrumentation
+        if instrumentation is None:
+            return func(*args, **kwargs)
+
+        depth = instrumentation._enter()
+        start = time.time()
+        t0 = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            wall_time = time.perf_counter() - t0
+            peak_memory = instrumentation._exit()
+
+        name = _current_well.get()
+        if name is None and well_from is not None:
+            name = well_from(**signature.bind(*args, **kwargs).arguments)
+        instrumentation.record(
+            StageMetrics(
+                stage, name, start, wall_time, _rows(result, args), peak_memory, depth
+            )
+        )
+        return result
+
+    return wrapper
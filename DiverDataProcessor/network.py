@@ -0,0 +1,402 @@
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import dask.array as da
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from DiverDataProcessor import processing, readers, shared
+from DiverDataProcessor.base import HandReading, ObservationWell, Timeseries
+
+# network variables and the Timeseries columns they are taken from
+VARIABLES = {
+    "water_level": "water_level (m datum)",
+    "temperature": "temperature (degC)",
+    "electrical_conductivity": "electrical_conductivity (mS/cm)",
+}
+UNITS = {
+    "water_level": "m datum",
+    "temperature": "degC",
+    "electrical_conductivity": "mS/cm",
+}
+TIME_CHUNK = 2**16  # samples per chunk, about 45 days of 1-minute data
+STATISTICS = ("count", "min", "max", "mean", "std")
+
+
+def _time_grid(start_date, end_date, freq: str) -> pd.DatetimeIndex:
+    # the same timestamps as Timeseries.reindex_time
+    return pd.date_range(
+        start=pd.to_datetime(start_date, format="%Y-%m-%d"),
+        end=pd.to_datetime(end_date, format="%Y-%m-%d"),
+        freq=freq,
+    )
+
+
+def _open(path: Path) -> xr.Dataset:
+    if path.suffix == ".nc":
+        return xr.open_dataset(path, chunks={})
+    return xr.open_zarr(path, zarr_format=2)
+
+
+class WellNetwork:
+    """
+    Water level, temperature and electrical conductivity of all wells of a region
+    on one time grid, as a (well, time) dataset stored in chunks of a single well
+    and TIME_CHUNK samples in a Zarr store.
+
+    The dataset is opened lazily (dask): selections, resampling and statistics are
+    computed chunk by chunk, so the network does not have to fit in memory. Each
+    well is written to its own chunks, so wells can be written in parallel.
+
+    Attributes:
+    -----------
+    path : Path
+        The Zarr store, or a NetCDF file written by to_netcdf (read only).
+    dataset : xr.Dataset
+        The lazily loaded (well, time) dataset.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.dataset = _open(self.path)
+
+    @classmethod
+    def create(
+        cls,
+        path,
+        wells: Iterable[str],
+        start_date: str,
+        end_date: str,
+        freq: str = "min",
+        variables: Iterable[str] = tuple(VARIABLES),
+        dtype="float32",
+        time_chunk: int = TIME_CHUNK,
+    ) -> "WellNetwork":
+        """
+        Create an empty (all NaN) network. Only the metadata and coordinates are
+        written, the chunks are written by write.
+
+        Parameters
+        ----------
+        path : str or Path
+            The Zarr store, overwritten if it exists.
+        wells : Iterable[str]
+            The wells (or diver codes).
+        start_date, end_date : str
+            The period of the time grid (Y-m-d), as in Timeseries.reindex_time.
+        freq : str, optional
+            The interval of the time grid. Default is "min".
+        variables : Iterable[str], optional
+            The variables, see VARIABLES. Default is all variables.
+        dtype : str or np.dtype, optional
+            The dtype of the values. Default is "float32".
+        time_chunk : int, optional
+            The number of samples per chunk. Default is TIME_CHUNK.
+
+        Raises
+        ------
+        ValueError
+            If a variable is not valid or the wells are not unique.
+
+        """
+        wells = [str(well) for well in wells]
+        if len(set(wells)) != len(wells):
+            raise ValueError("Wells are not unique.")
+        invalid = set(variables) - set(VARIABLES)
+        if invalid:
+            raise ValueError(
+                f"Variables {sorted(invalid)} not valid, use: {VARIABLES}."
+            )
+
+        time = _time_grid(start_date, end_date, freq)
+        shape = (len(wells), len(time))
+        chunks = (1, min(time_chunk, len(time)))
+        dataset = xr.Dataset(
+            {
+                variable: xr.Variable(
+                    ("well", "time"),
+                    da.full(shape, np.nan, dtype=dtype, chunks=chunks),
+                    attrs={"units": UNITS[variable]},
+                )
+                for variable in variables
+            },
+            coords={"well": wells, "time": time},
+            attrs={"freq": freq},
+        )
+        dataset.to_zarr(path, mode="w", compute=False, zarr_format=2)
+        return cls(path)
+
+    @classmethod
+    def build(
+        cls,
+        path,
+        files: dict[str, str | Path],
+        start_date: str,
+        end_date: str,
+        freq: str = "min",
+        baro: Timeseries = None,
+        observation_wells: dict[str, ObservationWell] = None,
+        handreadings: dict[str, HandReading | Iterable[HandReading]] = None,
+        kind: str = "auto",
+        dtype="float32",
+        workers: int = None,
+        time_chunk: int = TIME_CHUNK,
+        **kwargs,
+    ) -> tuple["WellNetwork", dict[str, Exception]]:
+        """
+        Create a network and fill it from diver files, one process per well. Each
+        worker reads its file, aligns it to the time grid, compensates it and writes
+        its own chunks, so only the data of a single well is held in memory.
+
+        Parameters
+        ----------
+        path : str or Path
+            The Zarr store, overwritten if it exists.
+        files : dict[str, str or Path]
+            The diver file per well.
+        start_date, end_date, freq, dtype, time_chunk
+            The time grid and storage, see create.
+        baro : Timeseries, optional
+            Barometric pressure. Without baro, no water levels are computed. With
+            the default "exact" alignment the baro is put on the time grid like
+            the divers. With an as-of alignment, e.g. for a baro sampled less often
+            than the grid, its samples are matched to the grid timestamps.
+        observation_wells : dict[str, ObservationWell], optional
+            The observation well per well. Wells without are not compensated.
+        handreadings : dict[str, HandReading or Iterable[HandReading]], optional
+            Hand reading(s) per well, compensated with the "handreading" method.
+            Other wells are compensated with the "cable" method.
+        kind : str, optional
+            The type of the diver files, see readers.read_diver_directory.
+            Default is "auto".
+        workers : int, optional
+            Number of worker processes. Default is the number of CPUs, 1 builds the
+            network in this process.
+        **kwargs
+            Passed to processing.baro_compensate, e.g. alignment and tolerance.
+
+        Returns
+        -------
+        tuple[WellNetwork, dict[str, Exception]]
+            The network and the errors of wells that could not be written (these
+            wells remain NaN).
+
+        """
+        network = cls.create(
+            path,
+            files,
+            start_date,
+            end_date,
+            freq,
+            dtype=dtype,
+            time_chunk=time_chunk,
+        )
+        if baro is not None:
+            alignment = kwargs.get("alignment", "exact")
+            if alignment == "exact":
+                baro = baro.reindex_time(start_date, end_date, freq)
+            else:
+                time = _time_grid(start_date, end_date, freq)
+                baro = processing.select_baro(baro, time[0], time[-1], alignment)
+        context = {
+            "path": network.path,
+            "grid": (start_date, end_date, freq),
+            "kind": kind,
+            "dtype": dtype,
+            "baro": baro,
+            "kwargs": kwargs,
+        }
+        observation_wells = observation_wells or {}
+        handreadings = handreadings or {}
+        tasks = {
+            str(well): (
+                position,
+                filepath,
+                observation_wells.get(well),
+                handreadings.get(well),
+            )
+            for position, (well, filepath) in enumerate(files.items())
+        }
+
+        errors = {}
+        workers = workers or os.cpu_count()
+        if workers == 1:
+            _init_worker(context)
+            try:
+                for well, task in tasks.items():
+                    try:
+                        _build_well(*task)
+                    except Exception as e:
+                        errors[well] = e
+            finally:
+                _init_worker(None)
+        else:
+            baro = context["baro"]
+            shared_baro = (
+                None if baro is None else shared.SharedTimeseries.publish(baro)
+            )
+            # the workers map the baro instead of unpickling a copy each
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=min(workers, max(len(tasks), 1)),
+                    initializer=_init_worker,
+                    initargs=({**context, "baro": shared_baro},),
+                ) as executor:
+                    futures = {
+                        executor.submit(_build_well, *task): well
+                        for well, task in tasks.items()
+                    }
+                    for future in as_completed(futures):
+                        try:
+                            future.result()
+                        except Exception as e:
+                            errors[futures[future]] = e
+            finally:
+                if shared_baro is not None:
+                    shared_baro.unlink()
+
+        return cls(network.path), dict(sorted(errors.items()))
+
+    @property
+    def wells(self) -> list[str]:
+        return self.dataset["well"].values.tolist()
+
+    def write(self, well: str, timeseries: Timeseries):
+        """
+        Write the data of a well, aligned to the time grid with
+        Timeseries.reindex_time (nearest sample). Only the chunks of the well are
+        written. Columns of variables that are not in the network are ignored.
+        """
+        grid = self.dataset.indexes["time"]
+        data = timeseries.data
+        if not data.index.equals(grid):
+            start, end = grid[[0, -1]].strftime("%Y-%m-%d")
+            data = timeseries.reindex_time(start, end, self.dataset.attrs["freq"]).data
+        _write_region(self.path, self.wells.index(str(well)), data, self.dataset)
+
+    def sel(
+        self, wells: str | Iterable[str] = None, start=None, end=None, variables=None
+    ) -> xr.Dataset:
+        """A lazy selection of wells, dates (inclusive) and variables."""
+        dataset = self.dataset if variables is None else self.dataset[list(variables)]
+        if wells is not None:
+            dataset = dataset.sel(well=[wells] if isinstance(wells, str) else wells)
+        return dataset.sel(time=slice(start, end))
+
+    def timeseries(self, well: str, start=None, end=None) -> Timeseries:
+        """Load the variables of a single well as a Timeseries."""
+        data = self.sel(str(well), start, end).isel(well=0).drop_vars("well")
+        frame = data.to_dataframe().rename(columns=VARIABLES)
+        return Timeseries(frame.rename_axis("date"))
+
+    def resample(self, freq: str = "D", how: str = "mean", **selection) -> xr.Dataset:
+        """
+        Resample all wells at once, lazily.
+
+        Parameters
+        ----------
+        freq : str, optional
+            The new interval. Default is "D".
+        how : str, optional
+            The aggregation, e.g. "mean", "min", "max" or "count". Default is
+            "mean".
+        **selection
+            wells, start, end and variables, see sel.
+
+        Returns
+        -------
+        xr.Dataset
+            The lazy (well, time) dataset, use .compute() to load it.
+
+        """
+        return getattr(self.sel(**selection).resample(time=freq), how)()
+
+    def statistics(
+        self, stats: Iterable[str] = STATISTICS, dim: str = "time", **selection
+    ) -> xr.Dataset:
+        """
+        Statistics of all wells at once, lazily.
+
+        Parameters
+        ----------
+        stats : Iterable[str], optional
+            The statistics. Default is STATISTICS.
+        dim : str, optional
+            "time" for statistics per well, "well" for statistics of the network
+            per timestamp. Default is "time".
+        **selection
+            wells, start, end and variables, see sel.
+
+        Returns
+        -------
+        xr.Dataset
+            The lazy statistics along a new "stat" dimension.
+
+        """
+        dataset = self.sel(**selection)
+        stats = list(stats)
+        return xr.concat(
+            [getattr(dataset, stat)(dim=dim) for stat in stats],
+            dim=pd.Index(stats, name="stat"),
+        )
+
+    def to_netcdf(self, path) -> Path:
+        """Write the network to a NetCDF file, chunk by chunk."""
+        encoding = {
+            variable: {"zlib": True, "complevel": 4} for variable in self.dataset
+        }
+        self.dataset.to_netcdf(path, encoding=encoding)
+        return Path(path)
+
+
+def _write_region(path: Path, position: int, data: pd.DataFrame, dataset: xr.Dataset):
+    region = xr.Dataset(
+        {
+            variable: (
+                ("well", "time"),
+                data[column].to_numpy(dtype=dataset[variable].dtype)[None],
+            )
+            for variable, column in VARIABLES.items()
+            if variable in dataset and column in data
+        }
+    )
+    region.to_zarr(
+        path,
+        region={"well": slice(position, position + 1), "time": slice(None)},
+        zarr_format=2,
+    )
+
+
+_context = None
+
+
+def _init_worker(context):
+    global _context
+    _context = context
+
+
+def _build_well(
+    position: int,
+    filepath,
+    observation_well: ObservationWell | None,
+    handreading: HandReading | Iterable[HandReading] | None,
+):
+    diver = readers._read_diver_file(filepath, _context["kind"], _context["dtype"])
+    diver = diver.reindex_time(*_context["grid"])
+    data = diver.data
+    baro = shared.attach(_context["baro"])
+    if baro is not None and observation_well is not None:
+        water_level = processing.baro_compensate(
+            baro,
+            diver,
+            handreading,
+            observation_well,
+            "cable" if handreading is None else "handreading",
+            **_context["kwargs"],
+        )
+        data = data.join(water_level.data)
+    network = xr.open_zarr(_context["path"], zarr_format=2)
+    _write_region(_context["path"], position, data, network)
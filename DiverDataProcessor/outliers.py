@@ -0,0 +1,289 @@
+from collections.abc import Iterable, Iterator, Mapping
+
+import numpy as np
+import pandas as pd
+
+try:
+    import bottleneck as bn
+except ImportError:  # pragma: no cover
+    bn = None
+
+MAD_TO_STD = 1.4826
+
+
+def _rolling_median(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Centered rolling median along the first axis of a 2-D array, using partial
+    windows at the edges. Uses bottleneck when installed.
+    """
+    half = window // 2
+    n = len(values)
+    if bn is not None and n >= window:
+        # the trailing median at row i + half is the centered median at row i, only
+        # the last half rows need the partial windows of a NaN padded tail
+        median = np.empty(values.shape)
+        median[: n - half] = bn.move_median(values, window, min_count=1, axis=0)[half:]
+        if half:
+            padded = np.concatenate(
+                [values[n - window + 1 :], np.full((half, values.shape[1]), np.nan)]
+            )
+            median[n - half :] = bn.move_median(padded, window, min_count=1, axis=0)[
+                -half:
+            ]
+        return median
+    return (
+        pd.DataFrame(values)
+        .rolling(window, center=True, min_periods=1)
+        .median()
+        .to_numpy()
+    )
+
+
+def hampel(
+    values: np.ndarray,
+    window: int = 11,
+    threshold: float = 3.0,
+    min_deviation=0.0,
+) -> np.ndarray:
+    """
+    Flag values that deviate more than threshold times the rolling MAD (scaled to a
+    standard deviation) from the rolling median. The MAD is estimated as the rolling
+    median of the absolute deviations from the rolling median.
+
+    The MAD is zero where most of a window is identical, so any deviation there is
+    flagged, e.g. a single spike on flat data. On quantized data that steps by the
+    sensor resolution this also flags single steps; a value is only flagged if it
+    deviates more than min_deviation, so set it a little above the resolution.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2-D array of samples (rows) and columns.
+    window : int, optional
+        Odd number of samples of the centered window. Default is 11.
+    threshold : float, optional
+        Number of (robust) standard deviations. Default is 3.0.
+    min_deviation : float or np.ndarray, optional
+        Minimum absolute deviation from the rolling median of an outlier, a single
+        value or one per column, e.g. 1.5 times the sensor resolution.
+        Default is 0.0.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array, True for outliers.
+
+    Raises
+    ------
+    ValueError
+        If window is not odd.
+
+    """
+    if window % 2 == 0:
+        raise ValueError("Window of the Hampel filter must be odd.")
+    deviation = _rolling_median(values, window)
+    np.subtract(values, deviation, out=deviation)
+    np.abs(deviation, out=deviation)
+    limit = _rolling_median(deviation, window)
+    limit *= threshold * MAD_TO_STD
+    np.maximum(limit, min_deviation, out=limit)
+    return deviation > limit
+
+
+def rate_of_change(
+    values: np.ndarray, index: pd.DatetimeIndex, max_rate, per: str = "1h"
+) -> np.ndarray:
+    """
+    Flag samples that changed faster than max_rate with respect to the previous
+    sample.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2-D array of samples (rows) and columns.
+    index : pd.DatetimeIndex
+        The timestamps of the samples.
+    max_rate : float or np.ndarray
+        Maximum absolute change per time unit, a single value or one per column.
+    per : str, optional
+        The time unit of max_rate. Default is "1h".
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array, True for outliers.
+
+    """
+    flags = np.zeros(values.shape, dtype=bool)
+    if len(values) < 2:
+        return flags
+    elapsed = np.diff(index.as_unit("ns").asi8) / pd.Timedelta(per).value
+    rate = np.subtract(values[1:], values[:-1])
+    np.abs(rate, out=rate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate /= elapsed[:, np.newaxis]
+    np.greater(rate, max_rate, out=flags[1:])
+    return flags
+
+
+def flatline(values: np.ndarray, min_length: int, tolerance: float = 0.0) -> np.ndarray:
+    """
+    Flag runs of at least min_length consecutive samples that do not change by more
+    than tolerance, e.g. a stuck sensor or a logger running out of battery.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2-D array of samples (rows) and columns.
+    min_length : int
+        Minimum number of samples in a run.
+    tolerance : float, optional
+        Maximum absolute change between consecutive samples in a run. Default is 0.0.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array, True for samples in a flat run.
+
+    """
+    n, ncols = values.shape
+    steps = min_length - 1
+    if n < min_length or steps < 1:
+        return np.zeros(values.shape, dtype=bool)
+
+    # number of unchanged steps up to each row
+    unchanged = np.zeros((n, ncols), dtype=np.int32)
+    np.less_equal(np.abs(values[1:] - values[:-1]), tolerance, out=unchanged[1:])
+    np.cumsum(unchanged, axis=0, out=unchanged)
+    # a run of min_length samples ends at each row marked here
+    run_end = np.zeros((n, ncols), dtype=np.int32)
+    np.equal(unchanged[steps:] - unchanged[:-steps], steps, out=run_end[steps:])
+    # flag all samples covered by a run ending within the next `steps` rows
+    covered = np.cumsum(run_end, axis=0, out=run_end)
+    upto = n - steps
+    flags = np.empty((n, ncols), dtype=bool)
+    flags[0] = covered[steps] > 0
+    flags[1:upto] = (covered[steps + 1 :] - covered[: upto - 1]) > 0
+    flags[upto:] = (covered[-1] - covered[upto - 1 : n - 1]) > 0
+    return flags
+
+
+def _per_column(value, columns: pd.Index, default: float) -> np.ndarray:
+    if isinstance(value, Mapping):
+        return np.array([value.get(column, default) for column in columns])
+    return np.full(len(columns), value, dtype=float)
+
+
+def context_length(window: int = None, max_rate=None, min_flat: int = None) -> int:
+    """The number of neighbouring samples on each side a flag depends on."""
+    context = 0
+    if window is not None:
+        context = max(context, window // 2 * 2)
+    if max_rate is not None:
+        context = max(context, 1)
+    if min_flat is not None:
+        context = max(context, min_flat - 1)
+    return context
+
+
+def outlier_mask(
+    data: pd.DataFrame,
+    window: int = None,
+    threshold: float = 3.0,
+    min_deviation=0.0,
+    max_rate=None,
+    per: str = "1h",
+    min_flat: int = None,
+    flat_tolerance: float = 0.0,
+) -> pd.DataFrame:
+    """
+    Flag outliers in all columns at once. Detectors are enabled by their parameter.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Timeseries data with a sorted DatetimeIndex.
+    window : int, optional
+        Window (samples) of the Hampel filter, see hampel.
+    threshold : float, optional
+        Threshold of the Hampel filter. Default is 3.0.
+    min_deviation : float or Mapping[str, float], optional
+        Minimum deviation of an outlier of the Hampel filter, see hampel. A
+        mapping sets the deviation per column, other columns use 0.0.
+        Default is 0.0.
+    max_rate : float or Mapping[str, float], optional
+        Maximum absolute change per time unit, see rate_of_change. A mapping sets
+        the rate per column, other columns are not checked.
+    per : str, optional
+        The time unit of max_rate. Default is "1h".
+    min_flat : int, optional
+        Minimum length (samples) of flat runs, see flatline.
+    flat_tolerance : float, optional
+        Tolerance of flat runs. Default is 0.0.
+
+    Returns
+    -------
+    pd.DataFrame
+        Boolean mask with the same index and columns as data, True for outliers.
+
+    """
+    values = data.to_numpy(dtype=float)
+    flags = np.zeros(values.shape, dtype=bool)
+    if window is not None:
+        flags |= hampel(
+            values, window, threshold, _per_column(min_deviation, data.columns, 0.0)
+        )
+    if max_rate is not None:
+        flags |= rate_of_change(
+            values, data.index, _per_column(max_rate, data.columns, np.inf), per
+        )
+    if min_flat is not None:
+        flags |= flatline(values, min_flat, flat_tolerance)
+    return pd.DataFrame(flags, index=data.index, columns=data.columns)
+
+
+def iter_outlier_masks(chunks: Iterable, **detectors) -> Iterator[pd.DataFrame]:
+    """
+    Flag outliers in a stream of consecutive Timeseries chunks (e.g. from
+    readers.iter_diver_chunks). Each chunk is evaluated together with the
+    neighbouring samples of the previous and next chunk, so that the concatenated
+    masks equal outlier_mask on the complete series.
+
+    Parameters
+    ----------
+    chunks : Iterable[Timeseries]
+        Sorted, consecutive chunks.
+    **detectors
+        Detector parameters, see outlier_mask.
+
+    Yields
+    ------
+    pd.DataFrame
+        Boolean masks, True for outliers. A mask is emitted once the samples after
+        it are known, so masks do not coincide with the input chunks.
+
+    """
+    context = context_length(
+        detectors.get("window"), detectors.get("max_rate"), detectors.get("min_flat")
+    )
+    previous = None  # already flagged samples, kept as left context
+    pending = None  # samples waiting for their right context
+
+    for chunk in chunks:
+        pending = chunk.data if pending is None else pd.concat([pending, chunk.data])
+        ready = len(pending) - context
+        if ready <= 0:
+            continue
+
+        buffer = pending if previous is None else pd.concat([previous, pending])
+        start = len(buffer) - len(pending)
+        mask = outlier_mask(buffer, **detectors)
+        yield mask.iloc[start : start + ready]
+
+        previous = buffer.iloc[max(start + ready - context, 0) : start + ready]
+        pending = pending.iloc[ready:]
+
+    if pending is not None and len(pending):
+        buffer = pending if previous is None else pd.concat([previous, pending])
+        mask = outlier_mask(buffer, **detectors)
+        yield mask.iloc[len(buffer) - len(pending) :]
@@ -3,4 +3,13 @@ from .compensation import (
     _water_column_at_datetime,
     _water_column_from,
     baro_compensate,
+    baro_compensate_batch,
+    baro_compensate_chunks,
+    select_baro,
+)
+from .memo import (
+    WaterColumnMemo,
+    disable_water_column_memo,
+    enable_water_column_memo,
+    water_column_memo,
 )
@@ -1,10 +1,23 @@
+from collections.abc import Iterable, Iterator, Mapping
+
+import numpy as np
 import pandas as pd
 
 from DiverDataProcessor.base import HandReading, ObservationWell, Timeseries
+from DiverDataProcessor.instrumentation import instrumented
+from DiverDataProcessor.processing import memo
+
+ALIGNMENTS = ("exact", "nearest", "backward", "linear")
+DRIFT_CORRECTIONS = ("linear", "step", "constant")
+_BATCH_BLOCK_BYTES = 2**20  # about the size of a per-core L2 cache
 
 
 def _water_column_from(
-    baro: pd.Series, diver: pd.Series, water_density: float = 1000.0
+    baro: pd.Series,
+    diver: pd.Series,
+    water_density: float = 1000.0,
+    alignment: str = "exact",
+    tolerance=None,
 ) -> Timeseries:
     """
     Calculate the height of the water column above the diver by subtracting air pressure
@@ -18,17 +31,44 @@ def _water_column_from(
         The pressure recorded by the diver (mH2O).
     water_density : float, optional
         The density of water in kg/m3. Default is 1000.0 kg/m3.
+    alignment : str, optional
+        How air pressure is matched to the diver timestamps. Options are:
+        - "exact": align on identical timestamps, the result holds the union of
+          both indexes.
+        - "nearest": the closest baro sample.
+        - "backward": the last baro sample at or before the diver timestamp.
+        - "linear": linear interpolation between the surrounding baro samples.
+        Except for "exact", the result holds the diver timestamps. Default is "exact".
+    tolerance : str or pd.Timedelta, optional
+        Maximum distance between a diver timestamp and the baro samples used for it,
+        further away the water column is NaN. Default is no limit.
 
     Returns
     -------
     Timeseries
         The height of the water column above the diver in meters (m), as a Timeseries.
 
+    Raises
+    ------
+    ValueError
+        If the specified alignment is not valid.
+
     """
 
     gravitational_acceleration = 9.80665  # m/s2
 
-    water_pressure = diver["diver_pressure (mH2O)"] - baro["air_pressure (mH2O)"]
+    if alignment == "exact":
+        air_pressure = baro["air_pressure (mH2O)"]
+    elif alignment in ALIGNMENTS:
+        diver_index = diver["diver_pressure (mH2O)"].index
+        air_pressure = pd.Series(
+            _align_asof(baro["air_pressure (mH2O)"], diver_index, alignment, tolerance),
+            index=diver_index,
+        )
+    else:
+        raise ValueError(f"Alignment not valid, use: {ALIGNMENTS}.")
+
+    water_pressure = diver["diver_pressure (mH2O)"] - air_pressure
     water_column = (9806.65 * water_pressure) / (
         water_density * gravitational_acceleration
     )
@@ -36,6 +76,34 @@ def _water_column_from(
     return Timeseries(water_column.to_frame("water_column (m)"))
 
 
+def _memoized_water_column(
+    baro: Timeseries,
+    diver: Timeseries,
+    water_density: float = 1000.0,
+    alignment: str = "exact",
+    tolerance=None,
+) -> Timeseries:
+    """
+    _water_column_from, looked up in the water column memo (see memo.WaterColumnMemo)
+    by the fingerprints of the air and diver pressure.
+    """
+    active_memo = memo._memo
+    if active_memo is None:
+        return _water_column_from(baro, diver, water_density, alignment, tolerance)
+
+    key = (
+        memo.fingerprint(baro["air_pressure (mH2O)"]),
+        memo.fingerprint(diver["diver_pressure (mH2O)"]),
+        float(water_density),
+        alignment,
+        None if tolerance is None else pd.Timedelta(tolerance).value,
+    )
+    return active_memo.get(
+        key,
+        lambda: _water_column_from(baro, diver, water_density, alignment, tolerance),
+    )
+
+
 def _water_column_at_datetime(
     water_column: Timeseries, datetime: pd.Timestamp
 ) -> float:
@@ -59,6 +127,210 @@ def _water_column_at_datetime(
     return water_column["water_column (m)"].iloc[closest_index]
 
 
+def _water_column_at_datetimes(
+    water_column: Timeseries, datetimes: pd.DatetimeIndex
+) -> np.ndarray:
+    """
+    Find the closest water column values to several dates and times in a single
+    lookup, see _water_column_at_datetime.
+    """
+    positions = _nearest_positions(water_column.data.index, datetimes)
+    return water_column["water_column (m)"].to_numpy()[positions]
+
+
+def _nearest_positions(index: pd.DatetimeIndex, datetimes) -> np.ndarray:
+    """
+    Find the positions of the samples closest to each datetime in an index, with a
+    single searchsorted pass: O(m log n) for m datetimes and n samples, plus a sort
+    of the index if it is not monotonic increasing. Ties resolve to the later
+    sample, as Index.get_indexer(method="nearest") does.
+    """
+    values = index.asi8
+    targets = pd.DatetimeIndex(datetimes).as_unit(index.unit).asi8
+    if len(values) == 1:
+        return np.zeros(len(targets), dtype=np.intp)
+
+    order = None
+    if not index.is_monotonic_increasing:
+        order = np.argsort(values, kind="stable")
+        values = values[order]
+    right = np.searchsorted(values, targets, side="left").clip(1, len(values) - 1)
+    left = right - 1
+    use_right = (values[right] - targets) <= (targets - values[left])
+    positions = np.where(use_right, right, left)
+    return positions if order is None else order[positions]
+
+
+def _align_asof(
+    series: pd.Series, index: pd.DatetimeIndex, alignment: str, tolerance=None
+) -> np.ndarray:
+    """
+    Look up the values of a series at the timestamps of another index, without
+    reindexing either of them (see _water_column_from for the alignments).
+
+    Each timestamp is located with a binary search (np.searchsorted), so the lookup
+    takes O(m log n) for m timestamps and n samples of the series, and the
+    timestamps do not have to be sorted. A series that is not sorted by time is
+    sorted first (O(n log n)).
+    """
+    if not series.index.is_monotonic_increasing:
+        series = series.sort_index(kind="stable")
+    source = series.index.as_unit("ns").asi8
+    values = series.to_numpy(dtype=float)
+    target = index.as_unit("ns").asi8
+    result = np.full(len(target), np.nan)
+    if len(source) == 0:
+        return result
+
+    limit = np.iinfo(np.int64).max
+    if tolerance is not None:
+        limit = pd.Timedelta(tolerance).value
+
+    if alignment == "nearest":
+        position = _nearest_positions(series.index.as_unit("ns"), index)
+        valid = np.abs(target - source[position]) <= limit
+        result[valid] = values[position[valid]]
+    elif alignment == "backward":
+        position = np.searchsorted(source, target, side="right") - 1
+        valid = position >= 0
+        valid[valid] = (target[valid] - source[position[valid]]) <= limit
+        result[valid] = values[position[valid]]
+    elif alignment == "linear":
+        right = np.searchsorted(source, target, side="left")
+        inside = right < len(source)
+        exact = inside.copy()
+        exact[inside] = source[right[inside]] == target[inside]
+        result[exact] = values[right[exact]]
+
+        between = inside & ~exact & (right > 0)
+        right = right[between]
+        left = right - 1
+        t = target[between]
+        weight = (t - source[left]) / (source[right] - source[left])
+        interpolated = values[left] + weight * (values[right] - values[left])
+        valid = ((t - source[left]) <= limit) & ((source[right] - t) <= limit)
+        result[between] = np.where(valid, interpolated, np.nan)
+    return result
+
+
+def select_baro(baro: Timeseries, start, end, alignment: str = "exact") -> Timeseries:
+    """
+    Selects the barometric pressure needed to compensate the diver samples from
+    start to end (inclusive): the baro samples within that period and, for an
+    as-of alignment, the last sample before and the first sample after it, as
+    these can be matched to the first and last diver samples.
+
+    Parameters
+    ----------
+    baro :  Timeseries
+        A timeseries of barometric pressure data.
+    start, end : str or pd.Timestamp
+        The period of the diver samples.
+    alignment : str, optional
+        The alignment the baro is used with, see baro_compensate.
+        Default is "exact".
+
+    Returns
+    -------
+    Timeseries
+        The selected barometric pressure, sorted by time.
+
+    Raises
+    ------
+    ValueError
+        If the specified alignment is not valid.
+
+    """
+    if alignment not in ALIGNMENTS:
+        raise ValueError(f"Alignment not valid, use: {ALIGNMENTS}.")
+    if not baro.data.index.is_monotonic_increasing:
+        baro = Timeseries(baro.data.sort_index(kind="stable"))
+    index = baro.data.index
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if alignment != "exact" and len(index):
+        before = index.searchsorted(start, side="left") - 1
+        after = index.searchsorted(end, side="right")
+        start = index[before] if before >= 0 else start
+        end = index[after] if after < len(index) else end
+    return baro.select_daterange(start, end)
+
+
+def _drift_offsets(
+    datetimes: pd.DatetimeIndex,
+    offsets: np.ndarray,
+    index: pd.DatetimeIndex,
+    correction: str,
+) -> np.ndarray:
+    """
+    Spread the diver positions derived from sorted handreadings over all samples of
+    an index.
+
+    Parameters
+    ----------
+    datetimes : pd.DatetimeIndex
+        The sorted dates and times of the handreadings.
+    offsets : np.ndarray
+        The diver position relative to the datum derived from each handreading.
+    index : pd.DatetimeIndex
+        The samples to calculate the diver position for.
+    correction : str
+        - "linear": interpolate linearly between handreadings, constant before the
+          first and after the last handreading.
+        - "step": each handreading applies until the next one, the first also
+          applies before it.
+        - "constant": the mean position of all handreadings.
+
+    Returns
+    -------
+    np.ndarray
+        The diver position relative to the datum at every sample.
+
+    """
+    if correction == "constant":
+        return np.full(len(index), offsets.mean())
+
+    samples = index.as_unit("ns").asi8
+    readings = datetimes.as_unit("ns").asi8
+    if correction == "linear":
+        return np.interp(samples, readings, offsets)
+    position = np.searchsorted(readings, samples, side="right") - 1
+    return offsets[position.clip(0)]
+
+
+def _leave_one_out_offsets(
+    datetimes: pd.DatetimeIndex, offsets: np.ndarray, correction: str
+) -> np.ndarray:
+    """
+    The diver position at each handreading as predicted by the other handreadings,
+    using the same drift correction. NaN if there is only a single handreading.
+
+    Raises
+    ------
+    ValueError
+        If two handreadings share a datetime, the linear prediction between them is
+        not defined.
+    """
+    n = len(offsets)
+    if n <= 1:
+        return np.full(n, np.nan)
+    if datetimes.has_duplicates:
+        raise ValueError("Multiple handreadings at the same datetime.")
+    if correction == "constant":
+        return (offsets.sum() - offsets) / (n - 1)
+
+    predicted = np.empty(n)
+    predicted[0] = offsets[1]
+    if correction == "step":
+        predicted[1:] = offsets[:-1]
+        return predicted
+
+    readings = datetimes.as_unit("ns").asi8.astype(float)
+    weight = (readings[1:-1] - readings[:-2]) / (readings[2:] - readings[:-2])
+    predicted[1:-1] = offsets[:-2] + weight * (offsets[2:] - offsets[:-2])
+    predicted[-1] = offsets[-2]
+    return predicted
+
+
 def _diver_position_to_datum(water_column_above_diver, handreading, top_well):
     """
     Calculate the diver's position relative to the datum (e.g., ground level).
@@ -84,25 +356,41 @@ def _diver_position_to_datum(water_column_above_diver, handreading, top_well):
     return top_well - cable_length
 
 
+def _well_name(observation_well, **kwargs) -> str:
+    return observation_well.name
+
+
+@instrumented(well_from=_well_name)
 def baro_compensate(
     baro: Timeseries,
     diver: Timeseries,
-    handreading: HandReading,
+    handreading: HandReading | Iterable[HandReading],
     observation_well: ObservationWell,
     method: str = "cable",
+    alignment: str = "exact",
+    tolerance=None,
+    drift_correction: str = "linear",
+    return_residuals: bool = False,
+    water_density: float = 1000.0,
 ):
     """
     Compensates diver pressure data using barometric pressure data and calculates
     water level relative to a datum.
 
+    If the water column memo is enabled (see memo.enable_water_column_memo), the
+    water column above the diver is kept in it, so repeated calls on the same baro
+    and diver data, e.g. with another method or hand reading, only apply the diver
+    position.
+
     Parameters
     ----------
     baro :  Timeseries
         A timeseries of barometric pressure data.
     diver :  Timeseries
         A timeseries of diver pressure data.
-    handreading :  HandReading
-        A handreading object containing manual water level readings and their timestamps.
+    handreading :  HandReading or Iterable[HandReading]
+        One or more handreading objects containing manual water level readings and
+        their timestamps.
     observation_well :  ObservationWell
         An observation well object containing metadata such as the top of the well
         and the diver's position relative to the datum.
@@ -112,31 +400,383 @@ def baro_compensate(
           relative to the datum.
         - "cable": Uses the pre-defined diver-to-datum distance from the observation well.
         Default is "cable".
+    alignment : str, optional
+        How barometric pressure is matched to the diver timestamps: "exact",
+        "nearest", "backward" or "linear", see _water_column_from. Use an as-of
+        alignment when the clocks of both loggers are offset or their sample
+        intervals differ. Default is "exact".
+    tolerance : str or pd.Timedelta, optional
+        Maximum distance between a diver timestamp and the baro samples matched to
+        it. Default is no limit.
+    drift_correction : str, optional
+        How the diver positions derived from multiple handreadings are applied to
+        correct for sensor drift: "linear", "step" or "constant", see
+        _drift_offsets. Default is "linear".
+    return_residuals : bool, optional
+        If True, also return the residual of each handreading: the observed water
+        level minus the water level predicted by the other handreadings.
+        Default is False.
+    water_density : float, optional
+        The density of water in kg/m3. Default is 1000.0 kg/m3.
     Returns
     -------
     Timeseries
         A timeseries of water levels relative to the datum, with the column labeled
         as "water_level (m datum)".
+    pd.DataFrame
+        Only if return_residuals is True: the water column, diver position and
+        residual (m) per handreading, or None for the "cable" method.
+    Raises
+    ------
+    ValueError
+        If the specified method is not "handreading" or "cable", the alignment or
+        drift correction is not valid, or the "handreading" method is given no
+        handreadings or several handreadings at the same datetime.
+
+    """
+    water_column = _memoized_water_column(
+        baro, diver, water_density, alignment, tolerance
+    )
+
+    residuals = None
+    if method == "handreading":
+        if drift_correction not in DRIFT_CORRECTIONS:
+            raise ValueError(f"Drift correction not valid, use: {DRIFT_CORRECTIONS}.")
+        if isinstance(handreading, HandReading):
+            handreading = [handreading]
+        handreadings = sorted(handreading, key=lambda h: h.datetime)
+        if not handreadings:
+            raise ValueError('No handreadings for the "handreading" method.')
+        datetimes = pd.DatetimeIndex([h.datetime for h in handreadings])
+        if datetimes.has_duplicates:
+            raise ValueError("Multiple handreadings at the same datetime.")
+        readings = np.array([h.reading for h in handreadings])
+
+        water_column_at_handreadings = _water_column_at_datetimes(
+            water_column, datetimes
+        )
+        offsets = _diver_position_to_datum(
+            water_column_at_handreadings, readings, observation_well.top_well
+        )
+        if len(offsets) == 1:
+            diver_to_datum = offsets[0]
+        else:
+            diver_to_datum = _drift_offsets(
+                datetimes, offsets, water_column.data.index, drift_correction
+            )
+        residuals = pd.DataFrame(
+            {
+                "water_column (m)": water_column_at_handreadings,
+                "diver_to_datum (m)": offsets,
+                "residual (m)": offsets
+                - _leave_one_out_offsets(datetimes, offsets, drift_correction),
+            },
+            index=datetimes.rename("date"),
+        )
+    elif method == "cable":
+        diver_to_datum = observation_well.diver_to_datum
+    else:
+        raise ValueError('Method not valid, use: "handreading", or "cable".')
+
+    water_level = diver_to_datum + water_column["water_column (m)"]
+
+    water_level = Timeseries(water_level.to_frame("water_level (m datum)"))
+    if return_residuals:
+        return water_level, residuals
+    return water_level
+
+
+def _next_frame(chunks: Iterator[Timeseries]) -> pd.DataFrame | None:
+    for chunk in chunks:
+        if len(chunk.data):
+            return chunk.data
+    return None
+
+
+def _split_at(
+    frame: pd.DataFrame, watermark: pd.Timestamp
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    split = frame.index.searchsorted(watermark, side="right")
+    return frame.iloc[:split], frame.iloc[split:]
+
+
+def _stream_water_column(
+    baro_chunks: Iterable[Timeseries],
+    diver_chunks: Iterable[Timeseries],
+    water_density: float = 1000.0,
+) -> Iterator[Timeseries]:
+    """
+    Calculate the water column above the diver from two sorted chunk streams.
+
+    Both streams are consumed up to the last timestamp present in both buffers, so
+    only the overlap of one baro and one diver chunk is held in memory. The
+    concatenated output equals _water_column_from on the complete series.
+    """
+    baro_chunks = iter(baro_chunks)
+    diver_chunks = iter(diver_chunks)
+    baro = _next_frame(baro_chunks)
+    diver = _next_frame(diver_chunks)
+
+    while baro is not None and diver is not None:
+        watermark = min(baro.index[-1], diver.index[-1])
+        baro_head, baro = _split_at(baro, watermark)
+        diver_head, diver = _split_at(diver, watermark)
+        yield _water_column_from(baro_head, diver_head, water_density)
+
+        if baro.empty:
+            baro = _next_frame(baro_chunks)
+        if diver.empty:
+            diver = _next_frame(diver_chunks)
+
+    no_data = pd.DatetimeIndex([], name="date")
+    empty_baro = pd.DataFrame({"air_pressure (mH2O)": []}, index=no_data, dtype=float)
+    empty_diver = pd.DataFrame(
+        {"diver_pressure (mH2O)": []}, index=no_data, dtype=float
+    )
+    while baro is not None:
+        yield _water_column_from(baro, empty_diver, water_density)
+        baro = _next_frame(baro_chunks)
+    while diver is not None:
+        yield _water_column_from(empty_baro, diver, water_density)
+        diver = _next_frame(diver_chunks)
+
+
+def baro_compensate_chunks(
+    baro_chunks: Iterable[Timeseries],
+    diver_chunks: Iterable[Timeseries],
+    handreading: HandReading,
+    observation_well: ObservationWell,
+    method: str = "cable",
+) -> Iterator[Timeseries]:
+    """
+    Streaming variant of baro_compensate for deployments that do not fit in memory,
+    e.g. fed by readers.iter_diver_chunks.
+
+    Parameters
+    ----------
+    baro_chunks : Iterable[Timeseries]
+        Sorted, consecutive chunks of barometric pressure data.
+    diver_chunks : Iterable[Timeseries]
+        Sorted, consecutive chunks of diver pressure data.
+    handreading :  HandReading
+        A handreading object containing manual water level readings and their timestamps.
+    observation_well :  ObservationWell
+        An observation well object containing metadata such as the top of the well
+        and the diver's position relative to the datum.
+    method : str, optional
+        The method to use for compensation, see baro_compensate. With "handreading"
+        the water column is held in memory up to the time of the handreading, after
+        which chunks are emitted as they arrive. Default is "cable".
+
+    Yields
+    ------
+    Timeseries
+        Consecutive chunks of water levels relative to the datum, with the column
+        labeled as "water_level (m datum)".
+
     Raises
     ------
     ValueError
         If the specified method is not "handreading" or "cable".
 
     """
-    water_column = _water_column_from(baro, diver)
+    if method not in ("handreading", "cable"):
+        raise ValueError('Method not valid, use: "handreading", or "cable".')
+
+    water_columns = _stream_water_column(baro_chunks, diver_chunks)
+    pending = []
 
     if method == "handreading":
+        for water_column in water_columns:
+            pending.append(water_column)
+            if water_column.data.index[-1] >= handreading.datetime:
+                break
+        if not pending:
+            return
+        held = Timeseries(pd.concat([water_column.data for water_column in pending]))
         water_column_at_handreading = _water_column_at_datetime(
-            water_column, handreading.datetime
+            held, handreading.datetime
         )
         diver_to_datum = _diver_position_to_datum(
             water_column_at_handreading, handreading.reading, observation_well.top_well
         )
-    elif method == "cable":
+        del held
+    else:
         diver_to_datum = observation_well.diver_to_datum
+
+    for water_column in pending:
+        water_level = diver_to_datum + water_column["water_column (m)"]
+        yield Timeseries(water_level.to_frame("water_level (m datum)"))
+    pending.clear()
+
+    for water_column in water_columns:
+        water_level = diver_to_datum + water_column["water_column (m)"]
+        yield Timeseries(water_level.to_frame("water_level (m datum)"))
+
+
+@instrumented
+def baro_compensate_batch(
+    baro: Timeseries,
+    divers: Mapping[str, Timeseries],
+    wells: pd.DataFrame,
+    water_density: float = 1000.0,
+    wide: bool = True,
+    alignment: str = "exact",
+    tolerance=None,
+) -> Timeseries | dict[str, Timeseries]:
+    """
+    Compensates the pressure data of many divers against a single barometric series
+    at once, aligning all series once onto a shared time axis.
+
+    Parameters
+    ----------
+    baro :  Timeseries
+        A timeseries of barometric pressure data.
+    divers :  Mapping[str, Timeseries]
+        Timeseries of diver pressure data keyed by diver code.
+    wells : pd.DataFrame
+        Well metadata indexed by diver code, with the columns:
+        - "top_well": height of the top of the well relative to the datum (m).
+        - "diver_to_datum": diver position relative to the datum (m), used by the
+          "cable" method.
+        - "method" (optional): "cable" or "handreading", default is "cable".
+        - "handreading_datetime" and "handreading" (only for the "handreading"
+          method): time of the handreading and reading below top of well (m).
+    water_density : float, optional
+        The density of water in kg/m3. Default is 1000.0 kg/m3.
+    wide : bool, optional
+        If True, return a single Timeseries with one column per diver code.
+        Otherwise, return a Timeseries per diver code as baro_compensate does.
+        Default is True.
+    alignment : str, optional
+        How barometric pressure is matched to the diver timestamps, see
+        baro_compensate. Default is "exact".
+    tolerance : str or pd.Timedelta, optional
+        Maximum distance between a diver timestamp and the baro samples matched to
+        it. Default is no limit.
+
+    Returns
+    -------
+    Timeseries or dict[str, Timeseries]
+        The water levels relative to the datum.
+
+    Raises
+    ------
+    ValueError
+        If there are no divers, a diver code is missing from wells, or a method or
+        the alignment is not valid.
+
+    """
+    codes = list(divers)
+    if not codes:
+        raise ValueError("No divers to compensate.")
+    missing = [code for code in codes if code not in wells.index]
+    if missing:
+        raise ValueError(f"No well metadata for diver(s): {missing}.")
+
+    wells = wells.loc[codes]
+    if "method" in wells:
+        methods = wells["method"].fillna("cable").to_numpy()
     else:
+        methods = np.full(len(codes), "cable", dtype=object)
+    if not np.isin(methods, ["handreading", "cable"]).all():
         raise ValueError('Method not valid, use: "handreading", or "cable".')
+    if alignment not in ALIGNMENTS:
+        raise ValueError(f"Alignment not valid, use: {ALIGNMENTS}.")
 
-    water_level = diver_to_datum + water_column["water_column (m)"]
+    gravitational_acceleration = 9.80665  # m/s2
+
+    # with an as-of alignment the time axis only holds the diver timestamps
+    baro_index = baro.data.index if alignment == "exact" else baro.data.index[:0]
+    diver_indexes = [divers[code].data.index for code in codes]
+    shared_index = all(index.equals(diver_indexes[0]) for index in diver_indexes)
+    if shared_index:
+        # the union is sorted, an unsorted diver index is put in its order
+        time = diver_indexes[0].union(baro_index)
+        if time.equals(diver_indexes[0]):
+            diver_rows = slice(None)
+            water_column = np.empty((len(time), len(codes)), order="F")
+        else:
+            diver_rows = time.get_indexer(diver_indexes[0])
+            water_column = np.full((len(time), len(codes)), np.nan, order="F")
+    else:
+        diver_pressure = pd.concat(
+            {code: divers[code]["diver_pressure (mH2O)"] for code in codes}, axis=1
+        )
+        time = diver_pressure.index.union(baro_index)
+        water_column = diver_pressure.reindex(time).to_numpy(copy=True)
+        diver_rows = None
+    if alignment == "exact":
+        air_pressure = baro["air_pressure (mH2O)"].reindex(time).to_numpy()
+    else:
+        air_pressure = _align_asof(
+            baro["air_pressure (mH2O)"], time, alignment, tolerance
+        )
 
-    return Timeseries(water_level.to_frame("water_level (m datum)"))
+    if "diver_to_datum" in wells:
+        diver_to_datum = wells["diver_to_datum"].to_numpy(dtype=float, copy=True)
+    else:
+        diver_to_datum = np.full(len(codes), np.nan)
+    handreading_rows = np.zeros(len(codes), dtype=np.intp)
+    handreadings = np.flatnonzero(methods == "handreading")
+    if len(handreadings):
+        handreading_datetimes = pd.to_datetime(
+            wells["handreading_datetime"].iloc[handreadings],
+            format="%Y-%m-%d %H:%M:%S",
+        )
+        if shared_index:
+            handreading_rows[handreadings] = _nearest_positions(
+                time, handreading_datetimes
+            )
+        else:
+            for i, datetime in zip(handreadings, handreading_datetimes):
+                index = baro_index.union(diver_indexes[i])
+                closest = index[_nearest_positions(index, [datetime])[0]]
+                handreading_rows[i] = time.get_loc(closest)
+        readings = wells["handreading"].to_numpy(dtype=float)
+        top_well = wells["top_well"].to_numpy(dtype=float)
+
+    # the 2-D steps are applied to blocks of wells that fit in the CPU cache
+    # rather than to the whole array, in the same order of operations as
+    # _water_column_from and baro_compensate
+    block_size = max(1, _BATCH_BLOCK_BYTES // max(1, 8 * len(time)))
+    for start in range(0, len(codes), block_size):
+        block_wells = slice(start, start + block_size)
+        block = water_column[:, block_wells]
+        if diver_rows is not None:
+            for i, code in enumerate(codes[block_wells]):
+                block[diver_rows, i] = divers[code]["diver_pressure (mH2O)"].to_numpy()
+        block -= air_pressure[:, np.newaxis]
+        block *= 9806.65
+        block /= water_density * gravitational_acceleration
+
+        block_handreadings = handreadings[
+            (handreadings >= start) & (handreadings < start + block_size)
+        ]
+        if len(block_handreadings):
+            diver_to_datum[block_handreadings] = _diver_position_to_datum(
+                water_column[handreading_rows[block_handreadings], block_handreadings],
+                readings[block_handreadings],
+                top_well[block_handreadings],
+            )
+        block += diver_to_datum[block_wells]
+    water_level = water_column
+
+    if wide:
+        return Timeseries(pd.DataFrame(water_level, index=time, columns=codes))
+
+    result = {}
+    baro_rows = time.isin(baro_index)
+    for i, code in enumerate(codes):
+        rows = slice(None)
+        if len(diver_indexes[i]) != len(time) and not baro_rows.all():
+            rows = baro_rows | time.isin(diver_indexes[i])
+        result[code] = Timeseries(
+            pd.DataFrame(
+                water_level[rows, i, np.newaxis],
+                index=time[rows],
+                columns=["water_level (m datum)"],
+                copy=False,
+            )
+        )
+    return result
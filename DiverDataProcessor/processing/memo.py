@@ -0,0 +1,143 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+import numpy as np
+import pandas as pd
+
+from DiverDataProcessor.base import Timeseries
+
+DEFAULT_MAX_SIZE = 256 * 1024**2  # bytes
+
+
+def _array_bytes(values: np.ndarray) -> np.ndarray:
+    """The bytes of an array, object arrays are hashed per element first."""
+    values = np.ascontiguousarray(values)
+    if values.dtype.kind not in "biufcmM":
+        values = pd.util.hash_array(values.astype(object))
+    return values.view(np.uint8)
+
+
+def fingerprint(series: pd.Series) -> str:
+    """
+    BLAKE2b hash of the length, dtypes, index and values of a series. Series with
+    the same fingerprint hold the same data, barring a hash collision.
+    """
+    index = series.index
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((len(series), str(index.dtype), str(series.dtype))).encode())
+    digest.update(
+        _array_bytes(
+            index.asi8 if isinstance(index, pd.DatetimeIndex) else index.to_numpy()
+        )
+    )
+    digest.update(_array_bytes(series.to_numpy()))
+    return digest.hexdigest()
+
+
+class WaterColumnMemo:
+    """
+    In-memory LRU cache of water columns (see compensation._water_column_from),
+    keyed by the fingerprints of the air and diver pressure, the water density and
+    the alignment. Repeated compensations of the same series, e.g. with another
+    method or hand reading, then only apply the diver position.
+
+    Attributes:
+    -----------
+    max_size : int
+        Maximum total size of the cached water columns (bytes). The least recently
+        used water columns are evicted when the cache grows beyond this size.
+    hits, misses, evictions : int
+        Statistics since the memo was created or cleared.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, tuple[Timeseries, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, compute: Callable[[], Timeseries]) -> Timeseries:
+        """The water column of key, computed and stored if it is not cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        water_column = compute()
+        nbytes = int(water_column.data.memory_usage(index=True).sum())
+        if nbytes > self.max_size:
+            return water_column
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (water_column, nbytes)
+                self._size += nbytes
+            while self._size > self.max_size:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+                self.evictions += 1
+        return water_column
+
+    def size(self) -> int:
+        """Total size of the cached water columns (bytes)."""
+        return self._size
+
+    def clear(self):
+        """Remove all water columns and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def statistics(self) -> dict:
+        """Hits, misses, evictions, number of entries and size (bytes)."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size": self._size,
+            "max_size": self.max_size,
+        }
+
+
+_memo: WaterColumnMemo | None = None
+
+
+def enable_water_column_memo(max_size: int = DEFAULT_MAX_SIZE) -> WaterColumnMemo:
+    """
+    Enable the water column memo (disabled by default), or replace the active memo
+    by an empty one.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        Maximum size of the memo (bytes). Default is 256 MiB.
+
+    Returns
+    -------
+    WaterColumnMemo
+        The active memo.
+
+    """
+    global _memo
+    _memo = WaterColumnMemo(max_size)
+    return _memo
+
+
+def disable_water_column_memo():
+    """Disable the water column memo, water columns are always recomputed."""
+    global _memo
+    _memo = None
+
+
+def water_column_memo() -> WaterColumnMemo | None:
+    """The active water column memo, None if disabled."""
+    return _memo
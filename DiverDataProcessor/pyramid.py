@@ -0,0 +1,258 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from DiverDataProcessor.base import Timeseries
+
+STATS = ("min", "max", "mean", "count", "first", "last")
+LEVELS = ("h", "D", "W-MON", "MS")  # hourly, daily, weekly (from Monday), monthly
+MONTHLY_OFFSETS = (pd.offsets.MonthBegin, pd.offsets.QuarterBegin, pd.offsets.YearBegin)
+# offsets of which pandas closes and labels the bins on the right by default
+RIGHT_CLOSED_OFFSETS = (
+    pd.offsets.Week,
+    pd.offsets.MonthEnd,
+    pd.offsets.QuarterEnd,
+    pd.offsets.YearEnd,
+    pd.offsets.BusinessMonthEnd,
+    pd.offsets.BQuarterEnd,
+    pd.offsets.BYearEnd,
+)
+
+
+def _binned(frame: pd.DataFrame, freq: str):
+    # all bins are closed and labelled on the left, so that the levels nest
+    return frame.resample(freq, closed="left", label="left")
+
+
+def _bin_start(timestamp: pd.Timestamp, freq: str) -> pd.Timestamp:
+    return _binned(pd.Series(0, index=[timestamp]), freq).sum().index[0]
+
+
+def _columns(variables) -> pd.MultiIndex:
+    return pd.MultiIndex.from_product([variables, STATS], names=["variable", "stat"])
+
+
+def _aggregate(data: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """Aggregate raw samples to bins of freq."""
+    binned = _binned(data, freq)
+    stats = pd.concat({stat: getattr(binned, stat)() for stat in STATS}, axis=1)
+    return stats.swaplevel(axis=1).reindex(columns=_columns(data.columns))
+
+
+def _coarsen(level: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """Aggregate the bins of a level to coarser bins of freq."""
+
+    def stat(name):
+        return level.xs(name, axis=1, level="stat")
+
+    count = _binned(stat("count"), freq).sum()
+    total = _binned((stat("mean") * stat("count")).fillna(0.0), freq).sum()
+    stats = {
+        "min": _binned(stat("min"), freq).min(),
+        "max": _binned(stat("max"), freq).max(),
+        "mean": total / count.where(count > 0),
+        "count": count,
+        "first": _binned(stat("first"), freq).first(),
+        "last": _binned(stat("last"), freq).last(),
+    }
+    variables = level.columns.unique("variable")
+    return (
+        pd.concat(stats, axis=1).swaplevel(axis=1).reindex(columns=_columns(variables))
+    )
+
+
+def _merge(level: pd.DataFrame, new: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """Merge new bins into a level, combining the bin they have in common."""
+    start = new.index[0]
+    common = pd.concat([level[level.index >= start], new])
+    return pd.concat([level[level.index < start], _coarsen(common, freq)])
+
+
+def coarsest_level(freq: str) -> str:
+    """
+    The coarsest level of which the bins nest in the bins of freq.
+
+    Raises
+    ------
+    ValueError
+        If freq is finer than hourly.
+
+    """
+    offset = to_offset(freq)
+    if isinstance(offset, pd.offsets.Tick):
+        for level in ("D", "h"):
+            if offset.nanos % to_offset(level).nanos == 0:
+                return level
+        raise ValueError(f"Frequency {freq} is finer than the hourly level.")
+    if isinstance(offset, MONTHLY_OFFSETS):
+        return "MS"
+    if isinstance(offset, pd.offsets.Week) and offset.weekday == 0:
+        return "W-MON"
+    return "D"
+
+
+def default_bins(freq: str) -> bool:
+    """
+    Whether the pyramid answers freq with the bins of a default pandas resample of
+    any part of the series: freq is an hour or coarser, pandas closes its bins on
+    the left and does not start them at the first sample (as for "2D" or "2MS").
+    """
+    offset = to_offset(freq)
+    if isinstance(offset, pd.offsets.Tick):
+        day = to_offset("D").nanos
+        if offset.nanos > day or day % offset.nanos:
+            return False
+    elif offset.n != 1 or isinstance(offset, RIGHT_CLOSED_OFFSETS):
+        return False
+    try:
+        coarsest_level(freq)
+    except ValueError:
+        return False
+    return True
+
+
+class AggregatePyramid:
+    """
+    Precomputed aggregates (min, max, mean, count, first and last) of a timeseries at
+    hourly, daily, weekly and monthly levels. Queries are answered from the
+    coarsest level that nests in the requested resolution, instead of the raw data.
+
+    All bins are closed and labelled on the left, e.g. the daily bin 2024-01-01
+    holds the samples of [2024-01-01 00:00, 2024-01-02 00:00).
+
+    Attributes:
+    -----------
+    levels : dict[str, pd.DataFrame]
+        The aggregates per level, with (variable, stat) columns.
+    last : pd.Timestamp
+        The last aggregated sample.
+    """
+
+    def __init__(self, levels: dict[str, pd.DataFrame], last: pd.Timestamp):
+        self.levels = levels
+        self.last = last
+
+    @classmethod
+    def build(cls, data: pd.DataFrame) -> "AggregatePyramid":
+        """Build the pyramid from raw samples, coarser levels from finer levels."""
+        data = data.sort_index()
+        hourly = _aggregate(data, "h")
+        daily = _coarsen(hourly, "D")
+        levels = {
+            "h": hourly,
+            "D": daily,
+            "W-MON": _coarsen(daily, "W-MON"),
+            "MS": _coarsen(daily, "MS"),
+        }
+        return cls(levels, data.index[-1])
+
+    def update(self, data: pd.DataFrame):
+        """
+        Aggregate samples appended after the last aggregated sample. Only the new
+        samples are aggregated, the last bin of each level is combined with them.
+
+        Raises
+        ------
+        ValueError
+            If the samples do not follow the last aggregated sample, use rebuild.
+
+        """
+        if data.empty:
+            return
+        data = data.sort_index()
+        if data.index[0] <= self.last:
+            raise ValueError(
+                f"Samples from {data.index[0]} do not follow the last aggregated "
+                f"sample {self.last}, use rebuild."
+            )
+        new = {"h": _aggregate(data, "h")}
+        new["D"] = _coarsen(new["h"], "D")
+        new["W-MON"] = _coarsen(new["D"], "W-MON")
+        new["MS"] = _coarsen(new["D"], "MS")
+        for level in LEVELS:
+            self.levels[level] = _merge(self.levels[level], new[level], level)
+        self.last = data.index[-1]
+
+    @staticmethod
+    def rebuild_start(start) -> pd.Timestamp:
+        """The start of the samples needed to rebuild all bins from start onwards."""
+        start = pd.Timestamp(start)
+        return min(_bin_start(start, level) for level in LEVELS)
+
+    def rebuild(self, data: pd.DataFrame, start):
+        """
+        Replace all bins holding samples from start onwards, e.g. after samples
+        were inserted before the last aggregated sample.
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            All samples from rebuild_start(start) onwards.
+        start : str or pd.Timestamp
+            The first changed sample.
+
+        """
+        data = data.sort_index()
+        rebuilt = AggregatePyramid.build(data)
+        for level in LEVELS:
+            cut = _bin_start(pd.Timestamp(start), level)
+            existing, new = self.levels[level], rebuilt.levels[level]
+            self.levels[level] = pd.concat(
+                [existing[existing.index < cut], new[new.index >= cut]]
+            )
+        self.last = max(self.last, rebuilt.last)
+
+    def query(self, start=None, end=None, freq: str = "D", stats=STATS) -> pd.DataFrame:
+        """
+        Aggregates at any resolution of at least an hour.
+
+        Parameters
+        ----------
+        start, end : str or pd.Timestamp, optional
+            The bins of the level between start and end. Default is all bins.
+        freq : str, optional
+            The resolution (pandas frequency). Default is "D".
+        stats : Iterable[str], optional
+            The statistics to return. Default is all statistics.
+
+        Returns
+        -------
+        pd.DataFrame
+            Aggregates with (variable, stat) columns, labelled by bin start.
+
+        """
+        level = coarsest_level(freq)
+        frame = self.levels[level].loc[start:end]
+        if to_offset(freq) != to_offset(level):
+            frame = _coarsen(frame, freq)
+        return frame.loc[:, pd.IndexSlice[:, list(stats)]]
+
+    def resample(self, freq: str = "D", start=None, end=None) -> Timeseries:
+        """The mean per bin, like Timeseries.resample, from the pyramid."""
+        means = self.query(start, end, freq, stats=["mean"])
+        return Timeseries(means.droplevel("stat", axis=1))
+
+    def to_parquet(self, directory):
+        """Write the levels to <level>.parquet files and a pyramid.json sidecar."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for level, frame in self.levels.items():
+            frame.to_parquet(directory / f"{level}.parquet")
+        (directory / "pyramid.json").write_text(
+            json.dumps({"last": self.last.isoformat()})
+        )
+
+    @classmethod
+    def read_parquet(cls, directory) -> "AggregatePyramid | None":
+        """Read a pyramid written by to_parquet, None if it does not exist."""
+        directory = Path(directory)
+        try:
+            meta = json.loads((directory / "pyramid.json").read_text())
+        except FileNotFoundError:
+            return None
+        levels = {
+            level: pd.read_parquet(directory / f"{level}.parquet") for level in LEVELS
+        }
+        return cls(levels, pd.Timestamp(meta["last"]))
@@ -0,0 +1,330 @@
+import os
+import warnings
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from DiverDataProcessor import cache, outliers, readers
+from DiverDataProcessor.base import Timeseries
+
+ISSUES = ("gap", "duplicate", "non_monotonic", "clock_drift", "flatline", "jump")
+GAP_FACTOR = 1.5  # intervals
+MAX_DRIFT = "10s"
+MIN_FLAT = 12  # samples
+MAX_JUMP = 0.1  # in the units of the column, e.g. mH2O
+JUMP_WINDOW = 6  # samples
+SAMPLE_SIZE = 100_000  # steps sampled to find the interval
+COLUMNS = ["issue", "column", "start", "end", "samples", "value"]
+
+
+def _runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """The first and last position of each run of True values."""
+    padded = np.zeros(len(mask) + 2, dtype=np.int8)
+    padded[1:-1] = mask
+    edges = np.flatnonzero(np.diff(padded))
+    return edges[::2], edges[1::2] - 1
+
+
+def _table(issue: str, index: pd.Index, start, end, samples, value, column=None):
+    return pd.DataFrame(
+        {
+            "issue": issue,
+            "column": column,
+            "start": index[start],
+            "end": index[end],
+            "samples": np.asarray(samples, dtype=np.int64),
+            "value": np.asarray(value, dtype=float),
+        }
+    )
+
+
+def _most_common_interval(step: np.ndarray, sample_size: int = SAMPLE_SIZE) -> int:
+    """The most common positive interval, of an evenly spaced sample of the steps."""
+    sample = step[:: max(len(step) // sample_size, 1)]
+    sample = sample[sample > 0]
+    if len(sample) == 0:
+        return 0
+    intervals, counts = np.unique(sample, return_counts=True)
+    return int(intervals[np.argmax(counts)])
+
+
+def _jumps(values: np.ndarray, max_jump: float, window: int) -> tuple:
+    """
+    Steps larger than max_jump that persist: the medians of window samples before
+    and after the step differ by more than max_jump as well. Of steps less than
+    window samples apart, only the largest is kept.
+    """
+    change = np.abs(np.diff(values))
+    candidates = np.flatnonzero(change > max_jump) + 1
+    if len(candidates) == 0:
+        return candidates, np.empty(0)
+    cluster = np.concatenate([[0], np.cumsum(np.diff(candidates) >= window)])
+    order = np.lexsort((-change[candidates - 1], cluster))
+    first = np.concatenate([[True], cluster[order][1:] != cluster[order][:-1]])
+    candidates = np.sort(candidates[order[first]])
+    padded = np.full(len(values) + 2 * window, np.nan)
+    padded[window:-window] = values
+    windows = sliding_window_view(padded, window)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN windows
+        before = np.nanmedian(windows[candidates], axis=1)
+        after = np.nanmedian(windows[candidates + window], axis=1)
+    step = after - before
+    persistent = np.abs(step) > max_jump
+    return candidates[persistent], step[persistent]
+
+
+def scan(
+    data: pd.DataFrame,
+    interval=None,
+    gap_factor: float = GAP_FACTOR,
+    max_drift=MAX_DRIFT,
+    min_flat: int = MIN_FLAT,
+    flat_tolerance: float = 0.0,
+    max_jump: float = MAX_JUMP,
+    jump_window: int = JUMP_WINDOW,
+    columns: Iterable[str] = None,
+) -> pd.DataFrame:
+    """
+    Scan a timeseries for data quality issues in one vectorized pass over the
+    int64 times and the values. Issues are reported as intervals:
+
+    - "gap": more than gap_factor intervals between consecutive samples. From the
+      last sample before to the first sample after the gap, samples is the number
+      of missing samples and value the length of the gap (s).
+    - "duplicate": consecutive samples with the same timestamp. samples is the
+      number of samples at the timestamp.
+    - "non_monotonic": a timestamp before the previous one, e.g. after a reset of
+      the logger clock. value is the step back in time (s).
+    - "clock_drift": samples that are more than max_drift off the grid of the
+      first sample (its time plus a multiple of the interval). value is the
+      largest offset (s).
+    - "flatline": at least min_flat consecutive samples of a column that do not
+      change more than flat_tolerance, e.g. a logger running out of battery (see
+      outliers.flatline). value is the first value of the run.
+    - "jump": a step of a column larger than max_jump that persists, e.g. after
+      re-hanging a diver. value is the difference of the medians of jump_window
+      samples after and before the step.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Timeseries data with a DatetimeIndex.
+    interval : str or pd.Timedelta, optional
+        The sample interval. Default is the most common interval.
+    gap_factor : float, optional
+        Minimum length of a gap (intervals). Default is 1.5.
+    max_drift : str or pd.Timedelta, optional
+        Maximum offset from the grid of the first sample. Default is "10s", None
+        disables the check.
+    min_flat : int, optional
+        Minimum length of a flatline (samples). Default is 12, None disables the
+        check.
+    flat_tolerance : float, optional
+        Tolerance of flatlines. Default is 0.0.
+    max_jump : float, optional
+        Minimum size of a jump. Default is 0.1, None disables the check.
+    jump_window : int, optional
+        Number of samples before and after a jump that must confirm it. Default
+        is 6.
+    columns : Iterable[str], optional
+        The columns checked for flatlines and jumps. Default is the pressure
+        columns.
+
+    Returns
+    -------
+    pd.DataFrame
+        The issues (issue, column, start, end, samples and value), sorted by start.
+        column is None for issues of the timestamps.
+
+    """
+    index = pd.DatetimeIndex(data.index)
+    times = index.as_unit("ns").asi8
+    step = np.diff(times)
+    if interval is not None:
+        interval = pd.Timedelta(interval).value
+    else:
+        interval = _most_common_interval(step)
+
+    tables = []
+    if interval > 0:
+        gaps = np.flatnonzero(step > int(gap_factor * interval))
+        tables.append(
+            _table(
+                "gap",
+                index,
+                gaps,
+                gaps + 1,
+                np.round(step[gaps] / interval) - 1,
+                step[gaps] / 1e9,
+            )
+        )
+
+    first, last = _runs(step == 0)
+    tables.append(_table("duplicate", index, first, last + 1, last - first + 2, np.nan))
+
+    backwards = np.flatnonzero(step < 0)
+    tables.append(
+        _table(
+            "non_monotonic", index, backwards, backwards + 1, 1, step[backwards] / 1e9
+        )
+    )
+
+    if max_drift is not None and interval > 0 and len(times):
+        # the offset from the grid only changes after an irregular interval
+        irregular = np.flatnonzero(step != interval) + 1
+        starts = np.concatenate([[0], irregular])
+        ends = np.concatenate([irregular - 1, [len(times) - 1]])
+        offset = (times[starts] - times[0]) % interval
+        offset = np.minimum(offset, interval - offset)
+        first, last = _runs(offset > pd.Timedelta(max_drift).value)
+        largest = np.maximum.reduceat(offset, first) if len(first) else []
+        tables.append(
+            _table(
+                "clock_drift",
+                index,
+                starts[first],
+                ends[last],
+                ends[last] - starts[first] + 1,
+                np.asarray(largest) / 1e9,
+            )
+        )
+
+    if columns is None:
+        columns = [column for column in data.columns if "pressure" in column]
+    columns = list(columns)
+    if columns and (min_flat is not None or max_jump is not None):
+        values = data[columns].to_numpy(dtype=float)
+        if min_flat is not None:
+            flags = outliers.flatline(values, min_flat, flat_tolerance)
+            for i, column in enumerate(columns):
+                first, last = _runs(flags[:, i])
+                tables.append(
+                    _table(
+                        "flatline",
+                        index,
+                        first,
+                        last,
+                        last - first + 1,
+                        values[first, i],
+                        column,
+                    )
+                )
+        if max_jump is not None:
+            for i, column in enumerate(columns):
+                positions, size = _jumps(values[:, i], max_jump, jump_window)
+                tables.append(
+                    _table("jump", index, positions - 1, positions, 1, size, column)
+                )
+
+    issues = pd.concat(
+        [table for table in tables if len(table)]
+        or [_table("gap", index, [], [], [], [])]
+    )
+    issues["issue"] = pd.Categorical(issues["issue"], categories=ISSUES)
+    return issues.sort_values("start", kind="stable").reset_index(drop=True)[COLUMNS]
+
+
+def issue_mask(
+    index: pd.DatetimeIndex, issues: pd.DataFrame, kinds=ISSUES
+) -> np.ndarray:
+    """
+    Flag the timestamps within the intervals (start to end, inclusive) of the
+    issues of the given kinds, e.g. to mask water levels around jumps:
+
+    >>> mask = quality.issue_mask(water_level.data.index, issues, ["flatline", "jump"])
+    >>> water_level.data[mask] = np.nan
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array, True for timestamps within an issue.
+
+    """
+    selected = issues[issues["issue"].isin(list(kinds))]
+    times = pd.DatetimeIndex(index).as_unit("ns").asi8
+    starts = pd.DatetimeIndex(selected["start"]).as_unit("ns").asi8
+    ends = pd.DatetimeIndex(selected["end"]).as_unit("ns").asi8
+    # +1 at the start and -1 after the end of each interval
+    change = np.zeros(len(times) + 1, dtype=np.int64)
+    np.add.at(change, np.searchsorted(times, starts, side="left"), 1)
+    np.add.at(change, np.searchsorted(times, ends, side="right"), -1)
+    return np.cumsum(change[:-1]) > 0
+
+
+def _scan_well(timeseries, kind: str, kwargs: dict) -> pd.DataFrame:
+    if not isinstance(timeseries, Timeseries):
+        timeseries = readers._read_diver_file(timeseries, kind)
+    return scan(timeseries.data, **kwargs)
+
+
+def scan_project(
+    wells: Mapping[str, Timeseries] | Mapping[str, object],
+    workers: int = None,
+    kind: str = "auto",
+    **kwargs,
+) -> tuple[pd.DataFrame, dict[str, Exception]]:
+    """
+    Scan the timeseries of many wells in parallel, see scan.
+
+    Parameters
+    ----------
+    wells : Mapping[str, Timeseries or str or Path]
+        The timeseries per well, or the path of its diver export.
+    workers : int, optional
+        Number of worker processes. Default is the number of CPUs, 1 scans the wells
+        in this process.
+    kind : str, optional
+        The type of the exports, see readers.read_diver_directory. Default is
+        "auto".
+    **kwargs
+        Passed to scan.
+
+    Returns
+    -------
+    tuple[pd.DataFrame, dict[str, Exception]]
+        The issues of all wells with the well as first column, and the errors of
+        wells that could not be scanned.
+
+    """
+    tables = {}
+    errors = {}
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        for well, timeseries in wells.items():
+            try:
+                tables[well] = _scan_well(timeseries, kind, kwargs)
+            except Exception as e:
+                errors[well] = e
+    else:
+        active_cache = cache._cache
+        initargs = (
+            (active_cache.directory, active_cache.max_size)
+            if active_cache is not None
+            else (None, None)
+        )
+        with ProcessPoolExecutor(
+            max_workers=min(workers, max(len(wells), 1)),
+            initializer=readers._init_worker,
+            initargs=initargs,
+        ) as executor:
+            futures = {
+                executor.submit(_scan_well, timeseries, kind, kwargs): well
+                for well, timeseries in wells.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    tables[futures[future]] = future.result()
+                except Exception as e:
+                    errors[futures[future]] = e
+
+    wells = [well for well in wells if well in tables]
+    issues = pd.concat(
+        [tables[well].assign(well=well) for well in wells]
+        or [scan(pd.DataFrame(index=pd.DatetimeIndex([]))).assign(well=None)],
+        ignore_index=True,
+    )
+    return issues[["well", *COLUMNS]], dict(sorted(errors.items()))
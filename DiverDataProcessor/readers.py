@@ -1,89 +1,180 @@
-import numpy as np
+import asyncio
+import io
+import os
+import re
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
 import pandas as pd
 
+from DiverDataProcessor import cache
 from DiverDataProcessor.base import Timeseries
+from DiverDataProcessor.cache import cached
+from DiverDataProcessor.instrumentation import instrumented
 
+DIVER_OFFICE_ENCODING = "ISO-8859-1"
+DIVER_OFFICE_DATE_FORMAT = "%Y/%m/%d %H:%M:%S"
+DIVER_OFFICE_NODATA = "     "
+DIVER_OFFICE_FOOTER = "END OF DATA FILE"
+MAX_HEADER_LINES = 500
 
-def read_td_diver(filepath) -> Timeseries:
-    diver_data = pd.read_csv(
-        filepath,
-        usecols=[0, 1, 2],
-        names=["date", "diver_pressure (cmH2O)", "temperature (degC)"],
-        decimal=".",
-        skiprows=52,
-        delimiter=",",
-        encoding="ISO-8859-1",
-        engine="python",
-    )
-    diver_data = diver_data[:-1].replace("     ", np.nan)
-    diver_data["diver_pressure (mH2O)"] = (
-        pd.to_numeric(diver_data["diver_pressure (cmH2O)"]) / 100
-    )
-    diver_data = diver_data.drop(columns=["diver_pressure (cmH2O)"])
-    diver_data["temperature (degC)"] = pd.to_numeric(diver_data["temperature (degC)"])
-    diver_data["date"] = pd.to_datetime(diver_data["date"], format="%Y/%m/%d %H:%M:%S")
-    diver_data = diver_data.set_index("date")
-    return Timeseries(diver_data)
+_DATA_LINE = re.compile(r"^\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}(?P<delimiter>[;,])")
 
 
-def read_ec_diver(filepath) -> Timeseries:
-    diver_data = pd.read_csv(
-        filepath,
-        usecols=[0, 1, 2, 3],
-        names=[
-            "date",
-            "diver_pressure (cmH2O)",
-            "temperature (degC)",
-            "electrical_conductivity (mS/cm)",
-        ],
-        decimal=",",
-        skiprows=64,
-        delimiter=";",
-        encoding="ISO-8859-1",
-        engine="python",
-    )
-    diver_data = diver_data[:-1].replace("     ", np.nan)
-    diver_data["diver_pressure (mH2O)"] = (
-        pd.to_numeric(diver_data["diver_pressure (cmH2O)"]) / 100
-    )
-    diver_data = diver_data.drop(columns=["diver_pressure (cmH2O)"])
-    diver_data["electrical_conductivity (mS/cm)"] = pd.to_numeric(
-        diver_data["electrical_conductivity (mS/cm)"]
-    )
-    diver_data["temperature (degC)"] = pd.to_numeric(diver_data["temperature (degC)"])
-    diver_data["date"] = pd.to_datetime(diver_data["date"], format="%Y/%m/%d %H:%M:%S")
-    diver_data = diver_data.set_index("date")
-    return Timeseries(diver_data)
+def _locate_data_section(filepath) -> tuple[int, str, str]:
+    """
+    Scan the header of a Diver Office export for the start of the data section.
+
+    The header length differs per instrument type (number of channels) and per
+    Diver Office version, so the first line starting with a timestamp marks the
+    data section instead of a fixed number of rows.
+
+    Parameters
+    ----------
+    filepath : str or Path
+        Path to the Diver Office CSV export.
+
+    Returns
+    -------
+    tuple[int, str, str]
+        The number of header lines to skip, the field delimiter and the decimal
+        separator of the data section.
+
+    Raises
+    ------
+    ValueError
+        If no data section is found within the first MAX_HEADER_LINES lines.
+
+    """
+    with open(filepath, encoding=DIVER_OFFICE_ENCODING) as f:
+        for lineno, line in enumerate(f):
+            if lineno >= MAX_HEADER_LINES:
+                break
+            match = _DATA_LINE.match(line)
+            if match:
+                delimiter = match.group("delimiter")
+                decimal = "," if delimiter == ";" else "."
+                return lineno, delimiter, decimal
+
+    raise ValueError(f"No Diver Office data section found in {filepath}.")
 
 
-def read_baro_diver(filepath) -> Timeseries:
-    diver_data = pd.read_csv(
+def _diver_office_csv(filepath, columns: list[str], chunksize: int = None, dtype=None):
+    """
+    Open the data section of a Diver Office export with the C parser.
+
+    Parameters
+    ----------
+    filepath : str or Path
+        Path to the Diver Office CSV export.
+    columns : list[str]
+        Names of the value columns following the date column.
+    chunksize : int, optional
+        Number of rows per chunk. If None, the whole file is read at once.
+    dtype : str or np.dtype, optional
+        Float type the value columns are parsed to. Default is float64.
+
+    Returns
+    -------
+    pd.DataFrame or TextFileReader
+        The raw data section, or an iterator over chunks of it.
+
+    """
+    skiprows, delimiter, decimal = _locate_data_section(filepath)
+    return pd.read_csv(
         filepath,
-        usecols=[0, 1, 2],
-        names=["date", "air_pressure (cmH2O)", "temperature (degC)"],
-        decimal=",",
-        skiprows=52,
-        delimiter=";",
-        encoding="ISO-8859-1",
-        engine="python",
+        usecols=range(len(columns) + 1),
+        names=["date", *columns],
+        header=None,
+        decimal=decimal,
+        skiprows=skiprows,
+        delimiter=delimiter,
+        encoding=DIVER_OFFICE_ENCODING,
+        na_values=[DIVER_OFFICE_NODATA],
+        dtype={column: dtype or "float64" for column in columns},
+        engine="c",
+        chunksize=chunksize,
     )
-    diver_data = diver_data[:-1].replace("     ", np.nan)
-    diver_data["air_pressure (mH2O)"] = (
-        pd.to_numeric(diver_data["air_pressure (cmH2O)"]) / 100
+
+
+def _diver_office_frame(
+    diver_data: pd.DataFrame, columns: list[str], dtype=None
+) -> pd.DataFrame:
+    """
+    Convert (a chunk of) the raw data section to float columns indexed by date. The
+    pressure, always the first channel, is converted from cmH2O to mH2O and moved
+    to the last column.
+    """
+    if len(diver_data) and str(diver_data["date"].iat[-1]).startswith(
+        DIVER_OFFICE_FOOTER
+    ):
+        diver_data = diver_data.iloc[:-1]
+
+    date = pd.to_datetime(diver_data["date"], format=DIVER_OFFICE_DATE_FORMAT)
+    diver_data = diver_data.drop(columns=["date"]).astype(
+        dtype or "float64", copy=False
     )
-    diver_data = diver_data.drop(columns=["air_pressure (cmH2O)"])
-    diver_data["temperature (degC)"] = pd.to_numeric(diver_data["temperature (degC)"])
-    diver_data["date"] = pd.to_datetime(diver_data["date"], format="%Y/%m/%d %H:%M:%S")
-    diver_data = diver_data.set_index("date")
-    return Timeseries(diver_data)
+    diver_data.index = pd.DatetimeIndex(date, name="date")
+
+    pressure = columns[0]
+    diver_data[pressure] /= 100
+    return diver_data[[*columns[1:], pressure]]
+
+
+_DIVER_OFFICE_COLUMNS = {
+    "td": ["diver_pressure (mH2O)", "temperature (degC)"],
+    "ec": [
+        "diver_pressure (mH2O)",
+        "temperature (degC)",
+        "electrical_conductivity (mS/cm)",
+    ],
+    "baro": ["air_pressure (mH2O)", "temperature (degC)"],
+}
+
+
+def _read_diver_office(filepath, kind: str, dtype=None) -> Timeseries:
+    columns = _DIVER_OFFICE_COLUMNS[kind]
+    diver_data = _diver_office_csv(filepath, columns, dtype=dtype)
+    return Timeseries(_diver_office_frame(diver_data, columns, dtype))
+
+
+def _file_stem(filepath, **kwargs) -> str:
+    return Path(filepath).stem
+
+
+@instrumented(well_from=_file_stem)
+@cached
+def read_td_diver(filepath, dtype=None) -> Timeseries:
+    return _read_diver_office(filepath, "td", dtype)
+
+
+@instrumented(well_from=_file_stem)
+@cached
+def read_ec_diver(filepath, dtype=None) -> Timeseries:
+    return _read_diver_office(filepath, "ec", dtype)
 
 
-def read_diver_link(filepath) -> Timeseries:
-    diver_data = pd.read_csv(
+@instrumented(well_from=_file_stem)
+@cached
+def read_baro_diver(filepath, dtype=None) -> Timeseries:
+    return _read_diver_office(filepath, "baro", dtype)
+
+
+def _diver_link_csv(filepath, chunksize: int = None, dtype=None):
+    return pd.read_csv(
         filepath,
         parse_dates=["Date and time (UTC-06:00)"],
         usecols=[0, 2, 3],
+        dtype={2: dtype or "float64", 3: dtype or "float64"},
+        chunksize=chunksize,
     )
+
+
+def _diver_link_frame(diver_data: pd.DataFrame) -> pd.DataFrame:
     diver_data.columns = ["date", "temperature (degC)", "diver_pressure (cmH2O)"]
     diver_data["diver_pressure (mH2O)"] = (
         pd.to_numeric(diver_data["diver_pressure (cmH2O)"]) / 100
@@ -91,41 +182,147 @@ def read_diver_link(filepath) -> Timeseries:
     diver_data = diver_data.drop(columns=["diver_pressure (cmH2O)"])
     diver_data["temperature (degC)"] = pd.to_numeric(diver_data["temperature (degC)"])
     diver_data["date"] = pd.to_datetime(diver_data["date"], format="%d/%m/%Y %H:%M:%S")
-    diver_data = diver_data.set_index("date")
-    return Timeseries(diver_data)
+    return diver_data.set_index("date")
 
 
-def read_precipitation(path) -> Timeseries:
-    precipitation = pd.read_csv(path, delimiter=";", decimal=",")
+@instrumented(well_from=_file_stem)
+@cached
+def read_diver_link(filepath, dtype=None) -> Timeseries:
+    return Timeseries(_diver_link_frame(_diver_link_csv(filepath, dtype=dtype)))
+
+
+@instrumented
+@cached
+def read_precipitation(path, dtype=None) -> Timeseries:
+    precipitation = pd.read_csv(
+        path, delimiter=";", decimal=",", dtype=None if dtype is None else {1: dtype}
+    )
     precipitation.columns = ["date", "precipitation (mm)"]
     precipitation["date"] = pd.to_datetime(precipitation["date"], format="%d-%m-%Y")
     precipitation = precipitation.set_index("date")
     return Timeseries(precipitation)
 
 
-def fetch_air_pressure(station, start_date, end_date):
-    """
-    Fetches and processes air pressure data from NOAA's Global Hourly dataset.
+NOAA_URL = "https://www.ncei.noaa.gov/access/services/data/v1"
+NOAA_WINDOW = "MS"  # one request per calendar month
+NOAA_CONCURRENCY = 4
+NOAA_TIMEOUT = 60  # seconds
+NOAA_RETRIES = 2
+
 
-    Parameters:
-    - station (str): The station ID for which the data is fetched.
-    - start_date (str): The start date in the format 'YYYY-MM-DD'.
-    - end_date (str): The end date in the format 'YYYY-MM-DD'.
+def _air_pressure_directory(station: str, directory=None) -> Path:
+    if directory is None:
+        active_cache = cache._cache
+        directory = (
+            active_cache.directory
+            if active_cache is not None
+            else cache._default_directory()
+        )
+    return Path(directory) / "air_pressure" / station
 
-    Returns:
-    pd.DataFrame: A DataFrame containing processed air pressure data.
+
+def _air_pressure_windows(start_date, end_date) -> list[pd.Timestamp]:
+    """
+    The windows (start of each calendar month) covering start_date to end_date. The
+    windows do not depend on the requested range, so overlapping ranges share them.
     """
-    url = (
-        f"https://www.ncei.noaa.gov/access/services/data/v1?"
-        f"dataset=global-hourly&dataTypes=SLP&stations={station}"
-        f"&startDate={start_date}&endDate={end_date}&format=json"
+    first = pd.Timestamp(start_date).to_period("M").start_time
+    return list(pd.date_range(first, pd.Timestamp(end_date), freq=NOAA_WINDOW))
+
+
+def _download(url: str) -> str:
+    for attempt in range(NOAA_RETRIES + 1):
+        try:
+            with urllib.request.urlopen(url, timeout=NOAA_TIMEOUT) as response:
+                return response.read().decode()
+        except (urllib.error.URLError, TimeoutError):
+            if attempt == NOAA_RETRIES:
+                raise
+
+
+async def _fetch_window(
+    station: str,
+    window: pd.Timestamp,
+    directory: Path,
+    url: str,
+    offline: bool,
+    semaphore: asyncio.Semaphore,
+) -> pd.DataFrame:
+    path = directory / f"{window:%Y-%m}.json"
+    if path.exists():
+        text = path.read_text()
+    elif offline:
+        raise FileNotFoundError(
+            f"Air pressure of station {station} for {window:%Y-%m} is not cached."
+        )
+    else:
+        window_end = window + pd.offsets.MonthBegin()
+        query = urllib.parse.urlencode(
+            {
+                "dataset": "global-hourly",
+                "dataTypes": "SLP",
+                "stations": station,
+                "startDate": f"{window:%Y-%m-%d}",
+                "endDate": f"{window_end:%Y-%m-%d}",
+                "format": "json",
+            },
+            safe=",",
+        )
+        async with semaphore:
+            text = await asyncio.to_thread(_download, f"{url}?{query}")
+        # only complete windows are cached, the current month is fetched again
+        if window_end <= pd.Timestamp.now(tz="UTC").tz_localize(None):
+            directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(text)
+            os.replace(tmp_path, path)
+
+    records = pd.read_json(io.StringIO(text))
+    if records.empty:
+        return records
+    # the window end is requested as well, its samples belong to the next window
+    date = pd.to_datetime(records["DATE"])
+    return records[(date >= window) & (date < window + pd.offsets.MonthBegin())]
+
+
+async def fetch_air_pressure_async(
+    station,
+    start_date,
+    end_date,
+    offline: bool = False,
+    concurrency: int = NOAA_CONCURRENCY,
+    cache_directory=None,
+    url: str = NOAA_URL,
+) -> Timeseries:
+    """Coroutine of fetch_air_pressure, to await it within a running event loop."""
+    directory = _air_pressure_directory(station, cache_directory)
+    semaphore = asyncio.Semaphore(concurrency)
+    frames = await asyncio.gather(
+        *(
+            _fetch_window(station, window, directory, url, offline, semaphore)
+            for window in _air_pressure_windows(start_date, end_date)
+        )
     )
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return _air_pressure_timeseries(
+            pd.DataFrame(columns=["DATE", "REPORT_TYPE", "SLP"])
+        )
+    all_data = pd.concat(frames, ignore_index=True)
+    date = pd.to_datetime(all_data["DATE"])
+    all_data = all_data[
+        (date >= pd.Timestamp(start_date))
+        & (date < pd.Timestamp(end_date) + pd.Timedelta(days=1))
+    ]
+    return _air_pressure_timeseries(all_data)
+
+
+def _air_pressure_timeseries(all_data: pd.DataFrame) -> Timeseries:
     scaling_factor = 10
     nodata_value = 99999
     report_type = "FM-15"
     hours_to_ct = 6
 
-    all_data = pd.read_json(url)
     selected_data = all_data[all_data["REPORT_TYPE"] == report_type].copy()
     selected_data["SLP"] = (
         selected_data["SLP"].replace({",": "."}, regex=True).astype(float) * 0.01
@@ -142,4 +339,269 @@ def fetch_air_pressure(station, start_date, end_date):
         .rename(columns={"SLP": "air_pressure (mH2O)"})
         .set_index("date")
     )
-    return Timeseries(output)
\ No newline at end of file
+    return Timeseries(output)
+
+
+@instrumented
+def fetch_air_pressure(
+    station,
+    start_date,
+    end_date,
+    offline: bool = False,
+    concurrency: int = NOAA_CONCURRENCY,
+    cache_directory=None,
+    url: str = NOAA_URL,
+) -> Timeseries:
+    """
+    Fetches and processes air pressure data from NOAA's Global Hourly dataset.
+
+    The range is fetched per calendar month, at most concurrency months at a time.
+    Each complete month is stored in an on-disk cache, so repeated or overlapping
+    ranges are not downloaded again.
+
+    Parameters
+    ----------
+    station : str
+        The station ID for which the data is fetched.
+    start_date, end_date : str
+        The first and last day (inclusive) in the format 'YYYY-MM-DD'.
+    offline : bool, optional
+        Read from the cache only, without any request. Default is False.
+    concurrency : int, optional
+        Maximum number of concurrent requests. Default is 4.
+    cache_directory : str or Path, optional
+        The cache directory. Default is the directory of the reader cache, see
+        cache.enable_cache.
+    url : str, optional
+        The NOAA data service. Default is NOAA_URL.
+
+    Returns
+    -------
+    Timeseries
+        A timeseries of the air pressure (mH2O).
+
+    Raises
+    ------
+    FileNotFoundError
+        If offline and a month of the range is not cached.
+
+    """
+    coroutine = fetch_air_pressure_async(
+        station, start_date, end_date, offline, concurrency, cache_directory, url
+    )
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # e.g. in a notebook, run the coroutine in its own event loop in a thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+DIVER_KINDS = ("td", "ec", "baro", "diverlink")
+
+
+def detect_diver_kind(filepath) -> str:
+    """
+    Detect the type of diver export from the file header.
+
+    Parameters
+    ----------
+    filepath : str or Path
+        Path to the Diver Office or DiverLink CSV export.
+
+    Returns
+    -------
+    str
+        One of "td", "ec", "baro" or "diverlink". A Diver Office export is
+        considered barometric if the instrument is a Baro-Diver or the file name
+        contains "BARO", and EC if it holds a conductivity channel.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a recognised diver export.
+
+    """
+    filepath = Path(filepath)
+    with open(filepath, encoding=DIVER_OFFICE_ENCODING) as f:
+        first_line = f.readline()
+        if first_line.startswith("Date and time"):
+            return "diverlink"
+        if not first_line.startswith("Data file for DataLogger"):
+            raise ValueError(f"{filepath} is not a Diver Office or DiverLink export.")
+
+        instrument = ""
+        n_channels = 0
+        for lineno, line in enumerate(f, start=1):
+            if lineno >= MAX_HEADER_LINES or _DATA_LINE.match(line):
+                break
+            key, _, value = line.partition("=")
+            key = key.strip()
+            if key == "Instrument type":
+                instrument = value.strip().upper()
+            elif key == "Number of channels":
+                n_channels = int(value.strip())
+            elif key == "Identification" and "CONDUCTIVITY" in value.upper():
+                n_channels = max(n_channels, 3)
+
+    if "BARO" in instrument or "BARO" in filepath.stem.upper():
+        return "baro"
+    if n_channels >= 3 or "CTD" in instrument:
+        return "ec"
+    return "td"
+
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+
+def iter_diver_chunks(
+    filepath, kind: str = "auto", chunksize: int = DEFAULT_CHUNKSIZE, dtype=None
+) -> Iterator[Timeseries]:
+    """
+    Read a diver export as a stream of Timeseries chunks, so that memory use is
+    bounded by the chunk size instead of the length of the deployment.
+
+    Parameters
+    ----------
+    filepath : str or Path
+        Path to the Diver Office or DiverLink CSV export.
+    kind : str, optional
+        The type of the export: "td", "ec", "baro", "diverlink", or "auto" to
+        detect the type from the header. Default is "auto".
+    chunksize : int, optional
+        Maximum number of rows per chunk. Default is 1,000,000.
+    dtype : str or np.dtype, optional
+        Float type the values are parsed to, e.g. "float32" to halve the memory of
+        the chunks. Default is float64.
+
+    Yields
+    ------
+    Timeseries
+        Consecutive chunks with the same columns as the corresponding reader.
+
+    Raises
+    ------
+    ValueError
+        If kind is not valid.
+
+    """
+    if kind == "auto":
+        kind = detect_diver_kind(filepath)
+    if kind not in DIVER_KINDS:
+        raise ValueError(f'Kind not valid, use: "auto", {DIVER_KINDS}.')
+
+    if kind == "diverlink":
+        with _diver_link_csv(filepath, chunksize, dtype) as chunks:
+            for chunk in chunks:
+                yield Timeseries(_diver_link_frame(chunk))
+        return
+
+    columns = _DIVER_OFFICE_COLUMNS[kind]
+    with _diver_office_csv(filepath, columns, chunksize, dtype) as chunks:
+        for chunk in chunks:
+            diver_data = _diver_office_frame(chunk, columns, dtype)
+            if len(diver_data):
+                yield Timeseries(diver_data)
+
+
+_KIND_READERS = {
+    "td": read_td_diver,
+    "ec": read_ec_diver,
+    "baro": read_baro_diver,
+    "diverlink": read_diver_link,
+}
+
+
+def _read_diver_file(filepath, kind: str, dtype=None) -> Timeseries:
+    if kind == "auto":
+        kind = detect_diver_kind(filepath)
+    if dtype is None:
+        return _KIND_READERS[kind](filepath)
+    return _KIND_READERS[kind](filepath, dtype=dtype)
+
+
+def _init_worker(cache_directory, cache_max_size):
+    if cache_directory is not None:
+        cache.enable_cache(cache_directory, cache_max_size)
+
+
+@instrumented
+def read_diver_directory(
+    path,
+    kind: str = "auto",
+    workers: int = None,
+    pattern: str = "*.[cC][sS][vV]",
+    dtype=None,
+) -> tuple[dict[str, Timeseries], dict[str, Exception]]:
+    """
+    Read all diver exports in a directory in parallel.
+
+    Parameters
+    ----------
+    path : str or Path
+        The directory containing the exports.
+    kind : str, optional
+        The type of the exports: "td", "ec", "baro", "diverlink", or "auto" to
+        detect the type of each file from its header. Default is "auto".
+    workers : int, optional
+        Number of worker processes. Default is the number of CPUs, use 1 to read
+        the files in the current process.
+    pattern : str, optional
+        Glob pattern to select the exports. Default is all .CSV files.
+    dtype : str or np.dtype, optional
+        Float type the values are parsed to, e.g. "float32". Default is float64.
+
+    Returns
+    -------
+    tuple[dict[str, Timeseries], dict[str, Exception]]
+        The timeseries and the errors of files that could not be read, both keyed
+        by diver code (the file name without suffix).
+
+    Raises
+    ------
+    ValueError
+        If kind is not valid.
+
+    """
+    if kind != "auto" and kind not in DIVER_KINDS:
+        raise ValueError(f'Kind not valid, use: "auto", {DIVER_KINDS}.')
+
+    files = sorted(Path(path).glob(pattern))
+    workers = workers or os.cpu_count()
+
+    timeseries = {}
+    errors = {}
+    if workers == 1:
+        for filepath in files:
+            try:
+                timeseries[filepath.stem] = _read_diver_file(filepath, kind, dtype)
+            except Exception as e:
+                errors[filepath.stem] = e
+        return timeseries, errors
+
+    active_cache = cache._cache
+    initargs = (
+        (active_cache.directory, active_cache.max_size)
+        if active_cache is not None
+        else (None, None)
+    )
+    with ProcessPoolExecutor(
+        max_workers=min(workers, max(len(files), 1)),
+        initializer=_init_worker,
+        initargs=initargs,
+    ) as executor:
+        futures = {
+            executor.submit(_read_diver_file, filepath, kind, dtype): filepath.stem
+            for filepath in files
+        }
+        for future in as_completed(futures):
+            try:
+                timeseries[futures[future]] = future.result()
+            except Exception as e:
+                errors[futures[future]] = e
+
+    return (
+        {code: timeseries[code] for code in sorted(timeseries)},
+        {code: errors[code] for code in sorted(errors)},
+    )
@@ -0,0 +1,342 @@
+"""
+Batch runner of a project: compensate the diver data of all wells in the metadata
+workbook and export the water levels and figures.
+
+Usage: ddp-run PROJECTDIR [--start 2024-03-01] [--end 2024-06-30] [--workers 4]
+
+By default the project directory holds data/metadata.xlsx, data/BARO.CSV and the
+diver files in data/diver_data; outputs are written to exports. Wells whose inputs
+(diver file, baro file, metadata row and geology sheet) did not change since the
+last run are skipped.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from DiverDataProcessor import processing, readers, shared
+from DiverDataProcessor.base import Geology, ObservationWell, Timeseries
+from DiverDataProcessor.cache import content_hash
+
+FINGERPRINT_VERSION = 1
+MANIFEST = ".ddp-run.json"
+FIGURE_DPI = 150
+
+
+def read_metadata(path) -> tuple[pd.DataFrame, dict[str, pd.DataFrame]]:
+    """
+    Read the metadata workbook once.
+
+    Parameters
+    ----------
+    path : str or Path
+        The workbook with a "metadata" sheet (indexed by Location_ID) and a
+        "geology_<Location_ID>" sheet per well.
+
+    Returns
+    -------
+    tuple[pd.DataFrame, dict[str, pd.DataFrame]]
+        The metadata and the geology per Location_ID.
+
+    """
+    sheets = pd.read_excel(path, sheet_name=None)
+    metadata = sheets.pop("metadata").set_index("Location_ID")
+    geology = {
+        name.removeprefix("geology_"): sheet
+        for name, sheet in sheets.items()
+        if name.startswith("geology_")
+    }
+    return metadata, geology
+
+
+def observation_well_from(metadata_well: pd.Series) -> ObservationWell:
+    """The observation well of a row of the metadata sheet (see read_metadata)."""
+    return ObservationWell(
+        name=metadata_well["Name"],
+        diver_code=metadata_well["Div_code"],
+        surface_level=metadata_well["Elevation_m"],
+        top_well_to_sl=metadata_well["top_of_well_to_sl_cm"] / 100,
+        well_depth=metadata_well["well_depth_cm"] / 100,
+        cable_length=metadata_well["cable_length_cm"] / 100,
+    )
+
+
+def match_well(name: str, wells) -> str | None:
+    """
+    The well a diver file belongs to, from the stem of the file name: the well equal
+    to the stem, else the longest well in the stem that is bounded by separators
+    (not by letters or digits), so "B1_2024.CSV" matches well B1 but not B12.
+    None if no well matches.
+    """
+    wells = [str(well) for well in wells]
+    if name in wells:
+        return name
+    matches = [
+        well
+        for well in wells
+        if re.search(rf"(?<![0-9A-Za-z]){re.escape(well)}(?![0-9A-Za-z])", name)
+    ]
+    return max(matches, key=len) if matches else None
+
+
+def _diver_files(path_divers: Path, wells) -> dict[str, Path]:
+    """The first diver file (sorted by name) of each well, see match_well."""
+    diver_files = {}
+    for path in sorted(path_divers.iterdir()):
+        if path.suffix.lower() != ".csv":
+            continue
+        well = match_well(path.stem, wells)
+        if well is not None:
+            diver_files.setdefault(well, path)
+    return diver_files
+
+
+def fingerprint(*parts) -> str:
+    """Hash of the inputs of a well, see run_project."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([FINGERPRINT_VERSION, *parts], default=str).encode())
+    return digest.hexdigest()
+
+
+def _frame_json(data: pd.DataFrame | pd.Series) -> str:
+    return data.to_json(date_format="iso", default_handler=str)
+
+
+def _load_manifest(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_manifest(path: Path, manifest: dict):
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp_path, path)
+
+
+def _outputs(output_dir: Path, well_id: str, figures: bool) -> list[Path]:
+    outputs = [output_dir / f"{well_id}.csv"]
+    if figures:
+        outputs.append(output_dir / f"{well_id}.png")
+    return outputs
+
+
+def process_well(
+    well_id: str,
+    metadata_well: pd.Series,
+    geology_well: pd.DataFrame,
+    path_diver: Path,
+    baro: Timeseries | shared.SharedTimeseries,
+    start_date: str,
+    end_date: str,
+    output_dir: Path,
+    figures: bool = True,
+) -> list[Path]:
+    """Compensate the diver data of a single well and write its outputs."""
+    diver = readers.read_td_diver(path_diver)
+    diver = diver.reindex_time(start_date, end_date)
+
+    observation_well = observation_well_from(metadata_well)
+    water_level = processing.baro_compensate(
+        shared.attach(baro), diver, None, observation_well, method="cable"
+    )
+
+    path_csv, *path_figure = _outputs(output_dir, well_id, figures)
+    water_level.data.to_csv(path_csv)  # output in meters +datum
+
+    if figures:
+        from DiverDataProcessor.figures.batch import FigureJob, render_figure
+
+        geology = Geology(
+            tops=geology_well["top (cm-sl)"].values / 100,
+            bottoms=geology_well["bottom (cm-sl)"].values / 100,
+            lithology=geology_well["lithology"].str.replace(" ", "_").values,
+            surface_level=metadata_well["Elevation_m"],
+        )
+        job = FigureJob(
+            observation_well,
+            geology,
+            water_level.resample("d")["water_level (m datum)"],
+        )
+        render_figure(job, path_figure[0], dpi=FIGURE_DPI)
+
+    return _outputs(output_dir, well_id, figures)
+
+
+def run_project(
+    path_metadata,
+    path_baro,
+    path_divers,
+    output_dir,
+    start_date: str,
+    end_date: str,
+    workers: int = None,
+    force: bool = False,
+    figures: bool = True,
+) -> tuple[list[str], list[str], dict[str, Exception]]:
+    """
+    Compensate all wells of a project, one task per well on a process pool.
+
+    A fingerprint of the inputs of each well (diver file, baro file, metadata row,
+    geology sheet and date range) is stored in a manifest in the output directory.
+    Wells with an unchanged fingerprint and existing outputs are skipped.
+
+    Parameters
+    ----------
+    path_metadata : str or Path
+        The metadata workbook, see read_metadata.
+    path_baro : str or Path
+        The Baro-Diver file.
+    path_divers : str or Path
+        Directory with the diver files, matched to wells by Location_ID, see
+        match_well.
+    output_dir : str or Path
+        Directory of the water level CSV files, figures and the manifest.
+    start_date, end_date : str
+        The period of the water levels (Y-m-d).
+    workers : int, optional
+        Number of worker processes. Default is the number of CPUs, 1 runs the wells
+        in this process.
+    force : bool, optional
+        Recompute all wells. Default is False.
+    figures : bool, optional
+        Write a figure per well. Default is True.
+
+    Returns
+    -------
+    tuple[list[str], list[str], dict[str, Exception]]
+        The computed wells, the skipped (up to date) wells and the errors of wells
+        that failed.
+
+    """
+    path_divers = Path(path_divers)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path_manifest = output_dir / MANIFEST
+    manifest = _load_manifest(path_manifest)
+
+    metadata, geology = read_metadata(path_metadata)
+    baro_hash = content_hash(path_baro)
+
+    diver_files = _diver_files(path_divers, metadata.index)
+    tasks = {}
+    skipped = []
+    errors = {}
+    for well_id, metadata_well in metadata.iterrows():
+        well_id = str(well_id)
+        path_diver = diver_files.get(well_id)
+        if path_diver is None:
+            errors[well_id] = FileNotFoundError(f"No diver file for {well_id}")
+            continue
+        geology_well = geology.get(well_id)
+        if figures and geology_well is None:
+            errors[well_id] = KeyError(f"No geology sheet for {well_id}")
+            continue
+
+        well_fingerprint = fingerprint(
+            content_hash(path_diver),
+            baro_hash,
+            _frame_json(metadata_well),
+            _frame_json(geology_well) if figures else None,
+            start_date,
+            end_date,
+            figures,
+        )
+        outputs = _outputs(output_dir, well_id, figures)
+        if (
+            not force
+            and manifest.get(well_id) == well_fingerprint
+            and all(p.exists() for p in outputs)
+        ):
+            skipped.append(well_id)
+            continue
+        tasks[well_id] = (
+            (well_id, metadata_well, geology_well, path_diver),
+            well_fingerprint,
+        )
+
+    computed = []
+    if tasks:
+        baro = readers.read_baro_diver(path_baro).reindex_time(start_date, end_date)
+        arguments = (baro, start_date, end_date, output_dir, figures)
+
+        def done(well_id):
+            computed.append(well_id)
+            manifest[well_id] = tasks[well_id][1]
+            _write_manifest(path_manifest, manifest)
+
+        if workers == 1:
+            for well_id, (task, _) in tasks.items():
+                try:
+                    process_well(*task, *arguments)
+                except Exception as e:
+                    errors[well_id] = e
+                else:
+                    done(well_id)
+        else:
+            # the workers map the baro instead of unpickling a copy per well
+            with (
+                shared.SharedTimeseries.publish(baro) as shared_baro,
+                ProcessPoolExecutor(max_workers=workers) as executor,
+            ):
+                arguments = (shared_baro, *arguments[1:])
+                futures = {
+                    executor.submit(process_well, *task, *arguments): well_id
+                    for well_id, (task, _) in tasks.items()
+                }
+                for future in as_completed(futures):
+                    well_id = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        errors[well_id] = e
+                    else:
+                        done(well_id)
+
+    return sorted(computed), sorted(skipped), dict(sorted(errors.items()))
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="ddp-run", description="Compensate the diver data of all project wells."
+    )
+    parser.add_argument("projectdir", type=Path, help="The project directory.")
+    parser.add_argument("--start", required=True, help="Start date (Y-m-d).")
+    parser.add_argument("--end", required=True, help="End date (Y-m-d).")
+    parser.add_argument("--metadata", type=Path, help="data/metadata.xlsx")
+    parser.add_argument("--baro", type=Path, help="data/BARO.CSV")
+    parser.add_argument("--divers", type=Path, help="data/diver_data")
+    parser.add_argument("--output", type=Path, help="exports")
+    parser.add_argument("--workers", type=int, help="Number of worker processes.")
+    parser.add_argument("--force", action="store_true", help="Recompute all wells.")
+    parser.add_argument("--no-figures", action="store_true", help="Skip figures.")
+    args = parser.parse_args(argv)
+
+    data = args.projectdir / "data"
+    computed, skipped, errors = run_project(
+        args.metadata or data / "metadata.xlsx",
+        args.baro or data / "BARO.CSV",
+        args.divers or data / "diver_data",
+        args.output or args.projectdir / "exports",
+        args.start,
+        args.end,
+        workers=args.workers,
+        force=args.force,
+        figures=not args.no_figures,
+    )
+    print(f"computed: {len(computed)}, up to date: {len(skipped)}")
+    for well_id, error in errors.items():
+        print(f"failed: {well_id}: {error!r}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
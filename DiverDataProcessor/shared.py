@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from DiverDataProcessor.base import CompactTimeseries, Timeseries
+
+SHARED_MEMORY_DIRECTORY = "/dev/shm"  # RAM backed, where available
+METADATA = "timeseries.json"
+
+
+def _default_directory() -> Path:
+    directory = (
+        SHARED_MEMORY_DIRECTORY if os.path.isdir(SHARED_MEMORY_DIRECTORY) else None
+    )
+    return Path(tempfile.mkdtemp(prefix="ddp-shared-", dir=directory))
+
+
+class SharedTimeseries:
+    """
+    A read-only Timeseries published once as memory-mapped .npy files, to share
+    e.g. the barometric pressure of a project between worker processes.
+
+    Pickling a SharedTimeseries only pickles its path. Each process maps the files
+    on first access of the timeseries property, without copying: all processes read
+    the same pages of the page cache, so the memory of N workers stays close to a
+    single copy. The files are written to /dev/shm by default, which is held in
+    memory.
+
+    Attributes:
+    -----------
+    path : Path
+        The directory of the times, values and metadata files.
+    columns : list[str]
+        The column names.
+    dtype : np.dtype
+        The dtype of the values.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        metadata = json.loads((self.path / METADATA).read_text())
+        self.columns = metadata["columns"]
+        self.dtype = np.dtype(metadata["dtype"])
+        self._index_name = metadata["index_name"]
+        self._tz = metadata["tz"]
+        self._timeseries = None
+        self._owner = False
+
+    @classmethod
+    def publish(
+        cls, timeseries: Timeseries, path=None, dtype=None
+    ) -> "SharedTimeseries":
+        """
+        Write a timeseries once, to be attached to by other processes.
+
+        Parameters
+        ----------
+        timeseries : Timeseries
+            The timeseries with a DatetimeIndex.
+        path : str or Path, optional
+            The directory of the files, it is created if it does not exist. Default
+            is a new temporary directory in /dev/shm.
+        dtype : optional
+            The dtype of the values. Default is the common dtype of the columns.
+
+        Returns
+        -------
+        SharedTimeseries
+            The published timeseries, its files are removed by unlink or at the end
+            of a with block.
+
+        """
+        data = timeseries.data
+        if dtype is None:
+            dtype = np.result_type(*data.dtypes) if len(data.columns) else np.float64
+        compact = CompactTimeseries(data, dtype)
+
+        path = _default_directory() if path is None else Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "times.npy", compact.times)
+        np.save(path / "values.npy", compact.values)
+        metadata = {
+            "columns": compact.columns,
+            "dtype": compact.dtype.str,
+            "index_name": compact._index_name,
+            "tz": None if compact._tz is None else str(compact._tz),
+        }
+        (path / METADATA).write_text(json.dumps(metadata))
+
+        shared = cls(path)
+        shared._owner = True
+        return shared
+
+    @property
+    def timeseries(self) -> CompactTimeseries:
+        """The timeseries as read-only views of the memory-mapped files."""
+        if self._timeseries is None:
+            timeseries = object.__new__(CompactTimeseries)
+            timeseries.dtype = self.dtype
+            timeseries.times = np.load(self.path / "times.npy", mmap_mode="r")
+            timeseries.values = np.load(self.path / "values.npy", mmap_mode="r")
+            timeseries.columns = list(self.columns)
+            timeseries._index_name = self._index_name
+            timeseries._tz = self._tz
+            self._timeseries = timeseries
+        return self._timeseries
+
+    def unlink(self):
+        """
+        Remove the files, if this process published them. Processes that already
+        mapped the files can still read them.
+        """
+        self._timeseries = None
+        if self._owner:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._owner = False
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_timeseries"] = None
+        state["_owner"] = False
+        return state
+
+    def __enter__(self) -> "SharedTimeseries":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unlink()
+
+    def __repr__(self) -> str:
+        return f"SharedTimeseries({str(self.path)!r}, columns={self.columns})"
+
+
+def attach(timeseries: Timeseries | SharedTimeseries) -> Timeseries:
+    """The timeseries of a SharedTimeseries, other timeseries are returned as is."""
+    if isinstance(timeseries, SharedTimeseries):
+        return timeseries.timeseries
+    return timeseries
@@ -0,0 +1,448 @@
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from DiverDataProcessor import export, processing
+from DiverDataProcessor.base import HandReading, ObservationWell, Timeseries
+from DiverDataProcessor.pyramid import STATS, AggregatePyramid, coarsest_level
+
+BARO = "baro"  # the well name of the stored barometric pressure
+
+
+def _empty_water_level() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"water_level (m datum)": []}, index=pd.DatetimeIndex([], name="date")
+    )
+
+
+def _check_compensation(
+    index: pd.DatetimeIndex,
+    handreading: HandReading | Iterable[HandReading],
+    method: str,
+    kwargs: dict,
+):
+    # checked before anything is stored
+    if kwargs.get("return_residuals"):
+        raise ValueError("Residuals of hand readings are not returned by the store.")
+    if method != "handreading" or len(index) == 0:
+        return
+    if isinstance(handreading, HandReading):
+        handreading = [handreading]
+    datetimes = [h.datetime for h in handreading or []]
+    if not datetimes:
+        raise ValueError('No hand readings for the "handreading" method.')
+    start, end = index.min(), index.max()
+    outside = [datetime for datetime in datetimes if not start <= datetime <= end]
+    if outside:
+        raise ValueError(
+            f"Hand reading(s) outside the samples ({start} to {end}): {outside}."
+        )
+
+
+def _empty_conflicts() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"column": pd.Series(dtype=str), "stored": [], "new": []},
+        index=pd.DatetimeIndex([], name="date"),
+    )
+
+
+class DiverStore:
+    """
+    Incremental store of the diver data and water levels of a project, persisted
+    as Parquet datasets partitioned by well and year (see export.write_timeseries)
+    in the raw and water_level subdirectories of the root.
+
+    New downloads are merged into the persisted record of a well: samples after the
+    last stored sample are appended, samples within the overlap are de-duplicated
+    against the stored samples and only the overlap window is read back. The cost
+    of an update therefore scales with the new download, not with the history.
+
+    An aggregate pyramid (see pyramid.AggregatePyramid) of the diver data and the
+    water levels of each well is kept up to date in the pyramid subdirectory.
+
+    Attributes:
+    -----------
+    root : Path
+        The root directory of the store.
+    tolerance : float
+        Maximum absolute difference of a sample that was downloaded twice. Larger
+        differences are reported as conflicts, the stored value is kept.
+    """
+
+    def __init__(self, root, tolerance: float = 1e-6):
+        self.root = Path(root)
+        self.tolerance = tolerance
+
+    @property
+    def raw(self) -> Path:
+        return self.root / "raw"
+
+    @property
+    def water_level(self) -> Path:
+        return self.root / "water_level"
+
+    @property
+    def conflicts(self) -> Path:
+        return self.root / "conflicts"
+
+    @property
+    def baro(self) -> Path:
+        return self.root / "baro"
+
+    def _pyramid_directory(self, dataset: str, well: str) -> Path:
+        return export._well_directory(self.root / "pyramid" / dataset, well)
+
+    def read_pyramid(
+        self, well: str, dataset: str = "water_level"
+    ) -> AggregatePyramid | None:
+        """The aggregate pyramid of a well ("raw" or "water_level") if stored."""
+        return AggregatePyramid.read_parquet(self._pyramid_directory(dataset, well))
+
+    def query(
+        self,
+        well: str,
+        start=None,
+        end=None,
+        freq: str = "D",
+        stats=STATS,
+        dataset: str = "water_level",
+    ) -> pd.DataFrame | None:
+        """Aggregates of a well from its pyramid, see AggregatePyramid.query."""
+        pyramid = self.read_pyramid(well, dataset)
+        if pyramid is None:
+            return None
+        return pyramid.query(start, end, freq, stats)
+
+    def resample(
+        self,
+        well: str,
+        freq: str = "D",
+        start=None,
+        end=None,
+        dataset: str = "water_level",
+    ) -> Timeseries | None:
+        """
+        The mean per bin of a well, e.g. to plot a long record. Resolutions of an
+        hour or coarser are answered from the pyramid without reading the samples,
+        finer resolutions are resampled from the stored samples. Bins are closed and
+        labelled on the left, as in the pyramid. None if the well is not stored.
+        """
+        try:
+            coarsest_level(freq)
+        except ValueError:
+            pyramid = None
+        else:
+            pyramid = self.read_pyramid(well, dataset)
+        if pyramid is not None:
+            return pyramid.resample(freq, start, end)
+
+        stored = export.read_timeseries(self.root / dataset, well, start, end).get(well)
+        if stored is None:
+            return None
+        means = stored.data.resample(freq, closed="left", label="left").mean()
+        return Timeseries(means)
+
+    def _update_pyramid(self, dataset: str, well: str, appended: pd.DataFrame):
+        if appended.empty:
+            return
+        pyramid = self.read_pyramid(well, dataset)
+        first = appended.index[0]
+        if pyramid is None:
+            stored = export.read_timeseries(self.root / dataset, well).get(well)
+            pyramid = AggregatePyramid.build(stored.data)
+        elif first > pyramid.last:
+            pyramid.update(appended)
+        else:
+            start = pyramid.rebuild_start(first)
+            stored = export.read_timeseries(self.root / dataset, well, start).get(well)
+            pyramid.rebuild(stored.data, first)
+        pyramid.to_parquet(self._pyramid_directory(dataset, well))
+
+    def last_timestamp(self, well: str) -> pd.Timestamp | None:
+        """The last stored sample of a well, None if the well is not stored."""
+        return export.last_timestamp(self.raw, well)
+
+    def read(self, well: str, start=None, end=None) -> Timeseries | None:
+        """Read the stored diver data of a well, None if the well is not stored."""
+        return export.read_timeseries(self.raw, well, start, end).get(well)
+
+    def read_water_level(self, well: str, start=None, end=None) -> Timeseries | None:
+        """Read the stored water levels of a well, None if the well is not stored."""
+        return export.read_timeseries(self.water_level, well, start, end).get(well)
+
+    def read_baro(self, start=None, end=None) -> Timeseries | None:
+        """Read the stored barometric pressure, None if no baro is stored."""
+        return export.read_timeseries(self.baro, BARO, start, end).get(BARO)
+
+    def append_baro(self, baro: Timeseries) -> Timeseries:
+        """
+        Merge barometric pressure into the stored baro, e.g. a new Baro-Diver
+        download. Samples that are already stored are kept, as are the first of
+        samples with the same timestamp.
+
+        Returns
+        -------
+        Timeseries
+            The samples that were not stored yet.
+
+        """
+        new = baro.data.sort_index(kind="stable")
+        new = new[~new.index.duplicated(keep="first")].rename_axis("date")
+        if len(new):
+            stored = self.read_baro(new.index[0], new.index[-1])
+            if stored is not None:
+                new = new[~new.index.isin(stored.data.index)]
+        export.write_timeseries(Timeseries(new), self.baro, BARO)
+        return Timeseries(new)
+
+    def read_conflicts(self, well: str) -> pd.DataFrame:
+        """All conflicts that were found while appending to a well."""
+        conflicts = export.read_timeseries(self.conflicts, well).get(well)
+        return conflicts.data if conflicts is not None else _empty_conflicts()
+
+    def _compare(
+        self, overlap: pd.DataFrame, stored: pd.DataFrame
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Split the overlap into samples missing in the store, and conflicts."""
+        if list(overlap.columns) != list(stored.columns):
+            raise ValueError(
+                f"Columns of the new data {list(overlap.columns)} do not match the "
+                f"stored columns {list(stored.columns)}."
+            )
+        duplicated = overlap.index.isin(stored.index)
+        return overlap[~duplicated], self._differences(overlap[duplicated], stored)
+
+    def _differences(self, new: pd.DataFrame, stored: pd.DataFrame) -> pd.DataFrame:
+        """The conflicts of samples that are also in stored (a unique index)."""
+        old = stored.reindex(new.index)
+        differs = ~np.isclose(
+            new.to_numpy(dtype=float),
+            old.to_numpy(dtype=float),
+            atol=self.tolerance,
+            rtol=0.0,
+            equal_nan=True,
+        )
+        rows, columns = np.nonzero(differs)
+        return pd.DataFrame(
+            {
+                "column": new.columns[columns],
+                "stored": old.to_numpy(dtype=float)[rows, columns],
+                "new": new.to_numpy(dtype=float)[rows, columns],
+            },
+            index=new.index[rows],
+        )
+
+    def append(
+        self, well: str, timeseries: Timeseries
+    ) -> tuple[Timeseries, pd.DataFrame]:
+        """
+        Merge a new download into the stored diver data of a well.
+
+        Samples of the download with the same timestamp are de-duplicated first,
+        keeping the first sample in the order of the download. Dropped samples with
+        a different value are reported as conflicts as well, with the kept value as
+        the stored value.
+
+        Parameters
+        ----------
+        well : str
+            The well (or diver code).
+        timeseries : Timeseries
+            The new download, e.g. from readers.read_td_diver.
+
+        Returns
+        -------
+        tuple[Timeseries, pd.DataFrame]
+            The samples that were not stored yet, and the conflicting samples
+            (date, column, stored and new value). The stored values are kept.
+
+        Raises
+        ------
+        ValueError
+            If the columns do not match the stored columns.
+
+        """
+        new = timeseries.data.sort_index(kind="stable")
+        duplicated = new.index.duplicated(keep="first")
+        conflicts = _empty_conflicts()
+        if duplicated.any():
+            conflicts = self._differences(new[duplicated], new[~duplicated])
+            new = new[~duplicated]
+
+        last = self.last_timestamp(well)
+        if last is None:
+            appended = new
+        else:
+            split = new.index.searchsorted(last, side="right")
+            overlap, tail = new.iloc[:split], new.iloc[split:]
+            missing = overlap.iloc[:0]
+            if len(overlap):
+                stored = self.read(well, overlap.index[0], last)
+                if stored is None:
+                    missing = overlap
+                else:
+                    missing, stored_conflicts = self._compare(overlap, stored.data)
+                    if len(conflicts):
+                        conflicts = pd.concat([conflicts, stored_conflicts])
+                        conflicts = conflicts.sort_index(kind="stable")
+                    else:
+                        conflicts = stored_conflicts
+            appended = pd.concat([missing, tail])
+
+        appended = appended.rename_axis("date")
+        export.write_timeseries(Timeseries(appended), self.raw, well)
+        self._update_pyramid("raw", well, appended)
+        if len(conflicts):
+            export.write_timeseries(Timeseries(conflicts), self.conflicts, well)
+        return Timeseries(appended), conflicts
+
+    def update(
+        self,
+        well: str,
+        diver: Timeseries,
+        baro: Timeseries,
+        handreading: HandReading | Iterable[HandReading],
+        observation_well: ObservationWell,
+        method: str = "cable",
+        **kwargs,
+    ) -> tuple[Timeseries, pd.DataFrame]:
+        """
+        Merge a new download into the store and compensate only the new samples.
+        Only the water levels that could be computed are stored, samples that the
+        baro does not cover yet can be compensated later, see compensate.
+
+        Parameters
+        ----------
+        well : str
+            The well (or diver code).
+        diver : Timeseries
+            The new download.
+        baro, handreading, observation_well, method, **kwargs
+            See processing.baro_compensate, return_residuals is not supported. With
+            method "handreading", the hand reading(s) must be within the download.
+
+        Returns
+        -------
+        tuple[Timeseries, pd.DataFrame]
+            The water levels of the new samples (NaN where they could not be
+            computed), and the conflicting samples.
+
+        Raises
+        ------
+        ValueError
+            If return_residuals is given, or with method "handreading" if there are
+            no hand readings or one is outside the download. The download is not
+            stored then.
+
+        """
+        _check_compensation(diver.data.index, handreading, method, kwargs)
+        appended, conflicts = self.append(well, diver)
+        samples = appended.data
+        if method == "handreading" and len(samples):
+            # the hand readings may be in the overlap with the stored samples
+            index = diver.data.index
+            samples = self.read(well, index.min(), index.max()).data
+        water_level = self._compensate_samples(
+            well,
+            samples,
+            appended.data.index,
+            baro,
+            handreading,
+            observation_well,
+            method,
+            **kwargs,
+        )
+        return water_level, conflicts
+
+    def compensate(
+        self,
+        well: str,
+        baro: Timeseries,
+        handreading: HandReading | Iterable[HandReading],
+        observation_well: ObservationWell,
+        method: str = "cable",
+        start=None,
+        end=None,
+        **kwargs,
+    ) -> Timeseries:
+        """
+        Compensate the stored samples of a well that have no stored water level
+        yet, e.g. samples received before the baro covered them. Stored water
+        levels are not recomputed.
+
+        Parameters
+        ----------
+        well : str
+            The well (or diver code).
+        baro, handreading, observation_well, method, **kwargs
+            See update.
+        start, end : str or pd.Timestamp, optional
+            The period of the samples (inclusive). Default is all samples.
+
+        Returns
+        -------
+        Timeseries
+            The water levels of the samples without a stored water level, NaN where
+            they still could not be computed.
+
+        Raises
+        ------
+        ValueError
+            If return_residuals is given, or with method "handreading" if there are
+            no hand readings or one is outside the stored samples of the period.
+
+        """
+        stored = self.read(well, start, end)
+        if stored is None:
+            return Timeseries(_empty_water_level())
+        samples = stored.data
+        _check_compensation(samples.index, handreading, method, kwargs)
+        missing = samples.index
+        water_level = self.read_water_level(well, start, end)
+        if water_level is not None:
+            missing = missing[~missing.isin(water_level.data.index)]
+        if method != "handreading":
+            samples = samples.loc[missing]
+        return self._compensate_samples(
+            well,
+            samples,
+            missing,
+            baro,
+            handreading,
+            observation_well,
+            method,
+            **kwargs,
+        )
+
+    def _compensate_samples(
+        self,
+        well: str,
+        samples: pd.DataFrame,
+        index: pd.DatetimeIndex,
+        baro: Timeseries,
+        handreading: HandReading | Iterable[HandReading],
+        observation_well: ObservationWell,
+        method: str,
+        **kwargs,
+    ) -> Timeseries:
+        """Compensate the samples and store the water levels of those in index."""
+        if len(index) == 0:
+            return Timeseries(_empty_water_level())
+
+        # only the baro data the alignment can match to the samples is aligned
+        baro = processing.select_baro(
+            baro,
+            samples.index[0],
+            samples.index[-1],
+            kwargs.get("alignment", "exact"),
+        )
+        water_level = processing.baro_compensate(
+            baro, Timeseries(samples), handreading, observation_well, method, **kwargs
+        )
+        water_level = Timeseries(water_level.data.reindex(index))
+        computed = water_level.data.dropna(how="all")
+        export.write_timeseries(Timeseries(computed), self.water_level, well)
+        self._update_pyramid("water_level", well, computed)
+        return water_level
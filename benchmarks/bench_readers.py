@@ -0,0 +1,65 @@
+"""
+Compare the single-pass Diver Office reader with the previous python-engine reader
+on a synthetic TD-Diver export.
+
+Usage: python benchmarks/bench_readers.py [n_rows]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import synthetic
+
+from DiverDataProcessor import readers
+
+HEADER_LINES = 52
+
+
+def read_td_diver_python_engine(filepath) -> pd.DataFrame:
+    diver_data = pd.read_csv(
+        filepath,
+        usecols=[0, 1, 2],
+        names=["date", "diver_pressure (cmH2O)", "temperature (degC)"],
+        decimal=",",
+        skiprows=HEADER_LINES,
+        delimiter=";",
+        encoding="ISO-8859-1",
+        engine="python",
+    )
+    diver_data = diver_data[:-1].replace("     ", np.nan)
+    diver_data["diver_pressure (mH2O)"] = (
+        pd.to_numeric(diver_data["diver_pressure (cmH2O)"]) / 100
+    )
+    diver_data = diver_data.drop(columns=["diver_pressure (cmH2O)"])
+    diver_data["temperature (degC)"] = pd.to_numeric(diver_data["temperature (degC)"])
+    diver_data["date"] = pd.to_datetime(diver_data["date"], format="%Y/%m/%d %H:%M:%S")
+    return diver_data.set_index("date")
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(n_rows: int = 10_000_000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "SYNTHETIC_TD.CSV"
+        synthetic.write_diver_office(path, "td", n_rows)
+
+        new, t_new = timed(readers.read_td_diver, path)
+        old, t_old = timed(read_td_diver_python_engine, path)
+
+    pd.testing.assert_frame_equal(new.data, old, check_names=False)
+    print(f"rows: {n_rows}")
+    print(f"python engine : {t_old:8.2f} s")
+    print(f"single pass   : {t_new:8.2f} s")
+    print(f"speedup       : {t_old / t_new:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
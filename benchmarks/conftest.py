@@ -0,0 +1,62 @@
+"""
+Benchmark suite, run with pytest-benchmark:
+
+    pytest benchmarks --bench-rows 10000,1000000 --benchmark-autosave \
+        --benchmark-storage benchmarks/results
+
+or `pixi run bench`. Results are stored as JSON in benchmarks/results and can be
+compared with `pytest-benchmark --storage benchmarks/results compare`. Benchmarks
+are not part of the default test run.
+"""
+
+import matplotlib
+import pytest
+import synthetic
+
+matplotlib.use("Agg")
+
+DEFAULT_ROWS = "10000,100000"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--bench-rows",
+        default=DEFAULT_ROWS,
+        help="Comma separated numbers of rows of the synthetic files (10k to 50M).",
+    )
+    parser.addoption(
+        "--bench-rounds", type=int, default=3, help="Rounds of each benchmark."
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "n_rows" in metafunc.fixturenames:
+        rows = [int(n) for n in metafunc.config.getoption("bench_rows").split(",")]
+        metafunc.parametrize("n_rows", rows, ids=[f"{n}rows" for n in rows])
+
+
+@pytest.fixture(scope="session")
+def rounds(request):
+    return request.config.getoption("bench_rounds")
+
+
+@pytest.fixture(scope="session")
+def synthetic_files(tmp_path_factory):
+    """Write each synthetic file once per session, keyed by (kind, n_rows)."""
+    directory = tmp_path_factory.mktemp("synthetic")
+    files = {}
+
+    def get(kind: str, n_rows: int):
+        key = (kind, n_rows)
+        if key not in files:
+            path = directory / f"{kind.upper()}_{n_rows}.CSV"
+            if kind == "diverlink":
+                synthetic.write_diver_link(path, n_rows)
+            elif kind == "precipitation":
+                synthetic.write_precipitation(path, max(n_rows // 1440, 1))
+            else:
+                synthetic.write_diver_office(path, kind, n_rows)
+            files[key] = path
+        return files[key]
+
+    return get
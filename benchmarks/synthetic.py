@@ -0,0 +1,228 @@
+"""
+Generators for realistic synthetic Diver Office (TD, EC, Baro) and DiverLink exports,
+including the header block, blank values and the footer line.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DIVER_OFFICE_FOOTER = "END OF DATA FILE OF DATALOGGER FOR WINDOWS"
+DIVER_OFFICE_NODATA = "     "
+
+_INSTRUMENTS = {
+    "td": ("TD-Diver=19", ["PRESSURE", "TEMPERATURE"]),
+    "ec": ("CTD-Diver=20", ["PRESSURE", "TEMPERATURE", "2: SPEC.COND."]),
+    "baro": ("Baro-Diver=27", ["PRESSURE", "TEMPERATURE"]),
+}
+
+_CHANNEL_SETTINGS = {
+    "PRESSURE": [
+        "  Reference level         =400,000   cm",
+        "  Range                   =1750,000  cm",
+        "  Master level            =400       CMH2O",
+        "  Altitude                =0         m",
+    ],
+    "TEMPERATURE": [
+        "  Reference level         =-20,000   °C",
+        "  Range                   =100,000   °C",
+    ],
+    "2: SPEC.COND.": [
+        "  Reference level         =0,000     mS/cm",
+        "  Range                   =120,000   mS/cm",
+        "  Temperature compensation=25        °C",
+        "  Unit                    =mS/cm",
+    ],
+}
+
+_COLUMN_HEADERS = {
+    "PRESSURE": "Pressure[cmH2O]",
+    "TEMPERATURE": "Temperature[°C]",
+    "2: SPEC.COND.": "2: Spec.cond.[mS/cm]",
+}
+
+
+def _channel_blocks(channels: list[str], suffix: str = "") -> list[str]:
+    lines = []
+    for number, channel in enumerate(channels, start=1):
+        lines.append(f"[Channel {number}{suffix}]")
+        lines.append(f"  Identification          ={channel}")
+        lines += _CHANNEL_SETTINGS[channel]
+    return lines
+
+
+def diver_office_header(kind: str, location: str, start, end) -> list[str]:
+    """The header block of a Diver Office export, up to the column header line."""
+    instrument, channels = _INSTRUMENTS[kind]
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end)
+    lines = [
+        "Data file for DataLogger.",
+        "=" * 78,
+        "COMPANY    : <Company name>",
+        "COMP.STATUS: Not Appl.",
+        "DATE       : ",
+        "TIME       :",
+        f"FILENAME   : {location}.CSV",
+        "CREATED BY : Diver-Office 12.0.3.0",
+        "==========================    BEGINNING OF DATA     ==========================",
+        "[Logger settings]",
+        f"  Instrument type         ={instrument}",
+        "  Status                  =Started =0",
+        "  Serial number           =..00-XX000  219.",
+        "  Instrument number       =UTC+1",
+        "                          =0",
+        f"  Location                ={location}",
+        "  Sample period           =M01",
+        "  Sample method           =T",
+        f"  Number of channels      ={len(channels)}",
+    ]
+    lines += _channel_blocks(channels)
+    lines += ["", ""]
+    lines += [
+        "[Series settings]",
+        "  Serial number           =..00-XX000  219.",
+        "  Instrument number       =UTC+1",
+        f"  Location                ={location}",
+        "  Sample period           =00 00:01:00 0",
+        "  Sample method           =T",
+        f"  Start date / time       ={start:%H:%M:%S %d-%m-%y}",
+        f"  End date / time         ={end:%H:%M:%S %d-%m-%y}",
+    ]
+    lines += _channel_blocks(channels, " from data header")
+    lines += ["", ""]
+    lines.append(";".join(["Date/time", *(_COLUMN_HEADERS[c] for c in channels)]))
+    return lines
+
+
+def _synthetic_values(
+    kind: str, n_rows: int, blank_fraction: float, rng: np.random.Generator
+) -> dict[str, np.ndarray]:
+    minutes = np.arange(n_rows)
+    daily = np.sin(2 * np.pi * minutes / 1440)
+    if kind == "baro":
+        pressure = 1030.0 + 8.0 * daily + np.cumsum(rng.normal(0.0, 0.02, n_rows))
+    else:
+        pressure = 1150.0 + 2.0 * daily + np.cumsum(rng.normal(0.0, 0.01, n_rows))
+    values = {
+        "pressure": pressure,
+        "temperature": 12.0 + 0.5 * daily + rng.normal(0.0, 0.01, n_rows),
+    }
+    if kind == "ec":
+        values["conductivity"] = 0.8 + rng.normal(0.0, 0.005, n_rows)
+
+    for column in values.values():
+        column[rng.random(n_rows) < blank_fraction] = np.nan
+    return values
+
+
+def write_diver_office(
+    path,
+    kind: str = "td",
+    n_rows: int = 10_000,
+    freq: str = "1min",
+    start: str = "2020-01-01",
+    blank_fraction: float = 0.001,
+    seed: int = 0,
+) -> Path:
+    """
+    Write a synthetic Diver Office export.
+
+    Parameters
+    ----------
+    path : str or Path
+        The file to write.
+    kind : str, optional
+        "td", "ec" or "baro". Default is "td".
+    n_rows : int, optional
+        Number of samples. Default is 10,000.
+    freq : str, optional
+        Sample interval. Default is "1min".
+    start : str, optional
+        Time of the first sample. Default is "2020-01-01".
+    blank_fraction : float, optional
+        Fraction of values written as blanks. Default is 0.001.
+    seed : int, optional
+        Seed of the random generator. Default is 0.
+
+    Returns
+    -------
+    Path
+        The written file.
+
+    """
+    path = Path(path)
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n_rows, freq=freq)
+    data = pd.DataFrame(
+        _synthetic_values(kind, n_rows, blank_fraction, rng), index=index
+    )
+
+    header = diver_office_header(kind, path.stem, index[0], index[-1])
+    with open(path, "w", encoding="ISO-8859-1", newline="\n") as f:
+        f.write("\n".join(header) + "\n")
+        data.to_csv(
+            f,
+            sep=";",
+            decimal=",",
+            header=False,
+            float_format="%.3f",
+            na_rep=DIVER_OFFICE_NODATA,
+            date_format="%Y/%m/%d %H:%M:%S",
+            lineterminator="\n",
+        )
+        f.write(DIVER_OFFICE_FOOTER + "\n")
+    return path
+
+
+def write_diver_link(
+    path,
+    n_rows: int = 10_000,
+    freq: str = "1min",
+    start: str = "2020-01-01",
+    seed: int = 0,
+) -> Path:
+    """Write a synthetic DiverLink export, see write_diver_office for the parameters."""
+    path = Path(path)
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n_rows, freq=freq)
+    values = _synthetic_values("td", n_rows, 0.0, rng)
+    data = pd.DataFrame(
+        {
+            "Battery (%)": 100.0 - np.arange(n_rows) / max(n_rows, 1),
+            "Temperature (°C)": values["temperature"],
+            "Pressure (cmH2O)": values["pressure"],
+        },
+        index=pd.Index(index, name="Date and time (UTC-06:00)"),
+    )
+    data.to_csv(
+        path,
+        float_format="%.3f",
+        date_format="%d/%m/%Y %H:%M:%S",
+        lineterminator="\n",
+    )
+    return path
+
+
+def write_precipitation(
+    path, n_days: int = 365, start: str = "2020-01-01", seed: int = 0
+) -> Path:
+    """Write a synthetic daily precipitation file as read by read_precipitation."""
+    path = Path(path)
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n_days, freq="D", name="date")
+    wet = rng.random(n_days) < 0.4
+    data = pd.DataFrame(
+        {"precipitation": np.where(wet, rng.gamma(0.8, 6.0, n_days), 0.0)},
+        index=index,
+    )
+    data.to_csv(
+        path,
+        sep=";",
+        decimal=",",
+        float_format="%.1f",
+        date_format="%d-%m-%Y",
+        lineterminator="\n",
+    )
+    return path
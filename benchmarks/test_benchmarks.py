@@ -0,0 +1,104 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from DiverDataProcessor import base, processing, readers
+from DiverDataProcessor.figures.visualisations import GeologyGroundwater
+
+
+@pytest.fixture
+def td_diver(synthetic_files, n_rows):
+    return readers.read_td_diver(synthetic_files("td", n_rows))
+
+
+@pytest.fixture
+def baro_diver(synthetic_files, n_rows):
+    return readers.read_baro_diver(synthetic_files("baro", n_rows))
+
+
+@pytest.fixture
+def observation_well():
+    return base.ObservationWell("B01", "B01", 1.0, 0.0, 12.0, cable_length=6.0)
+
+
+@pytest.mark.parametrize(
+    "kind, reader",
+    [
+        ("td", readers.read_td_diver),
+        ("ec", readers.read_ec_diver),
+        ("baro", readers.read_baro_diver),
+        ("diverlink", readers.read_diver_link),
+        ("precipitation", readers.read_precipitation),
+    ],
+)
+def test_read(benchmark, synthetic_files, rounds, n_rows, kind, reader):
+    path = synthetic_files(kind, n_rows)
+    result = benchmark.pedantic(reader, args=(path,), rounds=rounds)
+    assert len(result.data)
+
+
+def test_iter_diver_chunks(benchmark, synthetic_files, rounds, n_rows):
+    path = synthetic_files("td", n_rows)
+
+    def read_chunks():
+        return sum(len(chunk.data) for chunk in readers.iter_diver_chunks(path))
+
+    assert benchmark.pedantic(read_chunks, rounds=rounds) == n_rows
+
+
+def test_baro_compensate(
+    benchmark, rounds, td_diver, baro_diver, observation_well, n_rows
+):
+    handreading = base.HandReading(td_diver.data.index[n_rows // 2], 0.8)
+    result = benchmark.pedantic(
+        processing.baro_compensate,
+        args=(baro_diver, td_diver, handreading, observation_well),
+        kwargs={"method": "handreading"},
+        rounds=rounds,
+    )
+    assert len(result.data) == n_rows
+
+
+def test_reindex_time(benchmark, rounds, td_diver):
+    start, end = td_diver.data.index[[0, -1]].strftime("%Y-%m-%d")
+    result = benchmark.pedantic(
+        td_diver.reindex_time, args=(start, end), kwargs={"freq": "h"}, rounds=rounds
+    )
+    assert len(result.data)
+
+
+def test_resample(benchmark, rounds, td_diver):
+    result = benchmark.pedantic(td_diver.resample, args=("D",), rounds=rounds)
+    assert len(result.data)
+
+
+@pytest.mark.parametrize(
+    "detectors",
+    [{}, {"window": 11, "max_rate": 0.5, "min_flat": 30}],
+    ids=["sigma", "detectors"],
+)
+def test_remove_outliers(benchmark, rounds, td_diver, detectors):
+    def setup():
+        return (base.Timeseries(td_diver.data.copy()),), {}
+
+    benchmark.pedantic(
+        lambda timeseries: timeseries.remove_outliers(**detectors),
+        setup=setup,
+        rounds=rounds,
+    )
+
+
+def test_plot_water_level(benchmark, rounds, td_diver, observation_well):
+    water_level = td_diver.data["diver_pressure (mH2O)"]
+    geology = base.Geology(
+        1.0, np.array([0.0, 5.0]), np.array([5.0, 12.0]), ["clay", "sand"]
+    )
+
+    def plot():
+        figure = GeologyGroundwater(observation_well, figsize=(10, 5))
+        figure.plot_geology(geology, "m NAP")
+        figure.plot_water_level(water_level, "m NAP")
+        figure.fig.canvas.draw()
+        plt.close(figure.fig)
+
+    benchmark.pedantic(plot, rounds=rounds)
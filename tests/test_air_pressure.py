@@ -0,0 +1,98 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from DiverDataProcessor import readers
+
+
+class NoaaHandler(BaseHTTPRequestHandler):
+    """Stand-in of the NOAA data service, hourly records up to the end date."""
+
+    requests = []
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        self.requests.append((query["startDate"], query["endDate"]))
+        dates = pd.date_range(
+            query["startDate"],
+            pd.Timestamp(query["endDate"]) + pd.Timedelta("23h"),
+            freq="h",
+        )
+        records = [
+            {
+                "DATE": f"{date:%Y-%m-%dT%H:53:00}",
+                "REPORT_TYPE": "FM-15",
+                "SLP": f"{10000 + date.dayofyear},{date.hour % 10}",
+            }
+            for date in dates
+        ]
+        body = json.dumps(records).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def noaa():
+    NoaaHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), NoaaHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/data/v1", NoaaHandler.requests
+    server.shutdown()
+
+
+@pytest.mark.integrationtest
+def test_fetch_air_pressure_cache(noaa, tmp_path):
+    url, requests = noaa
+
+    def fetch(start_date, end_date, **kwargs):
+        return readers.fetch_air_pressure(
+            "STATION", start_date, end_date, cache_directory=tmp_path, url=url, **kwargs
+        ).data
+
+    data = fetch("2020-01-15", "2020-03-10")
+    assert sorted(requests) == [
+        ("2020-01-01", "2020-02-01"),
+        ("2020-02-01", "2020-03-01"),
+        ("2020-03-01", "2020-04-01"),
+    ]
+    # every hour of the range once, shifted 6 hours like the monolithic request
+    expected = pd.date_range("2020-01-15 00:53", "2020-03-10 23:53", freq="h")
+    pd.testing.assert_index_equal(
+        data.index, expected - pd.Timedelta("6h"), check_names=False
+    )
+    assert data["air_pressure (mH2O)"].iat[0] == pytest.approx((10015.0 * 0.01) / 10)
+
+    # repeated and overlapping ranges only fetch the missing months
+    pd.testing.assert_frame_equal(fetch("2020-01-15", "2020-03-10"), data)
+    fetch("2020-02-10", "2020-04-05")
+    assert len(requests) == 4 and requests[-1] == ("2020-04-01", "2020-05-01")
+
+    pd.testing.assert_frame_equal(fetch("2020-01-15", "2020-03-10", offline=True), data)
+    with pytest.raises(FileNotFoundError):
+        fetch("2020-05-01", "2020-05-31", offline=True)
+    assert len(requests) == 4
+
+
+@pytest.mark.integrationtest
+def test_fetch_air_pressure_in_event_loop(noaa, tmp_path):
+    url, requests = noaa
+
+    async def fetch():
+        return readers.fetch_air_pressure(
+            "STATION", "2020-01-01", "2020-01-02", cache_directory=tmp_path, url=url
+        )
+
+    assert len(asyncio.run(fetch()).data) == 48
+    assert requests == [("2020-01-01", "2020-02-01")]
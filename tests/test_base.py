@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from DiverDataProcessor import base
+
+
+def timeseries(index):
+    return base.Timeseries(
+        pd.DataFrame({"value": np.arange(len(index), dtype=float)}, index=index)
+    )
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("source_freq", ["10min", "h", "3h", "D"])
+@pytest.mark.parametrize("freq", ["15min", "h", "D"])
+def test_reindex_time_regular(source_freq, freq):
+    index = pd.date_range("2024-01-01 00:13:16", periods=200, freq=source_freq)
+    series = timeseries(index)
+    date_range = pd.date_range("2023-12-30", "2024-01-12", freq=freq)
+
+    result = series.reindex_time("2023-12-30", "2024-01-12", freq)
+    expected = series.data.reindex(date_range, method="nearest", limit=1)
+    pd.testing.assert_frame_equal(result.data, expected)
+
+
+@pytest.mark.unittest
+def test_reindex_time_jitter():
+    index = pd.date_range("2024-01-01", periods=100, freq="h")
+    jittered = index + pd.to_timedelta(np.tile([0, 1, -1], 34)[:100], unit="s")
+    series = timeseries(jittered)
+
+    assert base._regular_times(series.data.index) is None
+    assert base._regular_times(series.data.index, jitter="2s") is not None
+
+    result = series.reindex_time("2024-01-01", "2024-01-04", "h", jitter="2s")
+    expected = series.reindex_time("2024-01-01", "2024-01-04", "h")
+    pd.testing.assert_frame_equal(result.data, expected.data)
+    np.testing.assert_array_equal(result.data["value"], np.arange(73.0))
+
+
+@pytest.mark.unittest
+def test_reindex_time_on_grid():
+    series = timeseries(pd.date_range("2024-01-01", "2024-01-31", freq="h"))
+    result = series.reindex_time("2024-01-01", "2024-01-31", "h")
+    assert np.shares_memory(result.data["value"], series.data["value"])
+    assert result.data.index.freq == "h"
+
+
+@pytest.mark.unittest
+def test_compact_timeseries():
+    index = pd.date_range("2024-01-01", periods=96, freq="h", name="date")
+    series = base.Timeseries(
+        pd.DataFrame({"a": np.arange(96.0), "b": np.arange(96.0) / 4}, index=index)
+    )
+    compact = series.compact()
+
+    assert compact.values.dtype == np.float32
+    assert compact.values[0].flags.c_contiguous
+    pd.testing.assert_frame_equal(
+        compact.data, series.data.astype(np.float32), check_freq=False
+    )
+    usage = compact.memory_usage()
+    assert list(usage.index) == ["Index", "a", "b"]
+    assert (usage[["a", "b"]] * 2 == series.memory_usage()[["a", "b"]]).all()
+
+    # slices are views of the arrays
+    selection = compact.select_daterange("2024-01-02", "2024-01-02")
+    assert isinstance(selection, base.CompactTimeseries)
+    assert len(selection.data) == 24
+    assert np.shares_memory(selection.values, compact.values)
+    assert np.shares_memory(compact["a"].to_numpy(), compact.values)
+
+    resampled = compact.resample("D")
+    assert isinstance(resampled, base.CompactTimeseries)
+    pd.testing.assert_frame_equal(
+        resampled.data, series.resample("D").data.astype(np.float32), check_freq=False
+    )
+
+    compact["a"] = 0.0
+    assert (compact.values[0] == 0).all()
@@ -0,0 +1,61 @@
+import matplotlib.image as mpimg
+import numpy as np
+import pandas as pd
+import pytest
+
+from DiverDataProcessor.base import Geology, ObservationWell
+from DiverDataProcessor.figures import batch
+
+
+def job(name, offset=0.0, precipitation=True):
+    index = pd.date_range("2024-01-01", periods=24 * 90, freq="h")
+    water_level = pd.Series(8.0 + offset + np.sin(np.arange(len(index)) / 50), index)
+    days = pd.date_range("2023-12-15", periods=90, freq="D")
+    return batch.FigureJob(
+        ObservationWell(name, "EU000", 10.0 + offset, 0.05, 5.0, 1.5),
+        Geology(
+            10.0 + offset,
+            np.array([0.0, 1.0, 2.5]),
+            np.array([1.0, 2.5, 6.0]),
+            np.array(["sand", "clay", "sand"]),
+        ),
+        water_level,
+        pd.Series(np.arange(90.0) % 7, days) if precipitation else None,
+    )
+
+
+@pytest.mark.unittest
+def test_template_reuse(tmp_path):
+    batch._templates.clear()
+    batch.render_figure(job("W1"), tmp_path / "fresh.png", dpi=50)
+
+    # a template that drew another well renders the same image
+    batch._templates.clear()
+    batch.render_figure(job("W2", 2.0, precipitation=False), tmp_path / "other.png")
+    batch.render_figure(job("W1"), tmp_path / "other.png", dpi=50)
+    batch.render_figure(job("W2", 2.0, precipitation=False), tmp_path / "x.png", dpi=50)
+    batch.render_figure(job("W1"), tmp_path / "reused.png", dpi=50)
+
+    assert len(batch._templates) == 2
+    np.testing.assert_array_equal(
+        mpimg.imread(tmp_path / "fresh.png"), mpimg.imread(tmp_path / "reused.png")
+    )
+
+
+@pytest.mark.integrationtest
+@pytest.mark.parametrize("workers", [1, 2])
+def test_render_figures(tmp_path, workers):
+    broken = job("BROKEN")
+    broken.geology = None
+    jobs = [job("W1"), job("W2", 1.0, precipitation=False), broken]
+    timings, errors = batch.render_figures(
+        jobs, tmp_path, fmt="pdf", workers=workers, dpi=50
+    )
+
+    assert list(timings.index) == ["W1", "W2"]
+    assert list(errors) == ["BROKEN"]
+    assert (timings["wall_time"] > 0).all()
+    assert all(path.read_bytes().startswith(b"%PDF") for path in timings["path"])
+
+    with pytest.raises(ValueError):
+        batch.render_figures([job("W1"), job("W1")], tmp_path)
@@ -0,0 +1,109 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from DiverDataProcessor import cache, readers
+
+
+@pytest.fixture
+def reader_cache(tmp_path):
+    reader_cache = cache.enable_cache(tmp_path / "cache")
+    yield reader_cache
+    cache.disable_cache()
+
+
+@pytest.fixture
+def tddata_copy(simple_tddata, tmp_path):
+    path = tmp_path / "TD.CSV"
+    shutil.copy(simple_tddata, path)
+    return path
+
+
+@pytest.mark.unittest
+def test_cache_roundtrip(reader_cache, tddata_copy, monkeypatch):
+    cold = readers.read_td_diver(tddata_copy)
+    assert len(list(reader_cache.directory.glob("*.parquet"))) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("source file parsed on a warm read")
+
+    monkeypatch.setattr(readers.pd, "read_csv", fail)
+    monkeypatch.setattr(cache, "content_hash", fail)
+    warm = readers.read_td_diver(tddata_copy)
+
+    pd.testing.assert_frame_equal(warm.data, cold.data, check_freq=False)
+
+
+@pytest.mark.unittest
+def test_cache_modified_file(reader_cache, tddata_copy):
+    readers.read_td_diver(tddata_copy)
+
+    lines = tddata_copy.read_text(encoding="ISO-8859-1").splitlines(keepends=True)
+    del lines[-2]
+    tddata_copy.write_text("".join(lines), encoding="ISO-8859-1")
+
+    assert readers.read_td_diver(tddata_copy).data.shape == (71, 2)
+
+
+@pytest.mark.unittest
+def test_cache_touched_file(reader_cache, tddata_copy):
+    readers.read_td_diver(tddata_copy)
+    stat = os.stat(tddata_copy)
+    os.utime(tddata_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    key = reader_cache._entry("read_td_diver", tddata_copy, {"dtype": None})
+    assert reader_cache.load("read_td_diver", tddata_copy, {"dtype": None}) is not None
+    assert cache.json.loads(key.with_suffix(".json").read_text())["mtime"] == (
+        stat.st_mtime_ns + 10**9
+    )
+
+
+@pytest.mark.unittest
+def test_cache_invalidate(reader_cache, tddata_copy, simple_tddata):
+    readers.read_td_diver(tddata_copy)
+    readers.read_td_diver(simple_tddata)
+
+    cache.invalidate(tddata_copy)
+    assert reader_cache.load("read_td_diver", tddata_copy, {"dtype": None}) is None
+    assert (
+        reader_cache.load("read_td_diver", simple_tddata, {"dtype": None}) is not None
+    )
+
+    cache.invalidate()
+    assert reader_cache.size() == 0
+
+
+@pytest.mark.unittest
+def test_cache_lru_eviction(reader_cache, tddata_copy, simple_tddata):
+    readers.read_td_diver(simple_tddata)
+    reader_cache.max_size = reader_cache.size()
+
+    readers.read_td_diver(tddata_copy)
+
+    assert reader_cache.load("read_td_diver", simple_tddata, {"dtype": None}) is None
+    assert reader_cache.load("read_td_diver", tddata_copy, {"dtype": None}) is not None
+
+
+@pytest.mark.unittest
+def test_cache_key_arguments(reader_cache, tddata_copy, monkeypatch):
+    cold = readers.read_td_diver(tddata_copy, dtype="float32")
+    assert readers.read_td_diver.__wrapped__.__name__ == "read_td_diver"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("source file parsed on a warm read")
+
+    monkeypatch.setattr(readers.pd, "read_csv", fail)
+    for args, kwargs in [
+        (("float32",), {}),
+        ((np.float32,), {}),
+        ((), {"dtype": np.dtype("float32")}),
+    ]:
+        warm = readers.read_td_diver(tddata_copy, *args, **kwargs)
+        pd.testing.assert_frame_equal(warm.data, cold.data, check_freq=False)
+    assert len(list(reader_cache.directory.glob("*.parquet"))) == 1
+
+    with pytest.raises(AssertionError, match="warm read"):
+        readers.read_td_diver(tddata_copy)
@@ -7,7 +7,7 @@ from numpy.testing import (
     assert_array_equal,
 )
 
-from DiverDataProcessor import processing, readers
+from DiverDataProcessor import base, processing, readers
 
 
 class TestCompensation:
@@ -55,3 +55,326 @@ class TestCompensation:
 
         # Check if the compensation is applied correctly
         assert np.all(np.isfinite(compensated_data.values))
+
+    @pytest.mark.integrationtest
+    @pytest.mark.parametrize("method", ["cable", "handreading"])
+    def test_baro_compensate_chunks(self, simple_barodata, simple_diverdata, method):
+        observation_well = base.ObservationWell("well", "AA01", 1.0, 0.0, 3.0, 1.5)
+        handreading = base.HandReading("2023-01-01 00:03:10", 0.5)
+
+        def chunks(timeseries, size):
+            for i in range(0, len(timeseries.data), size):
+                yield base.Timeseries(timeseries.data.iloc[i : i + size])
+
+        expected = processing.baro_compensate(
+            simple_barodata, simple_diverdata, handreading, observation_well, method
+        )
+        result = list(
+            processing.baro_compensate_chunks(
+                chunks(simple_barodata, 2),
+                chunks(simple_diverdata, 3),
+                handreading,
+                observation_well,
+                method,
+            )
+        )
+
+        assert len(result) == 4
+        pd.testing.assert_frame_equal(
+            pd.concat([chunk.data for chunk in result]), expected.data
+        )
+
+    @pytest.mark.integrationtest
+    @pytest.mark.parametrize("shared_index", [True, False])
+    def test_baro_compensate_batch(
+        self, simple_barodata, simple_diverdata, shared_index
+    ):
+        divers = {
+            "AA01": simple_diverdata,
+            "AA02": base.Timeseries(
+                simple_diverdata.data.iloc[: 5 if shared_index else 3] + 5.0
+            ),
+        }
+        wells = pd.DataFrame(
+            {
+                "top_well": [1.0, 1.0],
+                "diver_to_datum": [-0.5, np.nan],
+                "method": ["cable", "handreading"],
+                "handreading_datetime": [None, "2023-01-01 00:01:10"],
+                "handreading": [np.nan, 0.25],
+            },
+            index=["AA01", "AA02"],
+        )
+
+        result = processing.baro_compensate_batch(
+            simple_barodata, divers, wells, wide=False
+        )
+        wide = processing.baro_compensate_batch(simple_barodata, divers, wells)
+
+        observation_well = base.ObservationWell("well", "AA01", 1.0, 0.0, 3.0, 1.5)
+        handreading = base.HandReading("2023-01-01 00:01:10", 0.25)
+        expected = {
+            "AA01": processing.baro_compensate(
+                simple_barodata, divers["AA01"], None, observation_well, "cable"
+            ),
+            "AA02": processing.baro_compensate(
+                simple_barodata,
+                divers["AA02"],
+                handreading,
+                observation_well,
+                "handreading",
+            ),
+        }
+        assert list(result) == ["AA01", "AA02"]
+        assert wide.data.columns.tolist() == ["AA01", "AA02"]
+        for code in expected:
+            pd.testing.assert_frame_equal(
+                result[code].data, expected[code].data, check_freq=False
+            )
+            assert_array_equal(
+                wide[code].values, expected[code]["water_level (m datum)"].values
+            )
+
+    @pytest.mark.integrationtest
+    def test_baro_compensate_batch_unsorted(self, simple_barodata, simple_diverdata):
+        order = [3, 0, 4, 1, 2]
+        divers = {
+            "AA01": base.Timeseries(simple_diverdata.data.iloc[order]),
+            "AA02": base.Timeseries(simple_diverdata.data.iloc[order] + 5.0),
+        }
+        wells = pd.DataFrame(
+            {"top_well": [1.0, 1.0], "diver_to_datum": [-0.5, 0.5]},
+            index=["AA01", "AA02"],
+        )
+        # the baro timestamps are a subset of the diver timestamps
+        baro = base.Timeseries(simple_barodata.data.iloc[1:])
+
+        result = processing.baro_compensate_batch(baro, divers, wells, wide=False)
+
+        observation_well = base.ObservationWell("well", "AA01", 1.0, 0.0, 3.0, 1.5)
+        for code, diver_to_datum in wells["diver_to_datum"].items():
+            observation_well.diver_to_datum = diver_to_datum
+            expected = processing.baro_compensate(
+                baro, divers[code], None, observation_well, "cable"
+            )
+            pd.testing.assert_frame_equal(
+                result[code].data, expected.data.sort_index(), check_freq=False
+            )
+
+    @pytest.mark.unittest
+    def test_select_baro(self, simple_barodata):
+        baro = base.Timeseries(simple_barodata.data.iloc[::2])  # every 2 minutes
+        start, end = "2023-01-01 00:01:00", "2023-01-01 00:03:00"
+
+        exact = processing.select_baro(baro, start, end)
+        assert exact.data.index.tolist() == [pd.Timestamp("2023-01-01 00:02:00")]
+        linear = processing.select_baro(baro, start, end, "linear")
+        assert linear.data.index.tolist() == baro.data.index.tolist()
+
+        unsorted = base.Timeseries(baro.data.iloc[::-1])
+        nearest = processing.select_baro(
+            unsorted, start, "2023-01-01 00:02:00", "nearest"
+        )
+        pd.testing.assert_frame_equal(nearest.data, baro.data)
+        with pytest.raises(ValueError):
+            processing.select_baro(baro, start, end, "forward")
+
+    @pytest.mark.unittest
+    def test_baro_compensate_batch_missing_well(
+        self, simple_barodata, simple_diverdata
+    ):
+        wells = pd.DataFrame(
+            {"top_well": [1.0], "diver_to_datum": [0.0]}, index=["AA02"]
+        )
+        with pytest.raises(ValueError):
+            processing.baro_compensate_batch(
+                simple_barodata, {"AA01": simple_diverdata}, wells
+            )
+
+    @pytest.mark.unittest
+    def test_water_column_from_clock_offset(self, simple_barodata, simple_diverdata):
+        baro = base.Timeseries(simple_barodata.data.shift(5, freq="s"))
+
+        exact = processing._water_column_from(baro, simple_diverdata)
+        nearest = processing._water_column_from(
+            baro, simple_diverdata, alignment="nearest", tolerance="10s"
+        )
+        backward = processing._water_column_from(
+            baro, simple_diverdata, alignment="backward", tolerance="1min"
+        )
+
+        assert exact["water_column (m)"].isna().all()
+        assert nearest.data.index.equals(simple_diverdata.data.index)
+        assert_array_equal(
+            nearest["water_column (m)"].values, [0.0, 10.0, 20.0, 30.0, 30.0]
+        )
+        assert_array_equal(
+            backward["water_column (m)"].values, [np.nan, 10.0, 20.0, 30.0, 40.0]
+        )
+
+    @pytest.mark.unittest
+    def test_water_column_from_linear(self, simple_diverdata):
+        baro = base.Timeseries(
+            pd.DataFrame(
+                {"air_pressure (mH2O)": [1000.0, 1004.0]},
+                index=pd.to_datetime(["2023-01-01 00:00:00", "2023-01-01 00:04:00"]),
+            )
+        )
+
+        water_column = processing._water_column_from(
+            baro, simple_diverdata, alignment="linear"
+        )
+        too_far = processing._water_column_from(
+            baro, simple_diverdata, alignment="linear", tolerance="1min"
+        )
+
+        assert_array_almost_equal(
+            water_column["water_column (m)"].values, [0.0, 9.0, 18.0, 27.0, 36.0]
+        )
+        assert_array_almost_equal(
+            too_far["water_column (m)"].values, [0.0, np.nan, np.nan, np.nan, 36.0]
+        )
+
+    @pytest.mark.unittest
+    @pytest.mark.parametrize("alignment", ["nearest", "backward", "linear"])
+    def test_water_column_from_unsorted(
+        self, simple_barodata, simple_diverdata, alignment
+    ):
+        baro = base.Timeseries(simple_barodata.data.shift(5, freq="s"))
+        diver = base.Timeseries(simple_diverdata.data.iloc[[3, 0, 4, 1, 2]])
+        expected = processing._water_column_from(baro, diver, alignment=alignment)
+
+        shuffled = base.Timeseries(baro.data.iloc[[2, 4, 0, 3, 1]])
+        water_column = processing._water_column_from(
+            shuffled, diver, alignment=alignment
+        )
+
+        assert water_column.data.index.equals(diver.data.index)
+        assert_array_equal(
+            water_column["water_column (m)"].values,
+            expected["water_column (m)"].values,
+        )
+        assert_array_equal(
+            expected.data.sort_index()["water_column (m)"].values,
+            processing._water_column_from(baro, simple_diverdata, alignment=alignment)[
+                "water_column (m)"
+            ].values,
+        )
+
+    @pytest.mark.unittest
+    def test_water_column_from_invalid_alignment(
+        self, simple_barodata, simple_diverdata
+    ):
+        with pytest.raises(ValueError):
+            processing._water_column_from(
+                simple_barodata, simple_diverdata, alignment="forward"
+            )
+
+    @pytest.mark.integrationtest
+    @pytest.mark.parametrize(
+        "drift_correction, expected_offsets, expected_residuals",
+        [
+            ("linear", [-20.0, -20.5, -21.0, -21.5, -22.0], [1.0, 0.0, -1.0]),
+            ("step", [-20.0, -20.0, -21.0, -21.0, -22.0], [1.0, -1.0, -1.0]),
+            ("constant", [-21.0] * 5, [1.5, 0.0, -1.5]),
+        ],
+    )
+    def test_baro_compensate_multiple_handreadings(
+        self,
+        simple_barodata,
+        simple_diverdata,
+        drift_correction,
+        expected_offsets,
+        expected_residuals,
+    ):
+        observation_well = base.ObservationWell("well", "AA01", 0.0, 0.0, 3.0)
+        handreadings = [
+            base.HandReading("2023-01-01 00:04:00", -8.0),
+            base.HandReading("2023-01-01 00:00:00", 20.0),
+            base.HandReading("2023-01-01 00:02:00", 1.0),
+        ]
+
+        water_level, residuals = processing.baro_compensate(
+            simple_barodata,
+            simple_diverdata,
+            handreadings,
+            observation_well,
+            method="handreading",
+            drift_correction=drift_correction,
+            return_residuals=True,
+        )
+
+        water_column = np.array([0.0, 10.0, 20.0, 30.0, 30.0])
+        assert_array_almost_equal(
+            water_level["water_level (m datum)"].values,
+            water_column + expected_offsets,
+        )
+        assert residuals.index.is_monotonic_increasing
+        assert_array_almost_equal(
+            residuals["diver_to_datum (m)"].values, [-20.0, -21.0, -22.0]
+        )
+        assert_array_almost_equal(residuals["residual (m)"].values, expected_residuals)
+
+    @pytest.mark.unittest
+    def test_baro_compensate_single_handreading_residual(
+        self, simple_barodata, simple_diverdata
+    ):
+        observation_well = base.ObservationWell("well", "AA01", 0.0, 0.0, 3.0)
+        handreading = base.HandReading("2023-01-01 00:02:00", 1.0)
+
+        water_level, residuals = processing.baro_compensate(
+            simple_barodata,
+            simple_diverdata,
+            handreading,
+            observation_well,
+            method="handreading",
+            return_residuals=True,
+        )
+
+        assert_array_equal(
+            water_level["water_level (m datum)"].values,
+            [-21.0, -11.0, -1.0, 9.0, 9.0],
+        )
+        assert np.isnan(residuals["residual (m)"].iloc[0])
+
+    @pytest.mark.unittest
+    def test_leave_one_out_offsets_guards(self):
+        datetimes = pd.to_datetime(["2023-01-01 00:00", "2023-01-01 00:02"])
+        assert processing.compensation._leave_one_out_offsets(
+            datetimes[:0], np.array([]), "linear"
+        ).shape == (0,)
+        assert np.isnan(
+            processing.compensation._leave_one_out_offsets(
+                datetimes[:1], np.array([1.0]), "step"
+            )
+        ).all()
+
+        duplicated = datetimes[[0, 1, 1]]
+        with pytest.raises(ValueError, match="same datetime"):
+            processing.compensation._leave_one_out_offsets(
+                duplicated, np.array([1.0, 2.0, 3.0]), "linear"
+            )
+
+    @pytest.mark.unittest
+    @pytest.mark.parametrize(
+        "handreadings",
+        [
+            [],
+            [
+                base.HandReading("2023-01-01 00:02:00", 1.0),
+                base.HandReading("2023-01-01 00:02:00", 1.1),
+            ],
+        ],
+    )
+    def test_baro_compensate_invalid_handreadings(
+        self, simple_barodata, simple_diverdata, handreadings
+    ):
+        observation_well = base.ObservationWell("well", "AA01", 0.0, 0.0, 3.0)
+        with pytest.raises(ValueError, match="[Hh]andreadings"):
+            processing.baro_compensate(
+                simple_barodata,
+                simple_diverdata,
+                handreadings,
+                observation_well,
+                method="handreading",
+            )
@@ -0,0 +1,65 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from DiverDataProcessor.base import ObservationWell
+from DiverDataProcessor.figures import GeologyGroundwater, decimation
+
+
+@pytest.fixture
+def water_level():
+    index = pd.date_range("2020-01-01", periods=200_000, freq="min")
+    values = np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(index)))
+    values[50_000:60_000] = np.nan
+    return pd.Series(values, index=index)
+
+
+@pytest.mark.unittest
+def test_m4_indices(water_level):
+    x = water_level.index.asi8
+    y = water_level.to_numpy()
+    selected = decimation.m4_indices(x, y, 100)
+
+    assert len(selected) <= 4 * 100 + 4
+    assert selected[0] == 0 and selected[-1] == len(y) - 1
+    # the extremes of every bucket are kept, and the gap still interrupts the line
+    buckets = decimation._buckets(x, 100)
+    extremes = pd.Series(y).groupby(buckets).agg(["min", "max"])
+    kept = pd.Series(y[selected]).groupby(buckets[selected]).agg(["min", "max"])
+    pd.testing.assert_frame_equal(kept.dropna(), extremes.dropna())
+    assert np.isnan(y[selected]).sum() == 1
+
+    assert len(decimation.m4_indices(x[:300], y[:300], 100)) == 300
+
+
+@pytest.mark.unittest
+def test_max_per_bucket():
+    precipitation = pd.Series(
+        np.arange(1000.0), pd.date_range("2020-01-01", periods=1000, freq="D")
+    )
+    maxima, width = decimation.max_per_bucket(precipitation, 100)
+
+    assert len(maxima) == 100
+    assert maxima.max() == 999.0
+    assert width == pytest.approx(999 / 100)
+    assert maxima.index[0] == precipitation.index[0]
+
+
+@pytest.mark.integrationtest
+def test_plot_decimated(water_level):
+    fig = GeologyGroundwater(
+        ObservationWell("W1", "EU000", 10.0, 0.05, 5.0, 1.5), figsize=(8, 4)
+    )
+    fig.geology.set_ylim(-10, 10)
+    fig.plot_water_level(water_level, units="m", dpi=100)
+    fig.plot_precipitation(water_level.resample("h").max().clip(0), dpi=100)
+
+    n_buckets = decimation.BUCKETS_PER_PIXEL * decimation.axis_pixels(
+        fig.water_level, 100
+    )
+    assert len(fig.water_level.lines[0].get_xdata()) <= 4 * n_buckets + 1
+    assert len(fig.precipitation.patches) <= decimation.axis_pixels(
+        fig.precipitation, 100
+    )
+    plt.close(fig.fig)
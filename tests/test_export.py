@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from DiverDataProcessor import base, export
+
+
+@pytest.fixture
+def water_level():
+    index = pd.date_range("2023-12-01", "2024-01-31 23:00", freq="h", name="date")
+    values = np.linspace(0.0, 1.0, len(index))
+    return base.Timeseries(pd.DataFrame({"water_level (m datum)": values}, index=index))
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("fmt", ["parquet", "feather", "netcdf"])
+def test_roundtrip(tmp_path, water_level, fmt):
+    written = export.write_timeseries(water_level, tmp_path, "B 01", fmt=fmt)
+    assert [p.parent.name for p in written] == ["year=2023", "year=2024"]
+
+    result = export.read_timeseries(tmp_path, fmt=fmt)
+    pd.testing.assert_frame_equal(
+        result["B 01"].data, water_level.data, check_freq=False
+    )
+
+
+@pytest.mark.unittest
+def test_read_selection(tmp_path, water_level):
+    export.write_timeseries_batch(
+        {"B01": water_level, "B02": water_level}, tmp_path, float32=True
+    )
+    result = export.read_timeseries(
+        tmp_path, wells="B02", start="2024-01-10", end="2024-01-10 23:00"
+    )
+    assert list(result) == ["B02"]
+    data = result["B02"].data
+    assert len(data) == 24
+    assert data.index[0] == pd.Timestamp("2024-01-10")
+    assert data["water_level (m datum)"].dtype == np.float32
+
+    assert export.read_timeseries(tmp_path, start="2025-01-01") == {}
+
+
+@pytest.mark.unittest
+def test_append(tmp_path, water_level):
+    first, second = water_level.data.iloc[:1000], water_level.data.iloc[1000:]
+    existing, *_ = export.write_timeseries(base.Timeseries(first), tmp_path, "B01")
+    mtime = existing.stat().st_mtime_ns
+
+    export.write_timeseries(base.Timeseries(second), tmp_path, "B01")
+    assert existing.stat().st_mtime_ns == mtime
+
+    result = export.read_timeseries(tmp_path, wells=["B01"])
+    pd.testing.assert_frame_equal(
+        result["B01"].data, water_level.data, check_freq=False
+    )
+
+
+@pytest.mark.unittest
+def test_invalid_format(tmp_path, water_level):
+    with pytest.raises(ValueError):
+        export.write_timeseries(water_level, tmp_path, "B01", fmt="csv")
@@ -0,0 +1,49 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ["matplotlib", "geopandas", "contextily", "xarray"]
+
+
+def _import_in_subprocess(statement: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+@pytest.mark.unittest
+def test_import_does_not_load_heavy_dependencies():
+    result = _import_in_subprocess(
+        "import sys; import DiverDataProcessor; "
+        "from DiverDataProcessor import processing, readers; "
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.mark.unittest
+def test_import_time():
+    result = _import_in_subprocess("import DiverDataProcessor")
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, total, name = line.split("|")
+        cumulative[name.strip()] = int(total) / 1e6  # seconds
+
+    overhead = cumulative["DiverDataProcessor"] - cumulative.get("pandas", 0.0)
+    assert overhead < 1.0
+
+
+@pytest.mark.unittest
+def test_lazy_figures():
+    result = _import_in_subprocess(
+        "import DiverDataProcessor as ddp; "
+        "print(ddp.figures.GeologyGroundwater.__name__)"
+    )
+    assert result.stdout.strip() == "GeologyGroundwater"
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from DiverDataProcessor import ingest, processing, readers, runner, store
+
+EXAMPLE_DATA = Path(__file__).parents[1] / "examples" / "data"
+
+
+@pytest.fixture
+def observation_wells():
+    metadata, _ = runner.read_metadata(EXAMPLE_DATA / "metadata.xlsx")
+    return {
+        str(well_id): runner.observation_well_from(metadata_well)
+        for well_id, metadata_well in metadata.iterrows()
+    }
+
+
+def service(tmp_path, **kwargs):
+    watched = tmp_path / "incoming"
+    watched.mkdir(exist_ok=True)
+    return ingest.IngestService(
+        watched,
+        store.DiverStore(tmp_path / "store"),
+        settle=0.2,
+        poll_interval=0.05,
+        **kwargs,
+    )
+
+
+async def run_until(service, condition, timeout=20.0):
+    stop = asyncio.Event()
+    task = asyncio.create_task(service.run(stop))
+    start = time.monotonic()
+    while not condition():
+        assert time.monotonic() - start < timeout, service.files
+        await asyncio.sleep(0.05)
+    stop.set()
+    await task
+
+
+@pytest.mark.unittest
+def test_scan_settles(tmp_path):
+    watch = service(tmp_path)
+    filepath = watch.directory / "EXAMPLE_1.CSV"
+    filepath.write_text("Data file for DataLogger.\n")
+    assert watch.scan() == []
+
+    # still being written
+    time.sleep(0.1)
+    with open(filepath, "a") as f:
+        f.write("more\n")
+    assert watch.scan() == []
+    time.sleep(0.25)
+    assert watch.scan() == [filepath]
+    assert watch.files["EXAMPLE_1.CSV"]["state"] == "queued"
+    time.sleep(0.25)
+    assert watch.scan() == []
+
+
+def ingested(service, *names):
+    return lambda: all(
+        service.files.get(name, {}).get("state") in ("ingested", "failed")
+        for name in names
+    )
+
+
+def expected_water_level(observation_well, name):
+    # the clocks of the example baro and divers differ some minutes
+    diver = readers.read_td_diver(EXAMPLE_DATA / name)
+    baro = readers.read_baro_diver(EXAMPLE_DATA / "BARO.CSV")
+    expected = processing.baro_compensate(
+        baro, diver, None, observation_well, "cable", alignment="nearest"
+    )
+    return expected.data["water_level (m datum)"].reindex(diver.data.index).dropna()
+
+
+@pytest.mark.integrationtest
+def test_ingest_folder(tmp_path, observation_wells):
+    watch = service(tmp_path, observation_wells=observation_wells, alignment="nearest")
+    for name in ["BARO.CSV", "EXAMPLE_1.CSV"]:
+        shutil.copy(EXAMPLE_DATA / name, watch.directory)
+
+    asyncio.run(run_until(watch, ingested(watch, "BARO.CSV", "EXAMPLE_1.CSV")))
+
+    status = json.loads(watch.status_path.read_text())
+    assert not status["running"]
+    assert status["files"]["BARO.CSV"]["kind"] == "baro"
+    record = status["files"]["EXAMPLE_1.CSV"]
+    assert record["state"] == "ingested", record
+    assert record["well"] == "EXAMPLE_1"
+
+    expected = expected_water_level(observation_wells["EXAMPLE_1"], "EXAMPLE_1.CSV")
+    assert not expected.empty
+    stored = watch.store.read_water_level("EXAMPLE_1")
+    pd.testing.assert_series_equal(
+        stored["water_level (m datum)"].dropna(),
+        expected,
+        check_names=False,
+        check_freq=False,
+        check_index_type=False,
+    )
+
+    # a restarted service skips ingested files and reads the baro from the store
+    restarted = service(
+        tmp_path, observation_wells=observation_wells, alignment="nearest"
+    )
+    assert restarted.scan() == []
+    assert restarted.baro is not None
+    shutil.copy(EXAMPLE_DATA / "EXAMPLE_2.CSV", restarted.directory)
+    asyncio.run(run_until(restarted, ingested(restarted, "EXAMPLE_2.CSV")))
+    assert restarted.files["EXAMPLE_2.CSV"]["state"] == "ingested"
+    assert restarted.files["EXAMPLE_2.CSV"]["latency"] < 10
+    pd.testing.assert_series_equal(
+        restarted.store.read_water_level("EXAMPLE_2")["water_level (m datum)"].dropna(),
+        expected_water_level(observation_wells["EXAMPLE_2"], "EXAMPLE_2.CSV"),
+        check_names=False,
+        check_freq=False,
+        check_index_type=False,
+    )
+
+
+@pytest.mark.integrationtest
+def test_ingest_diver_before_baro(tmp_path, observation_wells):
+    watch = service(tmp_path, observation_wells=observation_wells, alignment="nearest")
+    shutil.copy(EXAMPLE_DATA / "EXAMPLE_1.CSV", watch.directory)
+    asyncio.run(run_until(watch, ingested(watch, "EXAMPLE_1.CSV")))
+
+    assert watch.files["EXAMPLE_1.CSV"]["state"] == "ingested"
+    assert list(watch.status()["uncompensated"]) == ["EXAMPLE_1"]
+    assert watch.store.read_water_level("EXAMPLE_1") is None
+
+    # the uncompensated period survives a restart and is compensated with the baro
+    restarted = service(
+        tmp_path, observation_wells=observation_wells, alignment="nearest"
+    )
+    assert list(restarted.uncompensated) == ["EXAMPLE_1"]
+    shutil.copy(EXAMPLE_DATA / "BARO.CSV", restarted.directory)
+    asyncio.run(run_until(restarted, ingested(restarted, "BARO.CSV")))
+
+    record = restarted.files["BARO.CSV"]
+    assert record["state"] == "ingested", record
+    expected = expected_water_level(observation_wells["EXAMPLE_1"], "EXAMPLE_1.CSV")
+    assert record["compensated"] == {"EXAMPLE_1": len(expected)}
+    assert restarted.status()["uncompensated"] == {}
+    pd.testing.assert_series_equal(
+        restarted.store.read_water_level("EXAMPLE_1")["water_level (m datum)"].dropna(),
+        expected,
+        check_names=False,
+        check_freq=False,
+        check_index_type=False,
+    )
+
+
+@pytest.mark.unittest
+def test_ingest_failed(tmp_path):
+    watch = service(tmp_path)
+    (watch.directory / "notes.csv").write_text("not a diver export\n")
+    asyncio.run(
+        run_until(
+            watch,
+            lambda: "notes.csv" in watch.files
+            and watch.files["notes.csv"]["state"] == "failed",
+        )
+    )
+    assert "ValueError" in watch.status()["files"]["notes.csv"]["error"]
+    assert watch.status()["failed"] == 1
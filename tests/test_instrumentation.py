@@ -0,0 +1,93 @@
+import json
+
+import pandas as pd
+import pytest
+
+from DiverDataProcessor import base, instrumentation, processing, readers
+
+
+@pytest.fixture
+def recorder():
+    recorder = instrumentation.enable_instrumentation()
+    yield recorder
+    instrumentation.disable_instrumentation()
+
+
+@pytest.mark.unittest
+def test_disabled_records_nothing(recorder, simple_tddata):
+    readers.read_td_diver(simple_tddata)
+    assert len(recorder.records) == 1
+
+    assert instrumentation.disable_instrumentation() is recorder
+    diver = readers.read_td_diver(simple_tddata)
+    diver.resample("h")
+    assert len(recorder.records) == 1
+
+
+@pytest.mark.unittest
+def test_reader_and_timeseries_stages(recorder, simple_tddata):
+    diver = readers.read_td_diver(simple_tddata)
+    with instrumentation.well("B01"):
+        diver.resample("h")
+
+    read, resample = recorder.records
+    assert read.stage == "readers.read_td_diver"
+    assert read.well == simple_tddata.stem
+    assert read.rows == len(diver.data)
+    assert read.wall_time > 0
+    assert read.peak_memory is None
+    assert resample.stage == "Timeseries.resample"
+    assert resample.well == "B01"
+
+
+@pytest.mark.integrationtest
+def test_compensation_stage_and_callback(simple_diverdata, simple_barodata):
+    received = []
+    recorder = instrumentation.enable_instrumentation(
+        callback=received.append, trace_memory=True
+    )
+    try:
+        observation_well = base.ObservationWell("B01", "B01", 1.0, 0.0, 12.0, 6.0)
+        processing.baro_compensate(
+            simple_barodata, simple_diverdata, None, observation_well
+        )
+    finally:
+        instrumentation.disable_instrumentation()
+
+    assert received == recorder.records
+    (metrics,) = received
+    assert metrics.stage == "compensation.baro_compensate"
+    assert metrics.well == "B01"
+    assert metrics.rows == 5
+    assert metrics.peak_memory > 0
+    assert metrics.depth == 0
+
+
+@pytest.mark.unittest
+def test_nested_stages_and_report(recorder, simple_tddata, tmp_path):
+    readers.read_diver_directory(simple_tddata.parent, kind="td", workers=1)
+
+    report = recorder.report()
+    assert list(report["stage"]) == [
+        "readers.read_td_diver",
+        "readers.read_diver_directory",
+    ]
+    assert list(report["depth"]) == [1, 0]
+
+    recorder.to_json(tmp_path / "report.json")
+    recorder.to_csv(tmp_path / "report.csv")
+    assert len(json.loads((tmp_path / "report.json").read_text())) == 2
+    csv_report = pd.read_csv(tmp_path / "report.csv")
+    assert list(csv_report.columns) == list(report.columns)
+    assert list(csv_report["stage"]) == list(report["stage"])
+
+
+@pytest.mark.unittest
+def test_positional_arguments(recorder, simple_tddata, simple_barodata):
+    diver = readers.read_td_diver(simple_tddata, "float32")
+    observation_well = base.ObservationWell("B01", "B01", 1.0, 0.0, 12.0, 6.0)
+    processing.baro_compensate(simple_barodata, diver, None, observation_well, "cable")
+
+    read, compensate = recorder.records
+    assert read.well == simple_tddata.stem
+    assert compensate.well == "B01"
@@ -0,0 +1,121 @@
+import pandas as pd
+import pytest
+
+from DiverDataProcessor import base, processing
+from DiverDataProcessor.processing import memo
+
+
+@pytest.fixture
+def water_column_memo():
+    water_column_memo = processing.enable_water_column_memo()
+    yield water_column_memo
+    processing.disable_water_column_memo()
+
+
+@pytest.mark.unittest
+def test_memo_disabled_by_default():
+    assert processing.water_column_memo() is None
+
+
+@pytest.fixture
+def observation_well():
+    return base.ObservationWell("well", "AA01", 1.0, 0.0, 3.0, 1.5)
+
+
+@pytest.mark.unittest
+def test_fingerprint(simple_diverdata):
+    series = simple_diverdata["diver_pressure (mH2O)"]
+    assert memo.fingerprint(series) == memo.fingerprint(series.copy())
+
+    changed = series.copy()
+    changed.iloc[2] += 1
+    assert memo.fingerprint(changed) != memo.fingerprint(series)
+
+    swapped = series.copy()
+    swapped.iloc[[1, 2]] = swapped.iloc[[2, 1]].to_numpy()
+    assert memo.fingerprint(swapped) != memo.fingerprint(series)
+
+    shifted = series.copy()
+    shifted.index = shifted.index + pd.Timedelta("1s")
+    assert memo.fingerprint(shifted) != memo.fingerprint(series)
+
+    assert memo.fingerprint(series.astype("float32")) != memo.fingerprint(series)
+    localized = series.tz_localize("UTC")
+    assert memo.fingerprint(localized) != memo.fingerprint(series)
+    assert memo.fingerprint(series.iloc[:-1]) != memo.fingerprint(series)
+
+
+@pytest.mark.unittest
+def test_memo_shared_between_methods(
+    water_column_memo, simple_barodata, simple_diverdata, observation_well
+):
+    handreading = base.HandReading("2023-01-01 00:03:10", 0.5)
+    cable = processing.baro_compensate(
+        simple_barodata, simple_diverdata, None, observation_well, "cable"
+    )
+    hand = processing.baro_compensate(
+        simple_barodata, simple_diverdata, handreading, observation_well, "handreading"
+    )
+    assert water_column_memo.statistics()["misses"] == 1
+    assert water_column_memo.statistics()["hits"] == 1
+
+    processing.disable_water_column_memo()
+    pd.testing.assert_frame_equal(
+        cable.data,
+        processing.baro_compensate(
+            simple_barodata, simple_diverdata, None, observation_well, "cable"
+        ).data,
+    )
+    pd.testing.assert_frame_equal(
+        hand.data,
+        processing.baro_compensate(
+            simple_barodata,
+            simple_diverdata,
+            handreading,
+            observation_well,
+            "handreading",
+        ).data,
+    )
+
+
+@pytest.mark.unittest
+def test_memo_misses(
+    water_column_memo, simple_barodata, simple_diverdata, observation_well
+):
+    before = processing.baro_compensate(
+        simple_barodata, simple_diverdata, None, observation_well, "cable"
+    )
+    processing.baro_compensate(
+        simple_barodata,
+        simple_diverdata,
+        None,
+        observation_well,
+        "cable",
+        water_density=1025.0,
+    )
+    simple_diverdata.data.iloc[0, 0] = 1005
+    water_level = processing.baro_compensate(
+        simple_barodata, simple_diverdata, None, observation_well, "cable"
+    )
+
+    assert water_column_memo.statistics()["misses"] == 3
+    assert water_column_memo.statistics()["hits"] == 0
+    difference = water_level.data.iloc[0, 0] - before.data.iloc[0, 0]
+    assert difference == pytest.approx(5.0)
+
+
+@pytest.mark.unittest
+def test_memo_eviction(simple_barodata, simple_diverdata):
+    water_column_memo = memo.WaterColumnMemo(max_size=1)
+    water_column = processing._water_column_from(simple_barodata, simple_diverdata)
+    nbytes = water_column.data.memory_usage(index=True).sum()
+    water_column_memo.max_size = 2 * nbytes
+
+    for key in ["a", "b", "a", "c"]:
+        water_column_memo.get(key, lambda: water_column)
+
+    assert water_column_memo.statistics()["hits"] == 1
+    assert water_column_memo.statistics()["evictions"] == 1
+    assert water_column_memo.size() == 2 * nbytes
+    water_column_memo.get("b", lambda: water_column)
+    assert water_column_memo.statistics()["misses"] == 4
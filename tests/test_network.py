@@ -0,0 +1,116 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from DiverDataProcessor import processing, readers
+from DiverDataProcessor.base import ObservationWell
+from DiverDataProcessor.network import WellNetwork
+
+EXAMPLE_DATA = Path(__file__).parents[1] / "examples" / "data"
+WELLS = ["EXAMPLE_1", "EXAMPLE_2"]
+
+
+def observation_well(name):
+    return ObservationWell(name, "EU000", 10.0, 0.05, 5.0, cable_length=1.5)
+
+
+@pytest.mark.unittest
+def test_write_and_select(tmp_path, simple_tddata):
+    diver = readers.read_td_diver(simple_tddata)
+    start = diver.data.index[0].strftime("%Y-%m-%d")
+    end = diver.data.index[-1].strftime("%Y-%m-%d")
+    network = WellNetwork.create(
+        tmp_path / "network.zarr", ["A", "B"], start, end, "h", time_chunk=24
+    )
+    network.write("B", diver)
+
+    assert network.dataset["temperature"].data.chunksize == (1, 24)
+    expected = diver.reindex_time(start, end, "h").data["temperature (degC)"]
+    temperature = network.timeseries("B").data["temperature (degC)"]
+    np.testing.assert_allclose(temperature, expected, rtol=1e-6)
+    assert network.timeseries("A").data["temperature (degC)"].isna().all()
+
+    selection = network.sel("B", start, start, variables=["temperature"])
+    assert selection["temperature"].shape == (1, 24)
+
+    daily = network.resample("D", variables=["temperature"]).compute()
+    pd.testing.assert_series_equal(
+        daily["temperature"].sel(well="B").to_series(),
+        expected.astype(np.float32).resample("D").mean(),
+        check_names=False,
+        check_index_type=False,
+        check_freq=False,
+    )
+    statistics = network.statistics(["count", "max"], variables=["temperature"])
+    assert statistics["temperature"].sel(stat="count").values.tolist() == [
+        0,
+        expected.count(),
+    ]
+
+    path = network.to_netcdf(tmp_path / "network.nc")
+    assert WellNetwork(path).dataset.equals(network.dataset)
+
+
+@pytest.mark.integrationtest
+@pytest.mark.parametrize("workers", [1, 2])
+def test_build(tmp_path, workers):
+    files = {well: EXAMPLE_DATA / f"{well}.CSV" for well in WELLS}
+    files["MISSING"] = EXAMPLE_DATA / "MISSING.CSV"
+    baro = readers.read_baro_diver(EXAMPLE_DATA / "BARO.CSV")
+    network, errors = WellNetwork.build(
+        tmp_path / "network.zarr",
+        files,
+        "2024-03-01",
+        "2024-06-30",
+        "h",
+        baro=baro,
+        observation_wells={well: observation_well(well) for well in WELLS},
+        workers=workers,
+    )
+
+    assert list(errors) == ["MISSING"]
+    assert network.wells == [*WELLS, "MISSING"]
+
+    diver = readers.read_td_diver(files["EXAMPLE_2"])
+    baro = baro.reindex_time("2024-03-01", "2024-06-30")
+    diver = diver.reindex_time("2024-03-01", "2024-06-30")
+    expected = processing.baro_compensate(
+        baro, diver, None, observation_well("EXAMPLE_2")
+    )
+    water_level = network.timeseries("EXAMPLE_2").data["water_level (m datum)"]
+    np.testing.assert_allclose(
+        water_level, expected.data["water_level (m datum)"], atol=1e-5
+    )
+
+
+@pytest.mark.integrationtest
+def test_build_coarse_baro(tmp_path):
+    files = {"EXAMPLE_1": EXAMPLE_DATA / "EXAMPLE_1.CSV"}
+    baro = readers.read_baro_diver(EXAMPLE_DATA / "BARO.CSV")
+    baro = type(baro)(baro.data.iloc[::6])  # a 6-hourly baro on an hourly grid
+    kwargs = {"alignment": "linear", "tolerance": "6h"}
+    network, errors = WellNetwork.build(
+        tmp_path / "network.zarr",
+        files,
+        "2024-03-01",
+        "2024-03-31",
+        "h",
+        baro=baro,
+        observation_wells={"EXAMPLE_1": observation_well("EXAMPLE_1")},
+        workers=1,
+        **kwargs,
+    )
+
+    assert errors == {}
+    diver = readers.read_td_diver(files["EXAMPLE_1"])
+    diver = diver.reindex_time("2024-03-01", "2024-03-31", "h")
+    expected = processing.baro_compensate(
+        baro, diver, None, observation_well("EXAMPLE_1"), **kwargs
+    )
+    expected = expected.data["water_level (m datum)"]
+    water_level = network.timeseries("EXAMPLE_1").data["water_level (m datum)"]
+    # all grid timestamps between two baro samples are compensated
+    assert expected.count() > 0.95 * diver.data["diver_pressure (mH2O)"].count()
+    np.testing.assert_allclose(water_level, expected, atol=1e-5)
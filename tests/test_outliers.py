@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_array_equal
+
+from DiverDataProcessor import base, outliers
+
+
+@pytest.fixture
+def spiky_data():
+    rng = np.random.default_rng(0)
+    n = 500
+    data = pd.DataFrame(
+        {
+            "diver_pressure (mH2O)": 10.0 + rng.normal(0.0, 0.01, n),
+            "temperature (degC)": 12.0 + rng.normal(0.0, 0.01, n),
+        },
+        index=pd.date_range("2023-01-01", periods=n, freq="min", name="date"),
+    )
+    data.iloc[100, 0] = 15.0
+    data.iloc[300:320, 1] = 12.5
+    return data
+
+
+@pytest.mark.unittest
+def test_hampel(spiky_data):
+    flags = outliers.hampel(spiky_data.to_numpy(), window=11)
+
+    assert flags[100, 0]
+    assert not flags[99, 0] and not flags[101, 0]
+
+
+@pytest.mark.unittest
+def test_hampel_flat_spike():
+    # the MAD of flat data is zero
+    values = np.full((100, 2), 12.0)
+    values[50, 0] += 0.01
+    flags = outliers.hampel(values, window=11)
+    assert_array_equal(np.argwhere(flags), [[50, 0]])
+
+    flags = outliers.hampel(values, window=11, min_deviation=0.01)
+    assert not flags.any()
+
+
+@pytest.mark.unittest
+def test_hampel_quantized():
+    # a slow rise recorded at a resolution of 1 mm, flickering by a single step: the
+    # MAD is zero on each stair
+    rng = np.random.default_rng(0)
+    flicker = rng.choice([-0.001, 0.0, 0.001], 1000, p=[0.03, 0.94, 0.03])
+    values = np.round(np.linspace(10.0, 10.05, 1000) / 0.001) * 0.001 + flicker
+    values = np.column_stack([values, np.full(1000, 12.0)])
+    assert outliers.hampel(values, window=11).any()
+    assert not outliers.hampel(values, window=11, min_deviation=0.0015).any()
+
+    values[500, 0] += 0.1
+    values[200, 1] += 0.1
+    flags = outliers.hampel(values, window=11, min_deviation=np.array([0.005, 0.5]))
+    assert_array_equal(np.argwhere(flags), [[500, 0]])
+
+    mask = outliers.outlier_mask(
+        pd.DataFrame(values, columns=["a", "b"]),
+        window=11,
+        min_deviation={"a": 0.005, "b": 0.5},
+    )
+    assert_array_equal(np.argwhere(mask.to_numpy()), [[500, 0]])
+
+
+@pytest.mark.unittest
+def test_hampel_even_window(spiky_data):
+    with pytest.raises(ValueError):
+        outliers.hampel(spiky_data.to_numpy(), window=10)
+
+
+@pytest.mark.unittest
+def test_rate_of_change(spiky_data):
+    flags = outliers.rate_of_change(
+        spiky_data.to_numpy(), spiky_data.index, np.array([60.0, np.inf]), per="1h"
+    )
+
+    assert_array_equal(np.flatnonzero(flags[:, 0]), [100, 101])
+    assert not flags[:, 1].any()
+
+
+@pytest.mark.unittest
+def test_flatline():
+    values = np.array([[1.0, 1.0, 1.0, 2.0, 3.0, 3.0, 3.0, 3.0, np.nan, np.nan]]).T
+
+    flags = outliers.flatline(values, min_length=3)
+
+    assert_array_equal(flags[:, 0], [1, 1, 1, 0, 1, 1, 1, 1, 0, 0])
+
+
+@pytest.mark.unittest
+def test_outlier_mask(spiky_data):
+    mask = outliers.outlier_mask(
+        spiky_data, max_rate={"diver_pressure (mH2O)": 60.0}, min_flat=10
+    )
+
+    assert mask.index.equals(spiky_data.index)
+    assert mask.columns.equals(spiky_data.columns)
+    assert mask["diver_pressure (mH2O)"].sum() == 2
+    assert mask["temperature (degC)"].sum() == 20
+
+
+@pytest.mark.integrationtest
+@pytest.mark.parametrize("chunksize", [1, 7, 100, 1000])
+def test_iter_outlier_masks(spiky_data, chunksize):
+    detectors = dict(window=11, max_rate=60.0, min_flat=10)
+    chunks = (
+        base.Timeseries(spiky_data.iloc[i : i + chunksize])
+        for i in range(0, len(spiky_data), chunksize)
+    )
+
+    mask = pd.concat(list(outliers.iter_outlier_masks(chunks, **detectors)))
+
+    pd.testing.assert_frame_equal(mask, outliers.outlier_mask(spiky_data, **detectors))
+
+
+@pytest.mark.unittest
+def test_timeseries_remove_outliers(spiky_data):
+    timeseries = base.Timeseries(spiky_data.copy())
+    timeseries.remove_outliers()
+    assert np.isnan(timeseries["diver_pressure (mH2O)"].iloc[100])
+
+    timeseries = base.Timeseries(spiky_data.copy())
+    timeseries.remove_outliers(min_flat=10)
+    assert timeseries["temperature (degC)"].isna().sum() == 20
+    assert timeseries["diver_pressure (mH2O)"].notna().all()
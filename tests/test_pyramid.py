@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from DiverDataProcessor import base, pyramid
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2024-01-01 00:07", "2024-03-10", freq="7min", name="date")
+    data = pd.DataFrame(
+        {"a": rng.normal(size=len(index)), "b": rng.normal(size=len(index))},
+        index=index,
+    )
+    data.iloc[100:300, 0] = np.nan
+    return data
+
+
+def assert_levels_equal(left, right):
+    for level in pyramid.LEVELS:
+        pd.testing.assert_frame_equal(
+            left.levels[level], right.levels[level], check_freq=False
+        )
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("freq", ["h", "6h", "D", "W-MON", "MS", "QS"])
+def test_query_equals_resample(data, freq):
+    result = pyramid.AggregatePyramid.build(data).query(freq=freq)
+    binned = data.resample(freq, closed="left", label="left")
+    for stat in pyramid.STATS:
+        expected = getattr(binned, stat)()
+        pd.testing.assert_frame_equal(
+            result.xs(stat, axis=1, level="stat"),
+            expected,
+            check_freq=False,
+            check_names=False,
+            check_dtype=stat != "count",
+        )
+
+
+@pytest.mark.unittest
+def test_update_and_rebuild(data):
+    full = pyramid.AggregatePyramid.build(data)
+
+    updated = pyramid.AggregatePyramid.build(data.iloc[:7000])
+    updated.update(data.iloc[7000:])
+    assert_levels_equal(updated, full)
+    with pytest.raises(ValueError):
+        updated.update(data.iloc[-10:])
+
+    start = data.index[5000]
+    rebuilt = pyramid.AggregatePyramid.build(data.drop(data.index[5000:5050]))
+    rebuilt.rebuild(data.loc[rebuilt.rebuild_start(start) :], start)
+    assert_levels_equal(rebuilt, full)
+
+
+@pytest.mark.unittest
+def test_parquet_roundtrip(data, tmp_path):
+    original = pyramid.AggregatePyramid.build(data)
+    original.to_parquet(tmp_path)
+    result = pyramid.AggregatePyramid.read_parquet(tmp_path)
+    assert result.last == data.index[-1]
+    assert_levels_equal(result, original)
+    assert pyramid.AggregatePyramid.read_parquet(tmp_path / "missing") is None
+
+
+@pytest.mark.unittest
+def test_coarsest_level():
+    assert pyramid.coarsest_level("3h") == "h"
+    assert pyramid.coarsest_level("2D") == "D"
+    assert pyramid.coarsest_level("W-MON") == "W-MON"
+    assert pyramid.coarsest_level("W-SUN") == "D"
+    assert pyramid.coarsest_level("YS") == "MS"
+    with pytest.raises(ValueError):
+        pyramid.coarsest_level("15min")
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize(
+    "freq", ["h", "6h", "D", "W", "MS", "ME", "QS", "15min", "5h", "2D"]
+)
+def test_timeseries_resample(data, freq):
+    series = base.Timeseries(data)
+    whole = pyramid.AggregatePyramid.build(data)
+    expected = data.resample(freq).mean()
+    pd.testing.assert_frame_equal(
+        series.resample(freq, pyramid=whole).data, expected, check_freq=False
+    )
+
+    # the inner bins are taken from the pyramid
+    shifted = pyramid.AggregatePyramid.build(data + 1.0)
+    inner = series.resample(freq, pyramid=shifted).data.iloc[1:-1]
+    offset = 1.0 if pyramid.default_bins(freq) else 0.0
+    pd.testing.assert_frame_equal(inner, expected.iloc[1:-1] + offset, check_freq=False)
+
+    # a part of the series, with the pyramid of the whole series
+    part = base.Timeseries(data.loc["2024-01-15 10:00":"2024-02-20 13:00"])
+    pd.testing.assert_frame_equal(
+        part.resample(freq, pyramid=whole).data,
+        part.data.resample(freq).mean(),
+        check_freq=False,
+    )
+
+
+@pytest.mark.unittest
+def test_default_bins():
+    assert pyramid.default_bins("D")
+    assert pyramid.default_bins("QS")
+    assert not pyramid.default_bins("W-MON")  # closed on the right by pandas
+    assert not pyramid.default_bins("ME")
+    assert not pyramid.default_bins("15min")
+    assert not pyramid.default_bins("5h")  # anchored on the first sample
+    assert not pyramid.default_bins("2D")
+    assert not pyramid.default_bins("2MS")
@@ -0,0 +1,121 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_array_equal
+
+from DiverDataProcessor import base, quality
+
+EXAMPLE_DATA = Path(__file__).parents[1] / "examples" / "data"
+
+
+@pytest.fixture
+def faulty_data():
+    rng = np.random.default_rng(0)
+    n = 2000
+    times = pd.date_range("2024-01-01", periods=n, freq="min").as_unit("ns").asi8
+    times[1000:] += pd.Timedelta("1h").value  # gap
+    times[100] = times[99]  # duplicate
+    times[500] = times[490]  # clock reset
+    times[1500:1510] += pd.Timedelta("30s").value  # drift
+    pressure = 10.0 + np.cumsum(rng.normal(0.0, 0.001, n))
+    pressure[1200:] += 0.5  # re-hung
+    pressure[1700] += 3.0  # spike, not a jump
+    pressure[300:320] = pressure[300]  # flatline
+    return pd.DataFrame(
+        {
+            "diver_pressure (mH2O)": pressure,
+            "temperature (degC)": 10.0,
+        },
+        index=pd.DatetimeIndex(times, name="date"),
+    )
+
+
+@pytest.mark.unittest
+def test_scan(faulty_data):
+    issues = base.Timeseries(faulty_data).quality_scan()
+    index = faulty_data.index
+
+    assert list(issues.columns) == quality.COLUMNS
+    assert issues["start"].is_monotonic_increasing
+    by_issue = issues.set_index("issue")
+
+    assert by_issue.loc["duplicate", "start"] == index[99]
+    assert by_issue.loc["duplicate", "samples"] == 2
+    assert by_issue.loc["non_monotonic", "end"] == index[500]
+    assert by_issue.loc["non_monotonic", "value"] == -540.0
+
+    gaps = by_issue.loc["gap"].set_index("start")
+    assert gaps.loc[index[999], "end"] == index[1000]
+    assert gaps.loc[index[999], "samples"] == 60
+
+    assert by_issue.loc["clock_drift", "start"] == index[1500]
+    assert by_issue.loc["clock_drift", "samples"] == 10
+    assert by_issue.loc["clock_drift", "value"] == 30.0
+
+    assert by_issue.loc["flatline", "start"] == index[300]
+    assert by_issue.loc["flatline", "samples"] == 20
+    assert by_issue.loc["flatline", "column"] == "diver_pressure (mH2O)"
+
+    # the temperature column is not checked, the spike is not a jump
+    assert by_issue.loc["jump", "end"] == index[1200]
+    assert by_issue.loc["jump", "value"] == pytest.approx(0.5, abs=0.01)
+
+
+@pytest.mark.unittest
+def test_scan_clean():
+    data = pd.DataFrame(
+        {"diver_pressure (mH2O)": np.linspace(10.0, 11.0, 100)},
+        index=pd.date_range("2024-01-01", periods=100, freq="10min"),
+    )
+    issues = quality.scan(data)
+    assert issues.empty
+    assert list(issues.columns) == quality.COLUMNS
+
+
+@pytest.mark.unittest
+def test_issue_mask(faulty_data):
+    issues = quality.scan(faulty_data)
+    mask = quality.issue_mask(faulty_data.index[:1000], issues, ["flatline"])
+    assert_array_equal(np.flatnonzero(mask), np.arange(300, 320))
+
+
+@pytest.mark.unittest
+def test_reindex_time_max_gap():
+    index = pd.date_range("2024-01-01", periods=24, freq="h")
+    index = index[(index < "2024-01-01 10:00") | (index > "2024-01-01 14:00")]
+    timeseries = base.Timeseries(
+        pd.DataFrame({"a": np.arange(len(index), dtype=float)}, index=index)
+    )
+
+    filled = timeseries.reindex_time("2024-01-01", "2024-01-02", "30min")
+    reindexed = timeseries.reindex_time(
+        "2024-01-01", "2024-01-02", "30min", max_gap="2h"
+    )
+
+    gap = slice("2024-01-01 09:01", "2024-01-01 14:59")
+    assert filled.data.loc[gap, "a"].notna().sum() == 2
+    assert reindexed.data.loc[gap, "a"].isna().all()
+    outside = reindexed.data.index.to_series().between(
+        "2024-01-01 09:01", "2024-01-01 14:59"
+    )
+    pd.testing.assert_frame_equal(reindexed.data[~outside], filled.data[~outside])
+
+
+@pytest.mark.integrationtest
+@pytest.mark.parametrize("workers", [1, 2])
+def test_scan_project(faulty_data, workers):
+    wells = {
+        "faulty": base.Timeseries(faulty_data),
+        "EXAMPLE_1": EXAMPLE_DATA / "EXAMPLE_1.CSV",
+        "missing": EXAMPLE_DATA / "missing.CSV",
+    }
+    issues, errors = quality.scan_project(wells, workers=workers)
+
+    assert list(errors) == ["missing"]
+    assert list(issues.columns) == ["well", *quality.COLUMNS]
+    pd.testing.assert_frame_equal(
+        issues[issues["well"] == "faulty"].drop(columns="well"),
+        quality.scan(faulty_data),
+    )
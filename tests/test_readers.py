@@ -11,8 +11,8 @@ from DiverDataProcessor import readers
 
 
 @pytest.mark.unittest
-def test_read_td_diver(simple_diverdata):
-    diver_data = readers.read_td_diver(simple_diverdata)
+def test_read_td_diver(simple_tddata):
+    diver_data = readers.read_td_diver(simple_tddata)
 
     expected_columns = [
         "temperature (degC)",
@@ -22,3 +22,83 @@ def test_read_td_diver(simple_diverdata):
     assert diver_data.data.shape == (72, 2)
     assert diver_data.data.columns.tolist() == expected_columns
     assert isinstance(diver_data.data.index, pd.DatetimeIndex)
+
+
+@pytest.mark.unittest
+def test_locate_data_section(simple_tddata):
+    skiprows, delimiter, decimal = readers._locate_data_section(simple_tddata)
+
+    assert skiprows == 52
+    assert delimiter == ";"
+    assert decimal == ","
+
+
+@pytest.mark.unittest
+def test_read_td_diver_comma_delimited(tmp_path):
+    path = tmp_path / "TD.CSV"
+    path.write_text(
+        "Data file for DataLogger.\n"
+        "[Logger settings]\n"
+        "Date/time,Pressure[cmH2O],Temperature[ C]\n"
+        "2023/11/04 00:00:00,1034.958,29.773\n"
+        "2023/11/04 01:00:00,     ,29.767\n"
+        "END OF DATA FILE OF DATALOGGER FOR WINDOWS\n",
+        encoding="ISO-8859-1",
+    )
+    diver_data = readers.read_td_diver(path)
+
+    assert diver_data.data.shape == (2, 2)
+    assert_array_almost_equal(
+        diver_data["diver_pressure (mH2O)"].values, [10.34958, np.nan]
+    )
+    assert_array_equal(diver_data["temperature (degC)"].values, [29.773, 29.767])
+
+
+@pytest.mark.unittest
+def test_detect_diver_kind(simple_tddata, tmp_path):
+    baro = tmp_path / "BARO.CSV"
+    baro.write_bytes(simple_tddata.read_bytes())
+    diverlink = tmp_path / "LINK.CSV"
+    diverlink.write_text("Date and time (UTC-06:00),Sensor,Temperature,Pressure\n")
+
+    assert readers.detect_diver_kind(simple_tddata) == "td"
+    assert readers.detect_diver_kind(baro) == "baro"
+    assert readers.detect_diver_kind(diverlink) == "diverlink"
+
+
+@pytest.mark.integrationtest
+@pytest.mark.parametrize("workers", [1, 2])
+def test_read_diver_directory(simple_tddata, tmp_path, workers):
+    for code in ["AA01", "AA02"]:
+        (tmp_path / f"{code}.CSV").write_bytes(simple_tddata.read_bytes())
+    (tmp_path / "BROKEN.CSV").write_text("not a diver file\n")
+
+    timeseries, errors = readers.read_diver_directory(tmp_path, workers=workers)
+
+    assert list(timeseries) == ["AA01", "AA02"]
+    assert timeseries["AA01"].data.shape == (72, 2)
+    assert list(errors) == ["BROKEN"]
+    assert isinstance(errors["BROKEN"], ValueError)
+
+
+@pytest.mark.unittest
+def test_iter_diver_chunks(simple_tddata):
+    chunks = list(readers.iter_diver_chunks(simple_tddata, chunksize=30))
+
+    assert [len(chunk.data) for chunk in chunks] == [30, 30, 12]
+    pd.testing.assert_frame_equal(
+        pd.concat([chunk.data for chunk in chunks]),
+        readers.read_td_diver(simple_tddata).data,
+    )
+
+
+@pytest.mark.unittest
+def test_read_td_diver_float32(simple_tddata):
+    diver_data = readers.read_td_diver(simple_tddata, dtype="float32")
+    expected = readers.read_td_diver(simple_tddata)
+
+    assert (diver_data.data.dtypes == np.float32).all()
+    assert_array_almost_equal(diver_data.data, expected.data, decimal=5)
+
+    chunks = readers.iter_diver_chunks(simple_tddata, chunksize=30, dtype="float32")
+    assert all((chunk.data.dtypes == np.float32).all() for chunk in chunks)
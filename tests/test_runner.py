@@ -0,0 +1,86 @@
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from DiverDataProcessor import runner
+
+EXAMPLE_DATA = Path(__file__).parents[1] / "examples" / "data"
+
+
+@pytest.fixture
+def project(tmp_path):
+    diver_data = tmp_path / "data" / "diver_data"
+    diver_data.mkdir(parents=True)
+    shutil.copy(EXAMPLE_DATA / "metadata.xlsx", tmp_path / "data")
+    shutil.copy(EXAMPLE_DATA / "BARO.CSV", tmp_path / "data")
+    for path in EXAMPLE_DATA.glob("EXAMPLE_*.CSV"):
+        shutil.copy(path, diver_data)
+    return tmp_path
+
+
+def run(project, **kwargs):
+    return runner.run_project(
+        project / "data" / "metadata.xlsx",
+        project / "data" / "BARO.CSV",
+        project / "data" / "diver_data",
+        project / "exports",
+        "2024-03-01",
+        "2024-06-30",
+        workers=1,
+        figures=False,
+        **kwargs,
+    )
+
+
+@pytest.mark.unittest
+def test_read_metadata():
+    metadata, geology = runner.read_metadata(EXAMPLE_DATA / "metadata.xlsx")
+    assert list(metadata.index) == ["EXAMPLE_1", "EXAMPLE_2"]
+    assert set(geology) == {"EXAMPLE_1", "EXAMPLE_2"}
+
+
+@pytest.mark.integrationtest
+def test_run_project_incremental(project):
+    assert run(project) == (["EXAMPLE_1", "EXAMPLE_2"], [], {})
+    water_level = pd.read_csv(project / "exports" / "EXAMPLE_1.csv", index_col=0)
+    assert list(water_level.columns) == ["water_level (m datum)"]
+
+    assert run(project) == ([], ["EXAMPLE_1", "EXAMPLE_2"], {})
+
+    # a new download of a single diver only recomputes that well
+    with open(project / "data" / "diver_data" / "EXAMPLE_2.CSV", "a") as f:
+        f.write("\n")
+    assert run(project) == (["EXAMPLE_2"], ["EXAMPLE_1"], {})
+
+    assert run(project, force=True) == (["EXAMPLE_1", "EXAMPLE_2"], [], {})
+
+
+@pytest.mark.integrationtest
+def test_run_project_missing_diver(project):
+    (project / "data" / "diver_data" / "EXAMPLE_1.CSV").unlink()
+    computed, skipped, errors = run(project)
+    assert computed == ["EXAMPLE_2"]
+    assert isinstance(errors["EXAMPLE_1"], FileNotFoundError)
+
+
+@pytest.mark.unittest
+def test_match_well():
+    wells = ["B1", "B12", "PB1_2"]
+    assert runner.match_well("B1", wells) == "B1"
+    assert runner.match_well("B12", wells) == "B12"
+    assert runner.match_well("2024-06_B1", wells) == "B1"
+    assert runner.match_well("B1_20240601", wells) == "B1"
+    assert runner.match_well("PB1_2_20240601", wells) == "PB1_2"
+    assert runner.match_well("B13", wells) is None
+    assert runner.match_well("AB1", wells) is None
+
+
+@pytest.mark.integrationtest
+def test_run_project_missing_diver_prefix(project):
+    diver_data = project / "data" / "diver_data"
+    (diver_data / "EXAMPLE_1.CSV").rename(diver_data / "EXAMPLE_10.CSV")
+    computed, skipped, errors = run(project)
+    assert computed == ["EXAMPLE_2"]
+    assert isinstance(errors["EXAMPLE_1"], FileNotFoundError)
@@ -0,0 +1,73 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from DiverDataProcessor import base, processing, shared
+
+
+def _sum_air_pressure(shared_baro):
+    return float(shared.attach(shared_baro)["air_pressure (mH2O)"].sum())
+
+
+@pytest.fixture
+def baro():
+    index = pd.date_range("2024-03-31", periods=500, freq="min", tz="Europe/Amsterdam")
+    rng = np.random.default_rng(0)
+    return base.Timeseries(
+        pd.DataFrame(
+            {
+                "air_pressure (mH2O)": 10 + rng.random(500),
+                "temperature (degC)": rng.random(500),
+            },
+            index=index.rename("date"),
+        )
+    )
+
+
+@pytest.mark.unittest
+def test_publish_attach(baro, tmp_path):
+    with shared.SharedTimeseries.publish(baro, tmp_path / "baro") as shared_baro:
+        attached = pickle.loads(pickle.dumps(shared_baro)).timeseries
+        pd.testing.assert_frame_equal(attached.data, baro.data, check_freq=False)
+        assert isinstance(attached.values, np.memmap)
+        assert not attached.values.flags.writeable
+        with pytest.raises(ValueError):
+            attached["air_pressure (mH2O)"] = 0.0
+
+        pd.testing.assert_frame_equal(
+            attached.reindex_time("2024-03-31", "2024-04-01").data,
+            baro.reindex_time("2024-03-31", "2024-04-01").data,
+            check_freq=False,
+        )
+    assert not (tmp_path / "baro").exists()
+
+
+@pytest.mark.unittest
+def test_baro_compensate_shared(baro):
+    diver = base.Timeseries(
+        baro.data[["air_pressure (mH2O)"]].rename(
+            columns={"air_pressure (mH2O)": "diver_pressure (mH2O)"}
+        )
+        + 2.0
+    )
+    observation_well = base.ObservationWell("well", "AA01", 1.0, 0.0, 3.0, 1.5)
+    expected = processing.baro_compensate(baro, diver, None, observation_well, "cable")
+    with shared.SharedTimeseries.publish(baro) as shared_baro:
+        result = processing.baro_compensate(
+            shared_baro.timeseries, diver, None, observation_well, "cable"
+        )
+    pd.testing.assert_frame_equal(result.data, expected.data, check_freq=False)
+
+
+@pytest.mark.integrationtest
+def test_attach_in_workers(baro):
+    with (
+        shared.SharedTimeseries.publish(baro) as shared_baro,
+        ProcessPoolExecutor(max_workers=2) as executor,
+    ):
+        assert len(pickle.dumps(shared_baro)) < 1000
+        sums = list(executor.map(_sum_air_pressure, [shared_baro] * 4))
+    assert sums == pytest.approx([baro["air_pressure (mH2O)"].sum()] * 4)
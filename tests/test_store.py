@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from DiverDataProcessor import base, export, processing, store
+
+
+def diver_data(start, end):
+    index = pd.date_range(start, end, freq="h", name="date")
+    hours = (index - pd.Timestamp("2024-01-01")) / pd.Timedelta("1h")
+    return base.Timeseries(
+        pd.DataFrame(
+            {"temperature (degC)": 10.0, "diver_pressure (mH2O)": 11.0 + hours / 1e4},
+            index=index,
+        )
+    )
+
+
+@pytest.fixture
+def diver_store(tmp_path):
+    diver_store = store.DiverStore(tmp_path)
+    diver_store.append("B01", diver_data("2024-01-01", "2024-02-29 23:00"))
+    return diver_store
+
+
+@pytest.mark.unittest
+def test_append_overlap(diver_store, monkeypatch):
+    read_windows = []
+    read_timeseries = export.read_timeseries
+
+    def spy(root, wells=None, start=None, end=None, **kwargs):
+        read_windows.append((start, end))
+        return read_timeseries(root, wells, start, end, **kwargs)
+
+    monkeypatch.setattr(export, "read_timeseries", spy)
+    appended, conflicts = diver_store.append(
+        "B01", diver_data("2024-02-15", "2024-03-31 23:00")
+    )
+
+    # only the overlap window is read back
+    assert read_windows == [
+        (pd.Timestamp("2024-02-15"), pd.Timestamp("2024-02-29 23:00"))
+    ]
+    assert appended.data.index[0] == pd.Timestamp("2024-03-01")
+    assert conflicts.empty
+    assert diver_store.last_timestamp("B01") == pd.Timestamp("2024-03-31 23:00")
+
+    monkeypatch.undo()
+    pd.testing.assert_frame_equal(
+        diver_store.read("B01").data,
+        diver_data("2024-01-01", "2024-03-31 23:00").data,
+        check_freq=False,
+    )
+
+
+@pytest.mark.unittest
+def test_append_conflicts_and_gaps(tmp_path):
+    diver_store = store.DiverStore(tmp_path)
+    first = diver_data("2024-01-01", "2024-01-10").data
+    diver_store.append("B01", base.Timeseries(first.drop(first.index[5])))
+
+    second = diver_data("2024-01-01", "2024-01-12").data
+    second.iloc[3, 1] += 0.05
+    appended, conflicts = diver_store.append("B01", base.Timeseries(second))
+
+    assert appended.data.index[0] == first.index[5]  # the gap is filled
+    assert len(appended.data) == 1 + 48
+    assert list(conflicts.index) == [second.index[3]]
+    assert conflicts["column"].iloc[0] == "diver_pressure (mH2O)"
+    np.testing.assert_allclose(conflicts["new"] - conflicts["stored"], 0.05)
+
+    stored = diver_store.read("B01").data
+    assert stored.iloc[3, 1] == first.iloc[3, 1]  # the stored value is kept
+    assert len(diver_store.read_conflicts("B01")) == 1
+
+
+@pytest.mark.unittest
+def test_append_duplicate_timestamps(diver_store):
+    data = diver_data("2024-03-01", "2024-03-02").data
+    repeated = data.iloc[[2, 5]].copy()
+    repeated.iloc[1, 1] += 0.05  # a different value at the same timestamp
+    download = pd.concat([data, repeated])
+
+    appended, conflicts = diver_store.append("B01", base.Timeseries(download))
+
+    # the first sample of the download is kept
+    pd.testing.assert_frame_equal(appended.data, data, check_freq=False)
+    assert list(conflicts.index) == [data.index[5]]
+    assert conflicts["column"].iloc[0] == "diver_pressure (mH2O)"
+    assert conflicts["stored"].iloc[0] == data.iloc[5, 1]
+    assert conflicts["new"].iloc[0] == repeated.iloc[1, 1]
+    assert len(diver_store.read_conflicts("B01")) == 1
+
+
+@pytest.mark.integrationtest
+def test_update_compensates_new_samples(diver_store):
+    observation_well = base.ObservationWell("B01", "B01", 1.0, 0.0, 12.0, 6.0)
+    index = pd.date_range("2024-01-01", "2024-03-31 23:00", freq="h", name="date")
+    baro = base.Timeseries(pd.DataFrame({"air_pressure (mH2O)": 10.3}, index=index))
+
+    water_level, conflicts = diver_store.update(
+        "B01",
+        diver_data("2024-02-15", "2024-03-31 23:00"),
+        baro,
+        None,
+        observation_well,
+    )
+    assert water_level.data.index[0] == pd.Timestamp("2024-03-01")
+    assert conflicts.empty
+    pd.testing.assert_frame_equal(
+        diver_store.read_water_level("B01").data,
+        water_level.data,
+        check_freq=False,
+    )
+
+    water_level, _ = diver_store.update(
+        "B01", diver_data("2024-03-01", "2024-03-31"), baro, None, observation_well
+    )
+    assert water_level.data.empty
+
+
+@pytest.mark.unittest
+def test_pyramid_follows_appends(diver_store):
+    diver_store.append("B01", diver_data("2024-02-15", "2024-03-31 23:00"))
+    daily = diver_store.query("B01", freq="D", stats=["mean"], dataset="raw")
+
+    expected = diver_store.read("B01").data.resample("D").mean()
+    pd.testing.assert_frame_equal(
+        daily.droplevel("stat", axis=1), expected, check_freq=False, check_names=False
+    )
+
+
+@pytest.mark.unittest
+def test_resample_from_pyramid(diver_store, monkeypatch):
+    samples = diver_store.read("B01").data
+
+    def fail(*args, **kwargs):
+        raise AssertionError("samples read for a coarse resolution")
+
+    monkeypatch.setattr(export, "read_timeseries", fail)
+    weekly = diver_store.resample("B01", "W-MON", dataset="raw")
+    monkeypatch.undo()
+
+    expected = samples.resample("W-MON", closed="left", label="left").mean()
+    pd.testing.assert_frame_equal(
+        weekly.data, expected, check_freq=False, check_names=False
+    )
+
+    fine = diver_store.resample("B01", "15min", "2024-01-02", "2024-01-03", "raw")
+    pd.testing.assert_frame_equal(
+        fine.data,
+        samples.loc["2024-01-02":"2024-01-03 00:00"].resample("15min").mean(),
+        check_freq=False,
+    )
+    assert diver_store.resample("B02", "D", dataset="raw") is None
+
+
+@pytest.mark.integrationtest
+def test_compensate_after_baro(diver_store, tmp_path):
+    observation_well = base.ObservationWell("B01", "B01", 1.0, 0.0, 12.0, 6.0)
+    index = pd.date_range("2024-01-01", "2024-02-29 23:00", freq="h", name="date")
+    baro = pd.DataFrame({"air_pressure (mH2O)": 10.3}, index=index)
+
+    # the baro only covers january
+    appended = diver_store.append_baro(base.Timeseries(baro.loc[:"2024-01-31 23:00"]))
+    assert len(appended.data) == 31 * 24
+    water_level = diver_store.compensate(
+        "B01", diver_store.read_baro(), None, observation_well
+    )
+    missing = water_level.data["water_level (m datum)"].isna()
+    assert water_level.data.index[missing][0] == pd.Timestamp("2024-02-01")
+
+    # a baro download covering february only compensates the missing samples
+    appended = diver_store.append_baro(base.Timeseries(baro))
+    assert appended.data.index[0] == pd.Timestamp("2024-02-01")
+    reloaded = store.DiverStore(tmp_path).read_baro()
+    pd.testing.assert_frame_equal(reloaded.data, baro, check_freq=False)
+    water_level = diver_store.compensate("B01", reloaded, None, observation_well)
+    assert water_level.data.index[0] == pd.Timestamp("2024-02-01")
+    assert water_level.data.notna().all().all()
+
+    stored = diver_store.read_water_level("B01").data
+    assert stored.index.is_unique
+    assert len(stored) == len(index)
+
+
+@pytest.mark.integrationtest
+def test_update_coarse_baro(diver_store):
+    observation_well = base.ObservationWell("B01", "B01", 1.0, 0.0, 12.0, 6.0)
+    # a baro sampled every 3 days, the last sample before the download is 2 days
+    # before its first sample
+    index = pd.date_range("2024-02-27", "2024-04-03", freq="3D", name="date")
+    baro = base.Timeseries(
+        pd.DataFrame({"air_pressure (mH2O)": 10.3 + np.arange(len(index)) / 100}, index)
+    )
+    diver = diver_data("2024-03-01", "2024-03-31 23:00")
+
+    water_level, _ = diver_store.update(
+        "B01", diver, baro, None, observation_well, alignment="linear"
+    )
+    expected = processing.baro_compensate(
+        baro, diver, None, observation_well, "cable", alignment="linear"
+    )
+    assert water_level.data.notna().all().all()
+    pd.testing.assert_frame_equal(water_level.data, expected.data, check_freq=False)
+
+
+@pytest.mark.unittest
+def test_update_handreading(diver_store):
+    observation_well = base.ObservationWell("B01", "B01", 1.0, 0.0, 12.0, 6.0)
+    index = pd.date_range("2024-01-01", "2024-03-31 23:00", freq="h", name="date")
+    baro = base.Timeseries(pd.DataFrame({"air_pressure (mH2O)": 10.3}, index=index))
+    diver = diver_data("2024-02-15", "2024-03-31 23:00")
+
+    with pytest.raises(ValueError, match="outside"):
+        diver_store.update(
+            "B01",
+            diver,
+            baro,
+            base.HandReading("2024-01-10 00:00:00", 0.5),
+            observation_well,
+            "handreading",
+        )
+    with pytest.raises(ValueError, match="Residuals"):
+        diver_store.update(
+            "B01", diver, baro, None, observation_well, return_residuals=True
+        )
+    assert diver_store.last_timestamp("B01") == pd.Timestamp("2024-02-29 23:00")
+
+    # a hand reading in the overlap with the stored samples
+    handreading = base.HandReading("2024-02-20 00:00:00", 0.5)
+    water_level, _ = diver_store.update(
+        "B01", diver, baro, handreading, observation_well, "handreading"
+    )
+    expected = processing.baro_compensate(
+        baro, diver, handreading, observation_well, "handreading"
+    )
+    pd.testing.assert_frame_equal(
+        water_level.data,
+        expected.data.loc["2024-03-01":],
+        check_freq=False,
+    )